@@ -0,0 +1,381 @@
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import threading
+import time
+from collections import deque
+
+ADB_HOST = "127.0.0.1"
+ADB_PORT = int(os.environ.get("ANDROID_ADB_SERVER_PORT", 5037))
+
+ADB_FALLBACK_PATHS = [
+    r"C:\LDPlayer\LDPlayer9\adb.exe",
+    r"C:\LDPlayer\LDPlayer4.0\adb.exe",
+    r"C:\Program Files\LDPlayer\LDPlayer4.0\adb.exe",
+    r"C:\Program Files (x86)\LDPlayer\LDPlayer4.0\adb.exe"
+]
+
+
+# Seconds a single adb command may take before its connection is closed or its process killed
+COMMAND_TIMEOUT = 60
+
+
+class AdbError(Exception):
+    pass
+
+
+def find_adb():
+    adb_path = shutil.which("adb")
+    if not adb_path:
+        adb_path = next((p for p in ADB_FALLBACK_PATHS if os.path.exists(p)), None)
+    if not adb_path:
+        raise FileNotFoundError("ADB executable not found. Please install LDPlayer or add adb to PATH.")
+    return adb_path
+
+
+async def communicate_or_kill(proc, timeout=COMMAND_TIMEOUT):
+    """proc.communicate(), killing the process when the caller is cancelled or it runs past timeout
+    seconds, so no adb child outlives it"""
+    try:
+        return await asyncio.wait_for(proc.communicate(), timeout)
+    except BaseException as e:
+        if proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+        if isinstance(e, asyncio.TimeoutError):
+            raise AdbError(f"adb did not finish within {timeout}s") from None
+        raise
+
+
+def encode_request(request):
+    data = request.encode("utf-8")
+    return b"%04x" % len(data) + data
+
+
+def recv_exact(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise AdbError("Connection closed by adb server")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def recv_all(sock):
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def read_status(sock):
+    status = recv_exact(sock, 4)
+    if status == b"OKAY":
+        return
+    if status == b"FAIL":
+        raise AdbError(read_length_prefixed(sock).decode("utf-8", "replace"))
+    raise AdbError(f"Unexpected adb response: {status!r}")
+
+
+def read_length_prefixed(sock):
+    length = int(recv_exact(sock, 4), 16)
+    return recv_exact(sock, length)
+
+
+class AdbConnectionPool:
+    """Keeps pre-connected sockets to the adb server warm and caps concurrent connections.
+
+    The adb server closes a connection once the service it was opened for finishes,
+    so each socket is handed out once; the pool saves the TCP connect on the hot path.
+    """
+
+    def __init__(self, host=ADB_HOST, port=ADB_PORT, warm=4, max_connections=64, timeout=10, max_idle=30):
+        self.host = host
+        self.port = port
+        self.warm = warm
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._refill_event = threading.Event()
+        self._refill_thread = None
+
+    def _open(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def acquire(self):
+        self._slots.acquire()
+        try:
+            sock = None
+            with self._lock:
+                while self._idle:
+                    candidate, opened_at = self._idle.popleft()
+                    if time.monotonic() - opened_at < self.max_idle:
+                        sock = candidate
+                        break
+                    candidate.close()
+            if sock is None:
+                sock = self._open()
+            sock.settimeout(self.timeout)
+            self._schedule_refill()
+            return sock
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, sock):
+        try:
+            sock.close()
+        finally:
+            self._slots.release()
+
+    def _schedule_refill(self):
+        if self.warm <= 0:
+            return
+        if self._refill_thread is None or not self._refill_thread.is_alive():
+            self._refill_thread = threading.Thread(target=self._refill_loop, daemon=True)
+            self._refill_thread.start()
+        self._refill_event.set()
+
+    def _refill_loop(self):
+        while self._refill_event.wait(self.max_idle):
+            self._refill_event.clear()
+            while len(self._idle) < self.warm:
+                try:
+                    sock = self._open()
+                except OSError:
+                    break
+                with self._lock:
+                    self._idle.append((sock, time.monotonic()))
+
+    def close(self):
+        with self._lock:
+            while self._idle:
+                self._idle.popleft()[0].close()
+
+
+class AdbClient:
+    """Speaks the adb server protocol directly instead of forking the adb CLI"""
+
+    def __init__(self, host=ADB_HOST, port=ADB_PORT, pool=None):
+        self.pool = pool or AdbConnectionPool(host, port)
+        self._server_checked = False
+
+    def _connect(self):
+        try:
+            return self.pool.acquire()
+        except ConnectionRefusedError:
+            if self._server_checked:
+                raise
+            # adb CLI starts the server on demand; do the same once before giving up
+            self._server_checked = True
+            subprocess.run([find_adb(), "start-server"], capture_output=True, timeout=30)
+            return self.pool.acquire()
+
+    def host_request(self, request):
+        sock = self._connect()
+        try:
+            sock.sendall(encode_request(request))
+            read_status(sock)
+            return read_length_prefixed(sock).decode("utf-8", "replace")
+        finally:
+            self.pool.release(sock)
+
+    def open_transport(self, serial):
+        """Return a socket already switched to the device transport; caller releases it via pool"""
+        sock = self._connect()
+        try:
+            sock.sendall(encode_request(f"host:transport:{serial}"))
+            read_status(sock)
+            return sock
+        except Exception:
+            self.pool.release(sock)
+            raise
+
+    def open_service(self, serial, service):
+        sock = self.open_transport(serial)
+        try:
+            sock.sendall(encode_request(service))
+            read_status(sock)
+            return sock
+        except Exception:
+            self.pool.release(sock)
+            raise
+
+    def is_available(self):
+        try:
+            self.version()
+            return True
+        except (OSError, AdbError, FileNotFoundError, subprocess.SubprocessError):
+            return False
+
+    def version(self):
+        return int(self.host_request("host:version"), 16)
+
+    def devices(self, long=True):
+        """Return device listing in the same text format as `adb devices -l`"""
+        return "List of devices attached\n" + self.host_request("host:devices-l" if long else "host:devices")
+
+    def connect(self, address):
+        return self.host_request(f"host:connect:{address}")
+
+    def shell(self, serial, command, check=False):
+        command = shell_command(command, check)
+        sock = self.open_service(serial, f"shell:{command}")
+        try:
+            output = recv_all(sock).decode("utf-8", "replace")
+        finally:
+            self.pool.release(sock)
+        return check_shell_output(serial, command, output) if check else output
+
+
+def shell_command(command, check=False):
+    if isinstance(command, (list, tuple)):
+        command = " ".join(str(c) for c in command)
+    if check:
+        command = f"{command}; echo __rc:$?"
+    return command
+
+
+def check_shell_output(serial, command, output):
+    output, _, rc = output.rstrip().rpartition("__rc:")
+    if rc.strip() != "0":
+        raise AdbError(f"Command '{command}' on {serial} exited with status {rc.strip() or '?'}")
+    return output
+
+
+class AsyncAdbClient:
+    """asyncio counterpart of AdbClient; holds no loop-bound state so any event loop can use it"""
+
+    def __init__(self, host=ADB_HOST, port=ADB_PORT, timeout=10, command_timeout=COMMAND_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.command_timeout = command_timeout
+
+    async def _open(self):
+        return await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+
+    async def _read_status(self, reader):
+        status = await reader.readexactly(4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            raise AdbError((await self._read_length_prefixed(reader)).decode("utf-8", "replace"))
+        raise AdbError(f"Unexpected adb response: {status!r}")
+
+    async def _read_length_prefixed(self, reader):
+        length = int(await reader.readexactly(4), 16)
+        return await reader.readexactly(length)
+
+    async def _request(self, reader, writer, request):
+        writer.write(encode_request(request))
+        await writer.drain()
+        try:
+            await asyncio.wait_for(self._read_status(reader), self.timeout)
+        except asyncio.IncompleteReadError:
+            raise AdbError("Connection closed by adb server")
+
+    async def host_request(self, request):
+        reader, writer = await self._open()
+        try:
+            await self._request(reader, writer, request)
+            return (await asyncio.wait_for(self._read_length_prefixed(reader), self.timeout)).decode("utf-8", "replace")
+        finally:
+            writer.close()
+
+    async def open_service(self, serial, service):
+        """Return (reader, writer) for a device service; the caller closes the writer"""
+        reader, writer = await self._open()
+        try:
+            await self._request(reader, writer, f"host:transport:{serial}")
+            await self._request(reader, writer, service)
+            return reader, writer
+        except BaseException:
+            writer.close()
+            raise
+
+    async def devices(self, long=True):
+        return "List of devices attached\n" + await self.host_request("host:devices-l" if long else "host:devices")
+
+    async def connect(self, address):
+        return await self.host_request(f"host:connect:{address}")
+
+    async def _read_output(self, reader, serial, command):
+        """Everything the service writes until it closes, within command_timeout seconds"""
+        try:
+            return await asyncio.wait_for(reader.read(), self.command_timeout)
+        except asyncio.TimeoutError:
+            raise AdbError(f"Command '{command}' on {serial} did not finish within {self.command_timeout}s") from None
+
+    async def shell(self, serial, command, check=False):
+        command = shell_command(command, check)
+        reader, writer = await self.open_service(serial, f"shell:{command}")
+        try:
+            output = (await self._read_output(reader, serial, command)).decode("utf-8", "replace")
+        finally:
+            writer.close()
+        return check_shell_output(serial, command, output) if check else output
+
+    async def exec_out(self, serial, command):
+        """Raw stdout bytes of command, like `adb exec-out`: no pty, so binary output arrives unmangled"""
+        command = shell_command(command)
+        reader, writer = await self.open_service(serial, f"exec:{command}")
+        try:
+            return await self._read_output(reader, serial, command)
+        finally:
+            writer.close()
+
+
+_client = None
+_client_checked_at = None
+_client_lock = threading.Lock()
+_async_client = None
+_probe_thread = None
+CLIENT_RETRY_INTERVAL = 60
+
+
+def _check_due():
+    return _client is None and (_client_checked_at is None or time.monotonic() - _client_checked_at > CLIENT_RETRY_INTERVAL)
+
+
+def get_adb_client():
+    """Return the process-wide adb client, or None when the adb server cannot be reached.
+    May block on a socket probe (and `adb start-server`); keep it off the event loop."""
+    global _client, _client_checked_at
+    with _client_lock:
+        if _check_due():
+            _client_checked_at = time.monotonic()
+            client = AdbClient()
+            if client.is_available():
+                _client = client
+        return _client
+
+
+def get_async_adb_client():
+    """Async client for the same adb server, or None when only the adb CLI is usable.
+
+    Never blocks, so it is safe on the engine loop: until the server has been found, a re-check is
+    started on a background thread when one is due, and callers fall back to the adb CLI meanwhile.
+    """
+    global _async_client, _probe_thread
+    client = _client
+    if client is None:
+        with _client_lock:
+            if _check_due() and not (_probe_thread and _probe_thread.is_alive()):
+                _probe_thread = threading.Thread(target=get_adb_client, name="adb-client-probe", daemon=True)
+                _probe_thread.start()
+        return None
+    if _async_client is None:
+        _async_client = AsyncAdbClient(client.pool.host, client.pool.port)
+    return _async_client
@@ -0,0 +1,130 @@
+import asyncio
+import time
+from collections import namedtuple
+
+import psutil
+
+EMULATOR_PROCESS_NAMES = ("dnplayer", "ldvboxheadless", "ld9boxheadless", "ldboxheadless")
+
+HostSample = namedtuple("HostSample", ["cpu", "available_mb", "disk_mb_s", "emulators", "emulator_cpu", "emulator_rss_mb"])
+
+
+def emulator_usage():
+    """(running emulators, their CPU %, their resident memory in MB) across every LDPlayer process"""
+    emulators, emulator_cpu, emulator_rss = 0, 0.0, 0
+    for proc in psutil.process_iter(["name", "cpu_percent", "memory_info"]):
+        name = (proc.info.get("name") or "").lower()
+        if any(n in name for n in EMULATOR_PROCESS_NAMES):
+            if name.startswith("dnplayer"):
+                emulators += 1
+            emulator_cpu += proc.info.get("cpu_percent") or 0.0
+            memory = proc.info.get("memory_info")
+            emulator_rss += memory.rss if memory else 0
+    return emulators, emulator_cpu, emulator_rss / (1024 * 1024)
+
+
+class AdmissionController:
+    """Samples host load and decides when the next LD may boot, moving effective parallelism
+    between min_parallel and max_parallel"""
+
+    def __init__(self, min_parallel=1, max_parallel=3, cpu_high=85, cpu_low=60, min_free_mb=2048,
+                 disk_busy_mb_s=150, interval=5, log_func=print):
+        self.min_parallel = max(1, int(min_parallel))
+        self.max_parallel = max(self.min_parallel, int(max_parallel))
+        self.cpu_high = cpu_high
+        self.cpu_low = cpu_low
+        self.min_free_mb = min_free_mb
+        self.disk_busy_mb_s = disk_busy_mb_s
+        self.interval = interval
+        self.log = log_func
+        self.limit = self.min_parallel
+        self.last_sample = None
+        self._last_disk = None
+        self._last_deferral = None
+        psutil.cpu_percent(interval=None)  # prime the CPU counter
+
+    def sample(self):
+        cpu = psutil.cpu_percent(interval=None)
+        available_mb = psutil.virtual_memory().available / (1024 * 1024)
+
+        disk_mb_s = 0.0
+        counters = psutil.disk_io_counters()
+        now = time.monotonic()
+        if counters is not None:
+            total = counters.read_bytes + counters.write_bytes
+            if self._last_disk:
+                last_total, last_time = self._last_disk
+                disk_mb_s = (total - last_total) / max(now - last_time, 1e-3) / (1024 * 1024)
+            self._last_disk = (total, now)
+
+        emulators, emulator_cpu, emulator_rss_mb = emulator_usage()
+        return HostSample(cpu, available_mb, disk_mb_s, emulators, emulator_cpu, emulator_rss_mb)
+
+    def _pressure(self, sample):
+        if sample.cpu > self.cpu_high:
+            return f"CPU {sample.cpu:.0f}% > {self.cpu_high}%"
+        if sample.available_mb < self.min_free_mb:
+            return f"free RAM {sample.available_mb:.0f} MB < {self.min_free_mb} MB"
+        if sample.disk_mb_s > self.disk_busy_mb_s:
+            return f"disk {sample.disk_mb_s:.0f} MB/s > {self.disk_busy_mb_s} MB/s"
+        return None
+
+    def _headroom(self, sample):
+        """Room for one more emulator: CPU, disk and RAM (estimated from running emulators) all below target"""
+        per_emulator_mb = sample.emulator_rss_mb / sample.emulators if sample.emulators else 0
+        return (sample.cpu < self.cpu_low
+                and sample.disk_mb_s < self.disk_busy_mb_s / 2
+                and sample.available_mb - per_emulator_mb > self.min_free_mb)
+
+    def update(self, sample=None):
+        sample = sample or self.sample()
+        self.last_sample = sample
+        pressure = self._pressure(sample)
+        if pressure and self.limit > self.min_parallel:
+            self._set_limit(self.limit - 1, pressure)
+        elif not pressure and self.limit < self.max_parallel and self._headroom(sample):
+            self._set_limit(self.limit + 1, f"CPU {sample.cpu:.0f}%, free RAM {sample.available_mb:.0f} MB, "
+                                            f"disk {sample.disk_mb_s:.0f} MB/s")
+        return self.limit
+
+    def set_bounds(self, min_parallel=None, max_parallel=None):
+        """Move the parallelism range, e.g. after a settings edit mid-run; the current limit is clamped
+        into it right away instead of waiting for host load to move it"""
+        if min_parallel is not None:
+            self.min_parallel = max(1, int(min_parallel))
+        if max_parallel is not None:
+            self.max_parallel = max(self.min_parallel, int(max_parallel))
+        limit = min(max(self.limit, self.min_parallel), self.max_parallel)
+        if limit != self.limit:
+            self._set_limit(limit, f"range now {self.min_parallel}-{self.max_parallel}")
+        assert self.min_parallel <= self.limit <= self.max_parallel
+
+    def _set_limit(self, limit, reason):
+        self.log(f"Admission: parallel LDs {self.limit} -> {limit} ({reason})")
+        self.limit = limit
+
+    def capacity(self):
+        return self.limit
+
+    def admit(self, in_flight):
+        """May another LD boot now, given how many are already in flight?"""
+        if in_flight >= self.limit:
+            return False
+        pressure = self._pressure(self.last_sample) if self.last_sample else None
+        # Always let the guaranteed minimum through
+        if pressure and in_flight >= self.min_parallel:
+            if pressure != self._last_deferral:
+                self.log(f"Admission: deferring next boot ({pressure})")
+                self._last_deferral = pressure
+            return False
+        self._last_deferral = None
+        return True
+
+    async def run(self):
+        """Sample periodically until cancelled"""
+        while True:
+            try:
+                self.update(await asyncio.to_thread(self.sample))
+            except Exception as e:
+                self.log(f"Admission sampling error: {str(e)}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,700 @@
+import asyncio
+import random
+import time
+
+from adb_client import AdbError, communicate_or_kill, find_adb, get_adb_client, get_async_adb_client, shell_command
+from device_state import get_device_state_service
+from shell_session import close_shell_session, get_shell_session
+from scroll_agent import ScrollAgent
+from device_actor import BULK, NORMAL, DeviceInterrupted, close_device_actor, get_device_actor
+from readiness import probe_ready, wait_until_gone, wait_until_ready
+from fleet_scheduler import FleetScheduler
+from ld_watchdog import Watchdog
+from inventory import get_inventory
+from metrics import RunMetrics
+from pacing import SwipePacer
+from pipeline import Stage, StagePipeline
+from window_arranger import get_window_arranger
+import screen_sampler
+
+class ControlEmulator:
+    def __init__(self, inventory=None):
+        self.ld_dir = r"C:\LDPlayer\LDPlayer9"
+        # Shared across the GUI and every run instead of rebuilding LDPlayer each time
+        self.inventory = inventory or get_inventory(self.ld_dir)
+        self.fb = "com.facebook.katana"
+        self.boot_delay = 20
+        self.task_delay = 10
+        self.start_delay = 10
+        self.close_delay = 15
+        self.devices = get_device_state_service()
+        self.metrics = None  # optional metrics.RunMetrics, set per run
+        self.arrange_windows = True
+        self.watchdog = None  # optional ld_watchdog.Watchdog, told about every command that succeeds
+        self.screen_check_interval = 20  # seconds between screen samples while scrolling; 0 turns them off
+        self.screen_stale_after = 60
+        self.swipe_rate = 30  # target swipes per minute while scrolling from the host
+
+    @property
+    def ld(self):
+        self.inventory.ensure_loaded()
+        return self.inventory.ld
+
+    @property
+    def em(self):
+        return self.inventory.emulators
+
+    @property
+    def name_to_serial(self):
+        return self.inventory.name_to_serial
+
+    def is_ld_running(self, name):
+        return self.devices.is_present(self.name_to_serial.get(name))
+
+    def _beat(self, serial):
+        if self.watchdog:
+            self.watchdog.beat(serial)
+
+    async def _timed(self, kind, awaitable):
+        if self.metrics:
+            return await self.metrics.timed(kind, awaitable)
+        return await awaitable
+
+    async def _connect_adb(self, serial):
+        # Coalesced per device: repeated connects within COALESCE_TTL reuse the last result
+        await get_device_actor(serial).call(
+            "connect", lambda: self._timed("connect", self._connect_adb_raw(serial)), key="connect")
+
+    async def _connect_adb_raw(self, serial):
+        client = get_async_adb_client()
+        if client:
+            await client.connect(serial)
+            return
+        proc = await asyncio.create_subprocess_exec(find_adb(), "connect", serial)
+        await communicate_or_kill(proc)
+        if proc.returncode != 0:
+            raise AdbError(f"adb connect {serial} exited with status {proc.returncode}")
+
+    async def _adb_shell(self, serial, args, check=False, key=None, priority=NORMAL, kind=None):
+        """Run a shell command through serial's command actor, the in-process adb client and, failing
+        that, the adb CLI; commands sharing a key run once while one is queued or running.
+        args is an argv list or a command line; kind (default: the first argument) names it in the
+        actor and the metrics."""
+        kind = kind or (args.split(None, 1)[0] if isinstance(args, str) else args[0])
+        output = await get_device_actor(serial).call(
+            kind, lambda: self._timed(kind, self._adb_shell_raw(serial, args, check)),
+            priority=priority, key=key)
+        self._beat(serial)
+        return output
+
+    async def _probe_shell(self, serial, args, check=False):
+        """Readiness probes from concurrent waiters share one in-flight command"""
+        return await self._adb_shell(serial, args, check, key="probe:" + " ".join(args))
+
+    async def _adb_shell_raw(self, serial, args, check=False):
+        client = get_async_adb_client()
+        if client:
+            return await client.shell(serial, args, check=check)
+        # adb joins its arguments into one command line for the device shell, so a string passes as is
+        proc = await asyncio.create_subprocess_exec(
+            find_adb(), "-s", serial, "shell", *([args] if isinstance(args, str) else args),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, _ = await communicate_or_kill(proc)
+        if check and proc.returncode != 0:
+            raise AdbError(f"Command '{shell_command(args)}' on {serial} exited with status {proc.returncode}")
+        return stdout.decode("utf-8", "replace")
+
+    def start_ld(self, name, delay_between_starts=10, running_flag=None):
+        """Blocking wrapper around start_ld_async for callers outside the engine loop"""
+        return asyncio.run(self.start_ld_async(name, delay_between_starts, running_flag))
+
+    async def start_ld_async(self, name, delay_between_starts=10, running_flag=None):
+        """Start an LD and wait until it is ready; the delay is only an upper bound.
+        Returns the measured boot time in seconds, or None if it did not become ready.
+        An LD that is already up and ready is not booted again and reports 0."""
+        try:
+            if await self.is_ready(name):
+                print(f"LD {name} is already running and ready, skipping boot.")
+                if self.metrics:
+                    self.metrics.record_warm_start(name)
+                return 0.0
+            emu = await asyncio.to_thread(self.inventory.get, name)
+            if emu is not None:
+                await asyncio.to_thread(emu.start)
+                boot_time = await self.wait_ready(name, 5 + delay_between_starts, running_flag)
+                if boot_time is None:
+                    print(f"LD {name} started but not ready within {5 + delay_between_starts}s.")
+                else:
+                    print(f"LD {name} started and ready in {boot_time:.1f}s.")
+
+                # Starts close together share one layout pass, run off the engine's threads
+                self.request_arrange()
+                return boot_time
+            print(f"No LD found with name {name}")
+        except Exception as e:
+            print(f"Error starting LD {name}: {e}")
+
+    async def is_ready(self, name):
+        serial = self.name_to_serial.get(name)
+        return bool(serial) and await probe_ready(serial, self.devices, self._probe_shell) is None
+
+    async def wait_ready(self, name, timeout, running_flag=None):
+        serial = self.name_to_serial.get(name)
+        if not serial:
+            return None
+        return await wait_until_ready(serial, self.devices, self._probe_shell, timeout, running_flag=running_flag)
+
+    def quit_ld(self, name):
+        """Blocking quit from any thread; interrupts whatever the engine is still sending to the LD"""
+        serial = self.name_to_serial.get(name)
+        if serial:
+            close_device_actor(serial)
+        return self._quit_emulator(name)
+
+    def _quit_emulator(self, name):
+        try:
+            emu = self.inventory.get(name)
+            if emu is not None:
+                emu.quit()
+                return True
+            print(f"No LD found with name {name}")
+        except Exception as e:
+            print(f"Error quitting LD {name}: {e}")
+        return False
+
+    async def quit_ld_async(self, name, wait_timeout=0):
+        serial = self.name_to_serial.get(name)
+        close_shell_session(serial)
+        if serial:
+            # Drops queued work and interrupts the running command, which may be the one that hung
+            close_device_actor(serial)
+        quit_ok = await asyncio.to_thread(self._quit_emulator, name)
+        if not quit_ok:
+            return False
+        if wait_timeout and serial:
+            await wait_until_gone(serial, self.devices, wait_timeout)
+        return True
+
+    def sort_window_ld(self):
+        self.ld.sort_window()
+
+    def request_arrange(self):
+        """Arrange LD windows in rows once the current burst of starts settles"""
+        if self.arrange_windows:
+            get_window_arranger(self.inventory.ld_dir, self.sort_window_ld).request()
+
+    async def open_facebook(self, name):
+        """Launch Facebook; returns False when it could not be launched"""
+        serial = self.name_to_serial.get(name, name)
+        if not serial:
+            print(f"No serial found for {name}")
+            return False
+
+        await self._connect_adb(serial)
+        await self._adb_shell(serial, ["input", "keyevent", "82"], key="unlock")
+
+        try:
+            await self._adb_shell(serial, [
+                "monkey",
+                "-p", self.fb,
+                "-c", "android.intent.category.LAUNCHER", "1"
+            ], check=True)
+            print(f"Facebook app launched on LD {name}")
+            return True
+        except AdbError as e:
+            print(f"Failed to launch Facebook on LD {name}: {e}")
+            print(f"Ensure that the emulator with serial {serial} is running and connected to ADB.")
+            return False
+
+    async def stop_facebook(self, name):
+        serial = self.name_to_serial.get(name)
+        if serial:
+            await self._adb_shell(serial, ["am", "force-stop", self.fb])
+
+    async def scroll_facebook(self, name, duration_sec=900, pause_event=None, running_flag=None, mode="host"):
+        """Scroll until duration_sec elapses; pause_event is an asyncio.Event, stop by cancelling the task.
+        duration_sec may be a callable, read before every swipe.
+        mode "agent" runs the swipe loop on the device instead of sending every swipe from the host."""
+        serial = self.name_to_serial.get(name, name)
+        if not serial:
+            print(f"No serial found for {name}")
+            return
+
+        await self._connect_adb(serial)
+        # Set by the screen check when the screen stays frozen even after relaunching Facebook
+        frozen = asyncio.Event()
+        keep_going = lambda: not frozen.is_set() and (running_flag is None or running_flag())
+        screen_task = None
+        if self.screen_check_interval and screen_sampler.available():
+            screen_task = asyncio.create_task(self._watch_screen(name, serial, pause_event, frozen))
+        try:
+            if mode == "agent":
+                await self._scroll_with_agent(name, serial, duration_sec, pause_event, keep_going)
+            else:
+                await self._scroll_host(name, serial, duration_sec, pause_event, keep_going)
+        finally:
+            if screen_task:
+                screen_task.cancel()
+
+    async def _scroll_host(self, name, serial, duration_sec, pause_event, running_flag):
+        start_time = time.monotonic()
+        paused_for = 0.0
+        # One long-lived shell per device instead of an adb process per swipe
+        session = get_shell_session(serial)
+        actor = get_device_actor(serial)
+        # Paced against deadlines at swipe_rate per minute, slowing down while adb latency spikes
+        pacer = SwipePacer(lambda: self.swipe_rate)
+        if self.metrics:
+            self.metrics.record_swipe_target(name, self.swipe_rate)
+
+        try:
+            while time.monotonic() - start_time < (duration_sec() if callable(duration_sec) else duration_sec):
+                if running_flag and not running_flag():
+                    break
+                if pause_event and not pause_event.is_set():
+                    paused_at = time.monotonic()
+                    await pause_event.wait()
+                    paused_for += time.monotonic() - paused_at
+                    pacer.reset()
+                    continue
+                
+                # Adjusted values for smoother scrolling
+                scroll_duration = random.uniform(400, 600)  # Swipe duration in ms
+                start_y = random.randint(800, 900)         # Start Y-coordinate
+                end_y = random.randint(500, 600)           # End Y-coordinate
+                
+                swipe = ["input", "swipe", "300", str(start_y), "300", str(end_y), str(int(scroll_duration))]
+                sent = time.monotonic()
+                status, output = await actor.call(
+                    "swipe", lambda: self._timed("swipe", session.run(swipe)), priority=BULK)
+                if status != 0:
+                    raise AdbError(f"input swipe exited with status {status}: {output}")
+                self._beat(serial)
+                if self.metrics:
+                    self.metrics.record_swipe(name)
+
+                # Queueing and command time come out of the pause rather than adding to it
+                delay = pacer.next_delay(time.monotonic() - sent)
+                await actor.sleep(delay)
+                if self.metrics:
+                    self.metrics.record_idle(name, "swipe_pause", delay)
+                
+        except DeviceInterrupted:
+            print(f"Scrolling on {name} interrupted, LD is stopping")
+        except Exception as e:
+            print(f"Error scrolling on {name}: {str(e)}")
+        finally:
+            if self.metrics:
+                self.metrics.record_scroll_time(name, time.monotonic() - start_time - paused_for)
+            if pacer.backoff > 1.0:
+                print(f"Swipes on {name} ended {pacer.backoff:.1f}x slower than {self.swipe_rate}/min "
+                      f"because adb latency spiked")
+            close_shell_session(serial)
+
+    async def screencap(self, serial):
+        """Raw RGBA framebuffer bytes; skipping the PNG encode keeps a capture cheap on the device"""
+        client = get_async_adb_client()
+        if client:
+            return await client.exec_out(serial, ["screencap"])
+        proc = await asyncio.create_subprocess_exec(
+            find_adb(), "-s", serial, "exec-out", "screencap",
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, _ = await communicate_or_kill(proc)
+        if proc.returncode != 0:
+            raise AdbError(f"screencap on {serial} exited with status {proc.returncode}")
+        return stdout
+
+    async def _screencap_queued(self, serial):
+        # Behind the device's other commands, dropped like a swipe when the LD is stopping
+        data = await get_device_actor(serial).call(
+            "screencap", lambda: self._timed("screencap", self.screencap(serial)), priority=BULK)
+        self._beat(serial)
+        return data
+
+    async def _watch_screen(self, name, serial, pause_event, frozen):
+        """Sample the screen while scrolling; relaunch Facebook once when it stops changing, and set
+        frozen if it is still stuck after that"""
+        sampler = screen_sampler.ScreenSampler(serial, self._screencap_queued, stale_after=self.screen_stale_after)
+        relaunched = False
+        while True:
+            await asyncio.sleep(self.screen_check_interval)
+            if pause_event and not pause_event.is_set():
+                await pause_event.wait()
+                sampler.reset()  # nothing moves while paused
+                continue
+            try:
+                sample = await sampler.sample()
+            except DeviceInterrupted:
+                return
+            except (AdbError, OSError, ValueError) as e:
+                print(f"Screen check on {name} failed: {str(e)}")
+                continue
+            if not sampler.stale:
+                continue
+            if not relaunched:
+                print(f"Screen on {name} unchanged for {sample.stale_for:.0f}s, relaunching Facebook")
+                if self.metrics:
+                    self.metrics.record_screen_action(name, "relaunch")
+                relaunched = True
+                sampler.reset()
+                try:
+                    await self.stop_facebook(name)
+                    await self.open_facebook(name)
+                except DeviceInterrupted:
+                    return
+                except (AdbError, OSError) as e:
+                    # Still frozen next time round means the scroll is stopped
+                    print(f"Relaunching Facebook on {name} failed: {str(e)}")
+                continue
+            print(f"Screen on {name} still frozen after relaunching Facebook, stopping its scroll")
+            if self.metrics:
+                self.metrics.record_screen_action(name, "stop")
+            frozen.set()
+            return
+
+    async def _scroll_with_agent(self, name, serial, duration_sec, pause_event, running_flag):
+        agent = ScrollAgent(serial, self._adb_shell, get_device_actor(serial))
+        on_swipes = (lambda count: self.metrics.record_swipe(name, count)) if self.metrics else None
+        start_time = time.time()
+        try:
+            swipes = await agent.run(duration_sec, pause_event, running_flag, on_swipes)
+            print(f"Scroll agent on {name} finished after {swipes} swipes")
+        except DeviceInterrupted:
+            print(f"Scrolling on {name} interrupted, LD is stopping")
+        except Exception as e:
+            print(f"Error scrolling on {name}: {str(e)}")
+        finally:
+            if self.metrics:
+                self.metrics.record_scroll_time(name, time.time() - start_time)
+
+    def is_emulator_connected(self, serial):
+        return self.devices.is_present(serial)
+
+    def ld_task(self, name):
+        serial = self.name_to_serial.get(name)
+        if not self.is_emulator_connected(serial):
+            return
+
+class MainWindow():
+    """Runs the start/facebook/scroll/close pipeline for every selected LD as coroutines on one loop.
+
+    Drive it with `main()` from a worker thread, or through engine.EngineBridge for thread-safe pause/stop.
+    """
+
+    def __init__(self, selected_ld_names, running_flag, ld_thread, log_func=print, start_same_time=False, inventory=None):
+        self.em = ControlEmulator(inventory)
+        self.thread_ld = list(selected_ld_names)  # unknown names are dropped by resolve_lds()
+        self.log = log_func
+        self.running_flag = running_flag
+        self.ld_thread = ld_thread
+        self.scroll_duration = 0
+        self.scroll_mode = "host"  # or "agent": swipe loop runs on the device
+        self.start_same_time = start_same_time
+        self.pause_event = None
+        self.paused = False
+        # Sequential start keeps boots one at a time, spaced by start_delay; settings can change any stage's limits
+        self.pipeline = StagePipeline([
+            Stage("start", self.start_stage, concurrency=None if start_same_time else 1),
+            Stage("facebook", lambda name: self.ld_task_stage(name, "facebook"), after=["start"]),
+            Stage("scroll", lambda name: self.ld_task_stage(name, "scroll"), after=["facebook"]),
+            Stage("close", lambda name: self.ld_task_stage(name, "close"), after=["scroll"], always=True)
+        ], log_func=log_func)
+        self.stage_times = {}
+        self.on_stage = None  # optional callback(name, stage, seconds) after each finished stage
+        self.journal = None  # optional journal.RunJournal
+        self.resume_state = None  # unfinished run from the journal to continue
+        self.finished_lds = set()
+        self.metrics = RunMetrics()
+        self.em.metrics = self.metrics
+        self.pipeline.metrics = self.metrics
+        self.scheduler = None
+        self.admission = None  # optional admission.AdmissionController
+        self.settings = None  # optional settings.RuntimeSettings, read live through use_settings()
+        self.warm_pool = None  # optional warm_pool.WarmPool: close parks LDs there instead of quitting them
+        # An LD that stops answering is cancelled and quit, then queued again up to watchdog_restarts times
+        self.watchdog = Watchdog(self.em, paused=lambda: self.paused, log_func=log_func)
+        self.em.watchdog = self.watchdog
+        self.watchdog_action = "restart"  # or "drop"
+        self.watchdog_restarts = 1
+        self.restarts = {}
+
+    @property
+    def stages(self):
+        return self.pipeline.names
+
+    def pause(self):
+        self.paused = True
+        if self.pause_event:
+            self.pause_event.clear()
+
+    def resume(self):
+        self.paused = False
+        if self.pause_event:
+            self.pause_event.set()
+
+    def stop(self):
+        if self.scheduler:
+            self.scheduler.cancel()
+
+    def use_settings(self, settings):
+        """Take parallelism, delays, scroll time and stage limits from a RuntimeSettings now and whenever
+        they change during the run"""
+        self.settings = settings
+        self.apply_settings(settings.snapshot(), quiet=True)
+        settings.subscribe(self.apply_settings)
+
+    def apply_settings(self, changes, quiet=False):
+        """May be called from any thread; everything here is read again at the next slot, stage or swipe"""
+        if "parallel_ld" in changes:
+            self.ld_thread = int(changes["parallel_ld"])
+            if self.admission:
+                self.admission.set_bounds(max_parallel=self.ld_thread)
+        if "min_parallel" in changes and self.admission:
+            self.admission.set_bounds(min_parallel=min(int(changes["min_parallel"]), self.ld_thread))
+        for key in ("boot_delay", "start_delay", "task_delay", "close_delay", "arrange_windows",
+                    "screen_check_interval", "screen_stale_after", "swipe_rate"):
+            if key in changes:
+                setattr(self.em, key, changes[key])
+        if "scroll_duration" in changes:
+            self.scroll_duration = int(changes["scroll_duration"] * 60)
+        if "scroll_mode" in changes:
+            self.scroll_mode = changes["scroll_mode"]
+        if "watchdog_timeout" in changes:
+            self.watchdog.timeout = changes["watchdog_timeout"]
+        if "watchdog_action" in changes:
+            self.watchdog_action = changes["watchdog_action"]
+        if "watchdog_restarts" in changes:
+            self.watchdog_restarts = int(changes["watchdog_restarts"])
+        if self.warm_pool and ("warm_keep" in changes or "warm_memory_budget_mb" in changes):
+            self.warm_pool.configure(keep=changes.get("warm_keep"), memory_budget_mb=changes.get("warm_memory_budget_mb"))
+        for name, options in changes.get("stages", {}).items():
+            if name in self.pipeline.stages:
+                self.pipeline.configure(name, **{key: value for key, value in options.items() if key in Stage.OPTIONS})
+        if not quiet:
+            self.log("Settings changed during the run: " + ", ".join(f"{key}={value}" for key, value in changes.items()))
+
+    def enqueue(self, names):
+        """Add LDs to the run in progress; they wait for a free slot like the rest. Returns the names taken,
+        or None when the run is already over"""
+        if not self.scheduler or self.scheduler.finished:
+            return None
+        known = [name for name in names if name in self.em.name_to_serial]
+        added = self.scheduler.add(known)
+        if added is None:
+            return None
+        if added:
+            self.thread_ld.extend(name for name in added if name not in self.thread_ld)
+            if self.journal:
+                self.journal.add_lds(added)
+        skipped = len(names) - len(added)
+        self.log(f"Queued {len(added)} more LDs behind {len(self.scheduler.queue) - len(added)} waiting"
+                 + (f", skipped {skipped} already queued, running or unknown" if skipped else ""))
+        return added
+
+    async def check_paused(self):
+        """Wait while paused; returns True when the run has been stopped"""
+        if not self.pause_event.is_set() and self.running_flag():
+            await self.pause_event.wait()
+        return not self.running_flag()
+
+    async def ld_task_stage(self, name, stage):
+        if not self.running_flag():
+            return
+        
+        if await self.check_paused():
+            return
+        
+        if stage == "start":
+            if self.warm_pool:
+                self.warm_pool.take(name)
+            self.log(f"Starting LD: {name}")
+            # Previously a fixed start_ld sleep plus boot_delay; now both only bound the readiness wait
+            boot_time = await self.em.start_ld_async(name, delay_between_starts=2 * self.em.boot_delay,
+                                                     running_flag=self.running_flag)
+            if boot_time is None:
+                if not self.running_flag():
+                    return None  # stopped while booting
+                # Raised so the pipeline retries the start or skips the stages that need a running LD
+                raise AdbError(f"LD {name} not ready after {5 + 2 * self.em.boot_delay}s")
+            self.log(f"LD {name} ready in {boot_time:.1f}s")
+            return boot_time
+        elif stage == "facebook":
+            self.log(f"Opening Facebook on LD: {name}")
+            if not await self.em.open_facebook(name):
+                raise AdbError(f"Could not launch Facebook on LD {name}")
+        elif stage == "scroll":
+            self.log(f"Scrolling Facebook on LD: {name} for {self.scroll_duration // 60} minutes")
+            # Read live, so a changed scroll time applies to LDs that are already scrolling
+            await self.em.scroll_facebook(name, duration_sec=lambda: self.scroll_duration, 
+                                          pause_event=self.pause_event, running_flag=self.running_flag,
+                                          mode=self.scroll_mode)
+        elif stage == "close":
+            if self.warm_pool and await asyncio.to_thread(self.warm_pool.park, name):
+                self.log(f"Keeping LD {name} warm for the next run")
+                await self.em.stop_facebook(name)
+                return
+            self.log(f"Closing LD: {name}")
+            await self.em.quit_ld_async(name, wait_timeout=self.em.close_delay)
+
+    async def start_stage(self, name):
+        boot_time = await self.ld_task_stage(name, "start")
+        # A warm LD did not boot, so there is nothing to space out
+        if not self.start_same_time and self.running_flag() and boot_time != 0:
+            await asyncio.sleep(self.em.start_delay)
+            self.metrics.record_idle(name, "start_delay", self.em.start_delay)
+
+    def configure_stages(self, stage_settings=None, custom_stages=None):
+        """Stage limits and custom stages from the settings file; custom stage functions are called as
+        function(main_window, name) and can use check_paused() and em like the built-in ones"""
+        self.pipeline.apply_settings(stage_settings, custom_stages, context=self)
+
+    def stages_for(self, name):
+        """Stages still to run for name: all of them, or what the resumed run had left"""
+        done = set(self.resume_state["done"].get(name, ())) if self.resume_state else set()
+        stages = self.stages
+        remaining = [stage for stage in stages if stage not in done]
+        if done and remaining and not self.em.is_ld_running(name):
+            # The LD went down with the crash: nothing left to close, otherwise boot it again
+            if remaining == ["close"]:
+                return []
+            needed = {"start", "facebook"} if "scroll" in remaining else {"start"}
+            remaining = [stage for stage in stages if stage in remaining or stage in needed]
+        return remaining
+
+    def _stage_done(self, name, stage, seconds):
+        self.stage_times.setdefault(name, {})[stage] = seconds
+        self.metrics.record_stage(name, stage, seconds)
+        if self.on_stage:
+            self.on_stage(name, stage, seconds)
+        # A stage cut short by stop is not complete
+        if self.journal and self.running_flag():
+            self.journal.record_stage(name, stage, seconds)
+
+    async def run_ld(self, name, slot):
+        """Run the LD's stages inside a scheduler slot, each as soon as its dependencies are done"""
+        self.stage_times.setdefault(name, {})
+        task = asyncio.current_task()
+        self.watchdog.watch(name, task)
+        stages = self.stages_for(name)
+        try:
+            times = await self.pipeline.run_ld(name, stages, running_flag=self.running_flag,
+                                               on_done=self._stage_done)
+        finally:
+            self.watchdog.unwatch(name, task)
+        # An LD with a failed stage is left for --resume like one that was cut short
+        if self.running_flag() and set(times) >= set(stages):
+            self.finished_lds.add(name)
+        self.log(f"LD {name} finished in slot {slot + 1}")
+
+    async def recover_ld(self, name, task):
+        """Called by the watchdog for an LD that stopped answering: cancel its stages, quit it outside its
+        command queue (which interrupts the hung command and kills its adb process) to free the slot, then
+        queue it again or drop it"""
+        if self.scheduler:
+            # The run must not end while the LD is still being quit or may be queued again
+            self.scheduler.hold(asyncio.current_task())
+        if not task.done():
+            task.cancel()
+            await asyncio.wait([task])
+        await self.em.quit_ld_async(name, wait_timeout=self.em.close_delay)
+        restarts = self.restarts.get(name, 0)
+        if (self.watchdog_action == "restart" and restarts < self.watchdog_restarts and self.scheduler
+                and self.running_flag()):
+            self.restarts[name] = restarts + 1
+            if self.scheduler.add([name]):
+                self.log(f"Restarting LD {name} (restart {restarts + 1}/{self.watchdog_restarts})")
+                self.metrics.record_recovery(name, "restart")
+                return
+        self.log(f"Dropped unresponsive LD {name} from the run")
+        self.metrics.record_recovery(name, "drop")
+
+    def estimate_batch_makespan(self):
+        """Lock-step batch mode waits for the slowest LD at every stage"""
+        names = [name for name in self.thread_ld if name in self.stage_times]
+        total = 0.0
+        for batch_start in range(0, len(names), self.ld_thread):
+            batch = names[batch_start:batch_start + self.ld_thread]
+            for stage in self.stages:
+                durations = [self.stage_times[name].get(stage, 0.0) for name in batch]
+                if stage == "start" and not self.start_same_time:
+                    total += sum(durations)
+                else:
+                    total += max(durations)
+        return total
+
+    async def prepare(self):
+        """Create the loop-bound primitives on the loop that runs the engine; run() calls this,
+        other drivers of run_ld (distributed.Worker) call it themselves"""
+        self.pause_event = asyncio.Event()
+        if not self.paused:
+            self.pause_event.set()
+        await asyncio.to_thread(get_adb_client)
+        missing = await asyncio.to_thread(self.resolve_lds)
+        if missing:
+            self.log(f"Skipping unknown LDs: {', '.join(missing)}")
+
+    def resolve_lds(self):
+        """Drop the selected LDs the inventory does not have and return them; blocks until the LDPlayer
+        list is read if the cached one lacks a name"""
+        known = self.em.inventory.known(self.thread_ld)
+        missing = [name for name in self.thread_ld if name not in known]
+        self.thread_ld = known
+        return missing
+
+    async def run(self):
+        await self.prepare()
+        if self.resume_state:
+            # stages_for may poll adb for which LDs survived, so keep it off the loop
+            pending = await asyncio.to_thread(lambda: [name for name in self.thread_ld if self.stages_for(name)])
+            self.log(f"Resuming run {self.resume_state['run']}: skipping {len(self.thread_ld) - len(pending)} "
+                     f"finished LDs")
+            self.thread_ld = pending
+        total = len(self.thread_ld)
+        self.log(f"Total LDs to process: {total}")
+        if self.em.screen_check_interval and not screen_sampler.available():
+            self.log("numpy is not installed, so frozen screens are not detected")
+        if self.journal:
+            if self.resume_state:
+                self.journal.continue_run(self.resume_state["run"])
+            else:
+                await asyncio.to_thread(self.journal.begin_run, self.thread_ld, self.stages)
+
+        watchdog_task = asyncio.create_task(self.watchdog.run(self.recover_ld))
+        admission_task = None
+        if self.admission:
+            # Host load decides how many LDs are in flight, within the user's min/max
+            self.admission.update(await asyncio.to_thread(self.admission.sample))
+            admission_task = asyncio.create_task(self.admission.run())
+            self.scheduler = FleetScheduler(self.thread_ld, self.admission.capacity, self.run_ld,
+                                            running_flag=self.running_flag, log_func=self.log,
+                                            admit=self.admission.admit)
+        else:
+            self.scheduler = FleetScheduler(self.thread_ld, lambda: self.ld_thread, self.run_ld,
+                                            running_flag=self.running_flag, log_func=self.log)
+        try:
+            report = await self.scheduler.run()
+        finally:
+            watchdog_task.cancel()
+            if admission_task:
+                admission_task.cancel()
+            self.metrics.finish()
+            if self.settings:
+                self.settings.unsubscribe(self.apply_settings)
+            if self.journal:
+                self.journal.end_run(self.running_flag() and self.finished_lds >= set(self.thread_ld))
+                await asyncio.to_thread(self.journal.close)
+        self.log(report.summary())
+        if report.completed:
+            self.log(f"Batch mode estimate for the same stage times: {self.estimate_batch_makespan():.1f}s")
+        self.log(self.metrics.summary())
+        try:
+            json_path, prom_path = await asyncio.to_thread(self.metrics.write_reports)
+            self.log(f"Performance report written to {json_path} and {prom_path}")
+        except OSError as e:
+            self.log(f"Could not write performance report: {str(e)}")
+        return report
+
+    def main(self):
+        return asyncio.run(self.run())
@@ -0,0 +1,249 @@
+"""Stand-ins for LDPlayer and the adb server so the orchestration can run without emulators.
+
+FakeAdbServer speaks the adb server wire protocol on a local port; point the code at it with
+ANDROID_ADB_SERVER_PORT before adb_client is imported. FakeLDPlayer is passed to
+EmulatorInventory as its ld_factory.
+"""
+import asyncio
+import random
+import struct
+import threading
+import time
+
+
+class FakeFleet:
+    """Shared device state plus the latency/failure knobs for both fakes"""
+
+    def __init__(self, size, boot_seconds=1.0, command_latency=0.005, jitter=0.5, fail_rate=0.0,
+                 boot_fail_rate=0.0, seed=None):
+        self.size = size
+        self.boot_seconds = boot_seconds
+        self.command_latency = command_latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.boot_fail_rate = boot_fail_rate
+        self.random = random.Random(seed)
+        self.online = set()
+        self.agents = {}  # serial -> simulated device-side scroll agent state
+        self.installed_agents = set()
+        self.screens = {}  # serial -> what is on screen; each swipe moves it on
+        self.frozen = set()  # serials whose screen no longer changes
+        self.lock = threading.Lock()
+        self.counters = {"swipes": 0, "shell_commands": 0, "host_requests": 0, "failures": 0, "boots": 0}
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.counters[key] += amount
+
+    def latency(self, base=None):
+        base = self.command_latency if base is None else base
+        return base * (1 + self.random.uniform(-self.jitter, self.jitter))
+
+    def fails(self, rate=None):
+        return self.random.random() < (self.fail_rate if rate is None else rate)
+
+    def serial(self, index):
+        return f"emulator-{5554 + index * 2}"
+
+
+class FakeEmulator:
+    def __init__(self, fleet, name, index):
+        self.fleet = fleet
+        self.name = name
+        self.index = index
+
+    def start(self):
+        # dnconsole launch returns quickly; the device shows up in adb after the boot time
+        time.sleep(self.fleet.latency(0.05))
+        self.fleet.count("boots")
+        if self.fleet.fails(self.fleet.boot_fail_rate):
+            self.fleet.count("failures")
+            return
+        serial = self.fleet.serial(self.index)
+        timer = threading.Timer(self.fleet.latency(self.fleet.boot_seconds), self._online, args=(serial,))
+        timer.daemon = True
+        timer.start()
+
+    def _online(self, serial):
+        with self.fleet.lock:
+            self.fleet.online.add(serial)
+
+    def quit(self):
+        time.sleep(self.fleet.latency(0.02))
+        with self.fleet.lock:
+            self.fleet.online.discard(self.fleet.serial(self.index))
+
+
+class FakeLDPlayer:
+    def __init__(self, fleet, ld_dir):
+        self.ld_dir = ld_dir
+        self.emulators = {f"LD-{i}": FakeEmulator(fleet, f"LD-{i}", i) for i in range(fleet.size)}
+
+    def sort_window(self):
+        time.sleep(0.01)
+
+
+class FakeAdbServer:
+    """Minimal adb server: host:version/devices/connect, host:transport + shell: and shell:<cmd>"""
+
+    def __init__(self, fleet, host="127.0.0.1", port=0):
+        self.fleet = fleet
+        self.host = host
+        self.port = port
+        self.loop = None
+        self._ready = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name="fake-adb", daemon=True).start()
+        self._ready.wait(10)
+        return self.port
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        server = self.loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port, backlog=1024))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self.loop.run_forever()
+
+    def stop(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    @staticmethod
+    def _okay(writer, payload=None):
+        if payload is None:
+            writer.write(b"OKAY")
+        else:
+            data = payload.encode()
+            writer.write(b"OKAY%04x" % len(data) + data)
+
+    @staticmethod
+    def _fail(writer, message):
+        data = message.encode()
+        writer.write(b"FAIL%04x" % len(data) + data)
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await self._read_request(reader)
+            if request.startswith("host:transport:"):
+                await self._transport(reader, writer, request[len("host:transport:"):])
+            else:
+                await self._host(writer, request)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        length = int(await reader.readexactly(4), 16)
+        return (await reader.readexactly(length)).decode()
+
+    async def _host(self, writer, request):
+        self.fleet.count("host_requests")
+        await asyncio.sleep(self.fleet.latency())
+        if request == "host:version":
+            self._okay(writer, "0029")
+        elif request.startswith("host:devices"):
+            with self.fleet.lock:
+                online = sorted(self.fleet.online)
+            long = request.endswith("-l")
+            self._okay(writer, "".join(f"{serial}\tdevice" + (" product:fake model:FakeLD" if long else "") + "\n"
+                                       for serial in online))
+        elif request.startswith("host:connect:"):
+            self._okay(writer, f"already connected to {request[len('host:connect:'):]}")
+        else:
+            self._fail(writer, f"unknown host service {request}")
+
+    async def _transport(self, reader, writer, serial):
+        with self.fleet.lock:
+            online = serial in self.fleet.online
+        if not online:
+            self._fail(writer, f"device '{serial}' not found")
+            return
+        self._okay(writer)
+        service = await self._read_request(reader)
+        if service == "shell:":
+            self._okay(writer)
+            await self._interactive_shell(reader, writer, serial)
+        elif service.startswith("shell:"):
+            self._okay(writer)
+            writer.write(await self._run_command(service[len("shell:"):], serial))
+        elif service == "exec:screencap":
+            self._okay(writer)
+            await asyncio.sleep(self.fleet.latency())
+            writer.write(self._screencap(serial))
+        else:
+            self._fail(writer, f"unknown device service {service}")
+
+    async def _run_command(self, command, serial):
+        """Output of one shell command; `; echo <marker>$?` suffixes report the (maybe failed) status"""
+        self.fleet.count("shell_commands")
+        if "input swipe" in command:
+            self.fleet.count("swipes")
+            with self.fleet.lock:
+                if serial not in self.fleet.frozen:
+                    self.fleet.screens[serial] = self.fleet.screens.get(serial, 0) + 1
+        await asyncio.sleep(self.fleet.latency())
+        if "ldauto_scroll" in command:
+            return self._agent_command(command, serial).encode()
+        status = 0
+        if self.fleet.fails():
+            self.fleet.count("failures")
+            status = 1
+        command, _, marker = command.partition("; echo ")
+        output = ""
+        if status == 0 and "sys.boot_completed" in command:
+            output = "1\n"
+        elif status == 0 and "pm path android" in command:
+            output = "package:/system/framework/framework-res.apk\n"
+        if marker:
+            output += marker.replace("$?", str(status)) + "\n"
+        return output.encode()
+
+    def _screencap(self, serial, width=72, height=128):
+        """Raw screencap (16-byte header, RGBA) whose pixels depend only on what is on screen"""
+        with self.fleet.lock:
+            screen = self.fleet.screens.get(serial, 0)
+            agent = self.fleet.agents.get(serial)
+            if agent and serial not in self.fleet.frozen and time.time() < agent["end"]:
+                screen = int(time.time() / 2)
+        pixels = random.Random(f"{serial}:{screen}").randbytes(width * height * 4)
+        return struct.pack("<IIII", width, height, 1, 0) + pixels
+
+    def _agent_command(self, command, serial):
+        """Simulates scroll_agent.py's script: one swipe every 2 s for the requested duration"""
+        now = time.time()
+        with self.fleet.lock:
+            if command.startswith("grep -c"):
+                return "1\n" if serial in self.fleet.installed_agents else "0\n"
+            if "base64 -d" in command:
+                self.fleet.installed_agents.add(serial)
+                return "__rc:0\n"
+            if "nohup sh" in command:
+                duration = int(command.split("ldauto_scroll.sh", 1)[1].split()[0])
+                self.fleet.agents[serial] = {"started": now, "end": now + duration, "reported": 0}
+                return "__rc:0\n"
+            agent = self.fleet.agents.get(serial)
+            if agent is None:
+                return "@ %d\n" % now
+            if ".stop" in command:
+                agent["end"] = min(agent["end"], now)
+                return ""
+            if command.startswith("cat"):
+                swipes = int((min(now, agent["end"]) - agent["started"]) / 2.0)
+                self.fleet.counters["swipes"] += swipes - agent["reported"]
+                agent["reported"] = swipes
+                state = " done" if now >= agent["end"] else ""
+                return "%d %d%s\n@ %d\n" % (min(now, agent["end"]), swipes, state, now)
+        return ""
+
+    async def _interactive_shell(self, reader, writer, serial):
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            # A pty echoes the command line back before its output
+            writer.write(b"$ " + line)
+            writer.write(await self._run_command(line.decode().rstrip("\n"), serial))
+            await writer.drain()
@@ -0,0 +1,244 @@
+"""Orchestration benchmark against the fake adb server and fake LDPlayer.
+
+    python -m bench.run_bench --sizes 10 100 500 --scroll 10 --label my-change
+
+Each size runs in its own process so CPU, memory and process-spawn counts are not shared.
+Results are appended to bench/results/history.jsonl and compared with the last run of a
+different version for the same scenario.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+HISTORY_PATH = os.path.join(BENCH_DIR, "results", "history.jsonl")
+
+# Compared between versions; True when higher is better
+TRACKED = {"swipes_per_s": True, "makespan_s": False, "process_spawns": False,
+           "cpu_s": False, "peak_rss_mb": False, "swipe_p95_ms": False}
+
+
+def current_version():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=REPO_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def run_scenario(args):
+    """Child process: one MainWindow run over args.size fake LDs; writes the result JSON to args.out"""
+    import psutil
+
+    spawns = [0]
+    popen = subprocess.Popen
+
+    class CountingPopen(popen):
+        def __init__(self, *a, **kw):
+            spawns[0] += 1
+            super().__init__(*a, **kw)
+
+    # asyncio's subprocess transport looks subprocess.Popen up at call time, so this sees both paths
+    subprocess.Popen = CountingPopen
+
+    sys.path.insert(0, REPO_DIR)
+    from bench.fake_backend import FakeAdbServer, FakeFleet, FakeLDPlayer
+
+    fleet = FakeFleet(args.size, boot_seconds=args.boot, command_latency=args.latency / 1000,
+                      fail_rate=args.fail_rate, boot_fail_rate=args.boot_fail_rate, seed=args.seed)
+    # Frozen screens never change, so the scroll relaunches Facebook on them and then gives up
+    fleet.frozen.update(fleet.serial(index) for index in range(min(args.frozen, args.size)))
+    server = FakeAdbServer(fleet)
+    os.environ["ANDROID_ADB_SERVER_PORT"] = str(server.start())
+
+    from automation import MainWindow
+    from inventory import EmulatorInventory
+
+    process = psutil.Process()
+    peak_rss = [process.memory_info().rss]
+    done = threading.Event()
+
+    def sample_memory():
+        while not done.wait(0.2):
+            peak_rss[0] = max(peak_rss[0], process.memory_info().rss)
+
+    threading.Thread(target=sample_memory, daemon=True).start()
+
+    inventory = EmulatorInventory("fake-ld", cache_path=os.path.join(args.workdir, "inventory_cache.json"),
+                                  ld_factory=lambda ld_dir: FakeLDPlayer(fleet, ld_dir))
+    inventory.ensure_loaded()
+    names = list(inventory.name_to_serial)
+    main_window = MainWindow(names, running_flag=lambda: True, ld_thread=args.parallel or args.size,
+                             log_func=lambda message: None, start_same_time=not args.sequential_start,
+                             inventory=inventory)
+    main_window.em.boot_delay = max(1, int(args.boot * 2))
+    main_window.em.start_delay = 0
+    main_window.em.close_delay = 2
+    if args.frozen:
+        # Short enough to relaunch and then stop within a 10s scroll, longer than the gap between swipes
+        main_window.em.screen_check_interval = 1
+        main_window.em.screen_stale_after = 3
+    main_window.scroll_duration = args.scroll
+    main_window.scroll_mode = args.scroll_mode
+
+    cpu_before = process.cpu_times()
+    started = time.perf_counter()
+    report = main_window.main()
+    wall = time.perf_counter() - started
+    cpu_after = process.cpu_times()
+    done.set()
+    peak_rss[0] = max(peak_rss[0], process.memory_info().rss)
+
+    metrics = main_window.metrics.to_dict()
+    swipe_latency = metrics["adb"].get("swipe", {})
+    cpu = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+    result = {
+        "size": args.size,
+        "parallel": main_window.ld_thread,
+        "scroll_s": args.scroll,
+        "scroll_mode": args.scroll_mode,
+        "makespan_s": round(report.makespan, 3),
+        "wall_s": round(wall, 3),
+        "completed": report.completed,
+        "swipes": fleet.counters["swipes"],
+        "swipes_per_s": round(fleet.counters["swipes"] / wall, 2) if wall else 0.0,
+        "swipe_p95_ms": round(swipe_latency.get("p95", 0.0) * 1000, 1),
+        "shell_commands": fleet.counters["shell_commands"],
+        "host_requests": fleet.counters["host_requests"],
+        "injected_failures": fleet.counters["failures"],
+        "frozen": len(fleet.frozen),
+        "screen_actions": metrics["screen_actions"],
+        "process_spawns": spawns[0],
+        "cpu_s": round(cpu, 3),
+        "cpu_percent": round(100 * cpu / wall, 1) if wall else 0.0,
+        "peak_rss_mb": round(peak_rss[0] / (1024 * 1024), 1),
+        "threads": threading.active_count()
+    }
+    with open(args.out, "w") as f:
+        json.dump(result, f)
+    server.stop()
+    return 0
+
+
+def scenario_key(result):
+    return (result["size"], result["parallel"], result["scroll_s"], result.get("scroll_mode", "host"),
+            result.get("frozen", 0))
+
+
+def load_history(path=HISTORY_PATH):
+    try:
+        with open(path, "r") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def append_history(entries, path=HISTORY_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+def previous_result(history, result, version):
+    """Latest stored result for the same scenario from another version"""
+    for entry in reversed(history):
+        if entry.get("version") != version and scenario_key(entry) == scenario_key(result):
+            return entry
+    return None
+
+
+def format_comparison(result, previous):
+    lines = []
+    for key, higher_is_better in TRACKED.items():
+        old, new = previous.get(key), result.get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        worse = change < -5 if higher_is_better else change > 5
+        lines.append(f"    {key}: {old} -> {new} ({change:+.1f}%){'  REGRESSION' if worse else ''}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.run_bench", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--parallel", type=int, help="LDs in flight (default: all of them)")
+    parser.add_argument("--scroll", type=float, default=10, help="Scroll stage length in seconds")
+    parser.add_argument("--scroll-mode", choices=["host", "agent"], default="host")
+    parser.add_argument("--boot", type=float, default=1.0, help="Simulated boot time in seconds")
+    parser.add_argument("--latency", type=float, default=5, help="Simulated adb command latency in ms")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of shell commands that fail")
+    parser.add_argument("--boot-fail-rate", type=float, default=0.0, help="Fraction of boots that never come online")
+    parser.add_argument("--frozen", type=int, default=0, help="LDs whose screen never changes")
+    parser.add_argument("--sequential-start", action="store_true", help="Boot one LD at a time")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--label", help="Version to store results under (default: git describe)")
+    parser.add_argument("--no-save", action="store_true", help="Do not append to the results history")
+    parser.add_argument("--verbose", action="store_true", help="Show the automation's own output")
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.out:
+        return run_scenario(args)
+
+    version = args.label or current_version()
+    history = load_history()
+    results = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="ldbench-") as workdir:
+            out = os.path.join(workdir, "result.json")
+            command = [sys.executable, "-m", "bench.run_bench", "--size", str(size), "--out", out, "--workdir", workdir,
+                       "--scroll", str(args.scroll), "--boot", str(args.boot), "--latency", str(args.latency),
+                       "--fail-rate", str(args.fail_rate), "--boot-fail-rate", str(args.boot_fail_rate),
+                       "--seed", str(args.seed), "--scroll-mode", args.scroll_mode]
+            if args.parallel:
+                command += ["--parallel", str(args.parallel)]
+            if args.frozen:
+                command += ["--frozen", str(args.frozen)]
+            if args.sequential_start:
+                command.append("--sequential-start")
+            env = dict(os.environ, PYTHONPATH=REPO_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+            print(f"Running {size} LDs...", flush=True)
+            # The run writes reports/ and logs/ into its working directory, so keep it in the temp dir
+            proc = subprocess.run(command, cwd=workdir, env=env,
+                                  stdout=None if args.verbose else subprocess.DEVNULL,
+                                  stderr=None if args.verbose else subprocess.PIPE, text=True)
+            if proc.returncode != 0 or not os.path.exists(out):
+                print(f"  failed (exit {proc.returncode})")
+                if proc.stderr:
+                    print(proc.stderr[-2000:])
+                continue
+            with open(out, "r") as f:
+                result = json.load(f)
+
+        result.update(version=version, recorded=time.strftime("%Y-%m-%dT%H:%M:%S"), python=sys.version.split()[0])
+        results.append(result)
+        print(f"  makespan {result['makespan_s']}s, {result['swipes_per_s']} swipes/s, "
+              f"{result['shell_commands']} shell commands, {result['process_spawns']} process spawns, CPU {result['cpu_s']}s ({result['cpu_percent']}%), "
+              f"peak RSS {result['peak_rss_mb']} MB, swipe p95 {result['swipe_p95_ms']} ms")
+        if result.get("frozen"):
+            actions = [action for actions in result["screen_actions"].values() for action in actions]
+            print(f"  {result['frozen']} frozen screens: {actions.count('relaunch')} Facebook relaunches, "
+                  f"{actions.count('stop')} scrolls stopped on {len(result['screen_actions'])} LDs")
+        previous = previous_result(history, result, version)
+        if previous:
+            print(f"  vs {previous['version']} ({previous['recorded']}):")
+            print("\n".join(format_comparison(result, previous)))
+
+    if results and not args.no_save:
+        append_history(results)
+        print(f"Results appended to {os.path.relpath(HISTORY_PATH)}")
+    return 0 if len(results) == len(args.sizes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Coordinator plus several workers on localhost, each worker with its own fake adb server and LDPlayer.
+
+    python -m bench.run_distributed --workers 3 --lds 30 --kill-after 5
+
+--kill-after kills the first worker mid-run so its jobs have to be reassigned.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+
+def run_worker(args):
+    """Child process: one worker backed by its own fake fleet of args.lds LDs"""
+    sys.path.insert(0, REPO_DIR)
+    from bench.fake_backend import FakeAdbServer, FakeFleet, FakeLDPlayer
+
+    fleet = FakeFleet(args.lds, boot_seconds=args.boot, seed=args.worker_index)
+    os.environ["ANDROID_ADB_SERVER_PORT"] = str(FakeAdbServer(fleet).start())
+
+    from automation import MainWindow
+    from distributed import Worker
+    from inventory import EmulatorInventory
+
+    inventory = EmulatorInventory("fake-ld", cache_path=os.path.join(args.workdir, f"inventory-{args.worker_index}.json"),
+                                  ld_factory=lambda ld_dir: FakeLDPlayer(fleet, ld_dir))
+    inventory.ensure_loaded()
+    worker_id = f"worker-{args.worker_index}"
+
+    def log(message):
+        print(f"[{worker_id}] {message}", flush=True)
+
+    main_window = MainWindow(list(inventory.name_to_serial), running_flag=lambda: True, ld_thread=args.parallel,
+                             log_func=log, start_same_time=True, inventory=inventory)
+    main_window.em.boot_delay = max(1, int(args.boot * 2))
+    main_window.em.start_delay = 0
+    main_window.em.close_delay = 2
+    main_window.scroll_duration = args.scroll
+    asyncio.run(Worker(main_window, "127.0.0.1", args.port, worker_id=worker_id, heartbeat_interval=1).run())
+    return 0
+
+
+async def run_cluster(args):
+    sys.path.insert(0, REPO_DIR)
+    from distributed import Coordinator
+
+    def log(message):
+        print(f"[coordinator] {message}", flush=True)
+
+    coordinator = Coordinator([f"LD-{i}" for i in range(args.lds)], host="127.0.0.1", port=0,
+                              worker_timeout=args.worker_timeout, log_func=log)
+    coordinator_task = asyncio.create_task(coordinator.run())
+    while not coordinator._server:
+        await asyncio.sleep(0.05)
+
+    started = time.monotonic()
+    workers = []
+    with tempfile.TemporaryDirectory(prefix="ldcluster-") as workdir:
+        env = dict(os.environ, PYTHONPATH=REPO_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        for index in range(args.workers):
+            workers.append(await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "bench.run_distributed", "--worker-index", str(index), "--port", str(coordinator.port),
+                "--lds", str(args.lds), "--parallel", str(args.parallel), "--scroll", str(args.scroll),
+                "--boot", str(args.boot), "--workdir", workdir, cwd=workdir, env=env,
+                stdout=None if args.verbose else asyncio.subprocess.DEVNULL,
+                stderr=None if args.verbose else asyncio.subprocess.DEVNULL))
+
+        if args.kill_after:
+            await asyncio.sleep(args.kill_after)
+            log(f"Killing worker-0 after {args.kill_after}s")
+            workers[0].kill()
+
+        jobs = await coordinator_task
+        for worker in workers:
+            try:
+                await asyncio.wait_for(worker.wait(), 30)
+            except asyncio.TimeoutError:
+                worker.kill()
+
+    done = sum(1 for job in jobs.values() if job.state == "done")
+    reassigned = sum(1 for job in jobs.values() if job.attempts > 1)
+    print(f"{done}/{len(jobs)} LDs done on {args.workers} workers in {time.monotonic() - started:.1f}s, "
+          f"{reassigned} reassigned")
+    return 0 if done == len(jobs) else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.run_distributed", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--lds", type=int, default=30, help="LD jobs (every worker hosts LD-0..LD-<n-1>)")
+    parser.add_argument("--parallel", type=int, default=4, help="Slots per worker")
+    parser.add_argument("--scroll", type=float, default=3, help="Scroll stage length in seconds")
+    parser.add_argument("--boot", type=float, default=0.5, help="Simulated boot time in seconds")
+    parser.add_argument("--kill-after", type=float, help="Kill worker-0 after this many seconds")
+    parser.add_argument("--worker-timeout", type=float, default=5)
+    parser.add_argument("--verbose", action="store_true", help="Show worker output")
+    parser.add_argument("--worker-index", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.worker_index is not None:
+        return run_worker(args)
+    return asyncio.run(run_cluster(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
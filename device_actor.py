@@ -0,0 +1,197 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+from adb_client import AdbError
+
+URGENT = 0  # stop/quit: runs next and drops queued bulk work
+NORMAL = 1
+BULK = 2  # swipes and other repeatable work that may be dropped
+
+# Seconds a coalesced command's result is reused after it completes
+COALESCE_TTL = {"connect": 30.0, "unlock": 5.0}
+
+
+class DeviceInterrupted(AdbError):
+    """The command was dropped because the device is being stopped"""
+
+
+class _Command:
+    __slots__ = ("kind", "factory", "future", "key")
+
+    def __init__(self, kind, factory, future, key):
+        self.kind = kind
+        self.factory = factory
+        self.future = future
+        self.key = key
+
+
+class DeviceActor:
+    """One command at a time for a serial, in priority order, on the engine's event loop.
+
+    Commands with a coalesce key share a single execution while one is queued or running, and
+    the result is reused for COALESCE_TTL[kind] seconds. An URGENT command drops every queued
+    BULK command so a stop does not wait behind swipes.
+    """
+
+    def __init__(self, serial, coalesce_ttl=None):
+        self.serial = serial
+        self.loop = asyncio.get_running_loop()
+        self.coalesce_ttl = dict(COALESCE_TTL, **(coalesce_ttl or {}))
+        self.closed = False
+        self._heap = []
+        self._seq = itertools.count()
+        self._pending = {}
+        self._recent = {}
+        self._wakeup = asyncio.Event()
+        self._closed_event = asyncio.Event()
+        self._worker = None
+        self._running_since = None  # monotonic start of the command being run
+
+    def submit(self, kind, factory, priority=NORMAL, key=None):
+        """Queue factory() (a coroutine function) and return a future for its result"""
+        future = self.loop.create_future()
+        if self.closed:
+            future.set_exception(DeviceInterrupted(f"{self.serial} is stopping, {kind} dropped"))
+            return future
+        if key is not None:
+            recent = self._recent.get(key)
+            if recent and recent[0] > time.monotonic():
+                future.set_result(recent[1])
+                return future
+            pending = self._pending.get(key)
+            if pending is not None:
+                return pending
+            self._pending[key] = future
+        if priority == URGENT:
+            self.purge(BULK)
+        heapq.heappush(self._heap, (priority, next(self._seq), _Command(kind, factory, future, key)))
+        self._wakeup.set()
+        if self._worker is None:
+            self._worker = self.loop.create_task(self._run())
+        return future
+
+    async def call(self, kind, factory, priority=NORMAL, key=None):
+        future = self.submit(kind, factory, priority, key)
+        # A shared future must survive one of its waiters being cancelled
+        return await (asyncio.shield(future) if key is not None else future)
+
+    def purge(self, min_priority=BULK):
+        """Drop queued commands at or below min_priority; returns how many were dropped"""
+        kept, dropped = [], []
+        for entry in self._heap:
+            (dropped if entry[0] >= min_priority else kept).append(entry)
+        if dropped:
+            heapq.heapify(kept)
+            self._heap = kept
+            for _, _, command in dropped:
+                self._fail(command, DeviceInterrupted(f"{command.kind} on {self.serial} dropped"))
+        return len(dropped)
+
+    def _fail(self, command, error):
+        if command.key is not None and self._pending.get(command.key) is command.future:
+            del self._pending[command.key]
+        if not command.future.done():
+            command.future.set_exception(error)
+            # Nobody may await a dropped command; don't warn about it
+            command.future.exception()
+
+    async def _run(self):
+        while not self.closed:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            _, _, command = heapq.heappop(self._heap)
+            if command.future.done():
+                continue
+            self._running_since = time.monotonic()
+            try:
+                result = await command.factory()
+            except asyncio.CancelledError:
+                self._fail(command, DeviceInterrupted(f"{command.kind} on {self.serial} interrupted"))
+                raise
+            except Exception as e:
+                self._fail(command, e)
+            else:
+                if command.key is not None:
+                    self._pending.pop(command.key, None)
+                    ttl = self.coalesce_ttl.get(command.kind)
+                    if ttl:
+                        self._recent[command.key] = (time.monotonic() + ttl, result)
+                if not command.future.done():
+                    command.future.set_result(result)
+            finally:
+                self._running_since = None
+
+    def busy_for(self):
+        """Seconds the running command has been going, 0 when idle"""
+        return 0.0 if self._running_since is None else time.monotonic() - self._running_since
+
+    async def sleep(self, delay):
+        """Sleep between commands, raising DeviceInterrupted as soon as the actor is closed"""
+        try:
+            await asyncio.wait_for(self._closed_event.wait(), delay)
+        except asyncio.TimeoutError:
+            return
+        raise DeviceInterrupted(f"{self.serial} is stopping")
+
+    def forget(self, key):
+        """Drop a cached coalesced result, e.g. after the device disconnected"""
+        self._recent.pop(key, None)
+
+    def close(self):
+        """Drop everything queued and interrupt the running command; later submits fail fast"""
+        if self.closed:
+            return
+        self.closed = True
+        self._closed_event.set()
+        self.purge(URGENT)
+        if self._worker:
+            self._worker.cancel()
+
+
+_actors = {}
+_actors_lock = threading.Lock()
+
+
+def get_device_actor(serial):
+    """Actor for serial on the running loop; only call from an event loop"""
+    loop = asyncio.get_running_loop()
+    with _actors_lock:
+        for key in [key for key, actor in _actors.items() if actor.loop.is_closed()]:
+            del _actors[key]
+        actor = _actors.get((serial, loop))
+        if actor is None or actor.closed:
+            actor = _actors[(serial, loop)] = DeviceActor(serial)
+        return actor
+
+
+def find_device_actor(serial):
+    """serial's actor on the running loop, or None; unlike get_device_actor it never creates one"""
+    loop = asyncio.get_running_loop()
+    with _actors_lock:
+        actor = _actors.get((serial, loop))
+    return actor if actor is not None and not actor.closed else None
+
+
+def close_device_actor(serial):
+    """Close serial's actors on every loop; safe to call from any thread"""
+    with _actors_lock:
+        actors = [_actors.pop(key) for key in [key for key in _actors if key[0] == serial]]
+    for actor in actors:
+        if actor.loop.is_closed():
+            continue
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is actor.loop:
+            actor.close()
+            continue
+        try:
+            actor.loop.call_soon_threadsafe(actor.close)
+        except RuntimeError:
+            pass  # loop closed meanwhile
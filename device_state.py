@@ -0,0 +1,143 @@
+import subprocess
+import threading
+import time
+from collections import namedtuple
+
+from adb_client import find_adb, get_adb_client
+
+DeviceInfo = namedtuple("DeviceInfo", ["serial", "state", "product", "model", "transport_id"])
+
+
+def parse_devices_output(output):
+    """Parse the output of `adb devices -l` into {serial: DeviceInfo}"""
+    devices = {}
+    for line in output.splitlines():
+        line = line.strip()
+        if not line or line.startswith("*") or line.startswith("List of devices"):
+            continue
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        extras = dict(p.split(":", 1) for p in parts[2:] if ":" in p)
+        devices[parts[0]] = DeviceInfo(
+            serial=parts[0],
+            state=parts[1],
+            product=extras.get("product"),
+            model=extras.get("model"),
+            transport_id=extras.get("transport_id"),
+        )
+    return devices
+
+
+def fetch_adb_devices():
+    client = get_adb_client()
+    if client:
+        return client.devices(long=True)
+    result = subprocess.run([find_adb(), "devices", "-l"], capture_output=True, text=True, timeout=15)
+    return result.stdout
+
+
+class DeviceStateService:
+    """Polls `adb devices -l` once per tick and serves every caller from the cached snapshot"""
+
+    def __init__(self, interval=2, ttl=5, fetch=None):
+        self.interval = interval
+        self.ttl = ttl
+        self._fetch = fetch or fetch_adb_devices
+        self._snapshot = {}
+        self._taken_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._listeners = []
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def configure(self, interval=None, ttl=None):
+        if interval is not None:
+            self.interval = max(0.5, float(interval))
+        if ttl is not None:
+            self.ttl = max(0.0, float(ttl))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def subscribe(self, callback):
+        """Register callback(changes) called with {serial: DeviceInfo or None} for changed rows only"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def refresh(self):
+        requested_at = time.monotonic()
+        with self._refresh_lock:
+            # Another caller may have refreshed while we waited for the lock
+            if self._taken_at >= requested_at:
+                return self._snapshot
+            new_snapshot = parse_devices_output(self._fetch())
+            with self._lock:
+                old_snapshot = self._snapshot
+                self._snapshot = new_snapshot
+                self._taken_at = time.monotonic()
+                listeners = list(self._listeners)
+
+        changes = {serial: info for serial, info in new_snapshot.items() if old_snapshot.get(serial) != info}
+        changes.update({serial: None for serial in old_snapshot if serial not in new_snapshot})
+        if changes:
+            for callback in listeners:
+                try:
+                    callback(changes)
+                except Exception as e:
+                    print(f"Device state listener error: {str(e)}")
+        return new_snapshot
+
+    def snapshot(self, max_age=None):
+        max_age = self.ttl if max_age is None else max_age
+        if time.monotonic() - self._taken_at > max_age:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error polling adb devices: {str(e)}")
+        return self._snapshot
+
+    def get(self, serial, max_age=None):
+        return self.snapshot(max_age).get(serial)
+
+    def is_present(self, serial, max_age=None):
+        return bool(serial) and serial in self.snapshot(max_age)
+
+    def is_online(self, serial, max_age=None):
+        info = self.get(serial, max_age) if serial else None
+        return info is not None and info.state == "device"
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error polling adb devices: {str(e)}")
+            self._stop_event.wait(self.interval)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_device_state_service():
+    """Return the process-wide device state service, starting its poller on first use"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = DeviceStateService()
+            _service.start()
+        return _service
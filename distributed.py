@@ -0,0 +1,335 @@
+"""Coordinator/worker mode: one coordinator holds the LD queue, workers on other hosts run LD jobs.
+
+Messages are JSON objects, one per line, over plain TCP:
+
+    worker -> coordinator: hello {worker, capacity, lds, token}, heartbeat, progress {job, stage, seconds},
+                           done {job, ok, stages}
+    coordinator -> worker: job {job, ld, attempt}, shutdown
+
+A worker that disconnects or stays silent for worker_timeout seconds loses its jobs; they go back
+to the front of the queue, up to max_attempts per LD. With a token set, workers whose hello
+does not carry the same token are turned away.
+"""
+import asyncio
+import hmac
+import json
+import time
+from collections import deque
+
+DEFAULT_PORT = 7700
+HEARTBEAT_INTERVAL = 5
+WORKER_TIMEOUT = 15
+
+
+async def send_message(writer, message):
+    writer.write((json.dumps(message) + "\n").encode("utf-8"))
+    await writer.drain()
+
+
+async def read_message(reader):
+    line = await reader.readline()
+    return json.loads(line) if line else None
+
+
+class Job:
+    def __init__(self, job_id, ld):
+        self.id = job_id
+        self.ld = ld
+        self.attempts = 0
+        self.worker = None  # WorkerHandle running it
+        self.state = "queued"  # queued, running, done, failed
+        self.stages = {}
+        self.started = None
+
+
+class WorkerHandle:
+    def __init__(self, worker_id, capacity, lds, writer):
+        self.id = worker_id
+        self.capacity = capacity
+        self.lds = set(lds)
+        self.writer = writer
+        self.jobs = set()
+        self.last_seen = time.monotonic()
+        self.alive = True
+
+    def can_run(self, job):
+        # A worker that lists no LDs accepts any name
+        return self.alive and len(self.jobs) < self.capacity and (not self.lds or job.ld in self.lds)
+
+
+class Coordinator:
+    """Hands queued LD jobs to connected workers and reassigns the jobs of workers that die"""
+
+    def __init__(self, names, host="127.0.0.1", port=DEFAULT_PORT, max_attempts=3,
+                 worker_timeout=WORKER_TIMEOUT, token=None, log_func=print):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.max_attempts = max_attempts
+        self.worker_timeout = worker_timeout
+        self.log = log_func
+        self.jobs = {job_id: Job(job_id, name) for job_id, name in enumerate(names, 1)}
+        self.queue = deque(self.jobs)
+        self.workers = {}
+        self._finished = None
+        self._server = None
+
+    def pending(self):
+        return sum(1 for job in self.jobs.values() if job.state in ("queued", "running"))
+
+    async def run(self):
+        self._finished = asyncio.Event()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.log(f"Coordinator listening on {self.host}:{self.port} with {len(self.jobs)} LD jobs")
+        reaper = asyncio.create_task(self._reap())
+        try:
+            if self.pending():
+                await self._finished.wait()
+        finally:
+            reaper.cancel()
+            for worker in list(self.workers.values()):
+                try:
+                    await send_message(worker.writer, {"type": "shutdown"})
+                except (ConnectionError, RuntimeError):
+                    pass
+                worker.writer.close()
+            self._server.close()
+        self.log(self.summary())
+        return self.jobs
+
+    def cancel(self):
+        if self._finished:
+            self._finished.set()
+
+    async def _handle(self, reader, writer):
+        worker = None
+        try:
+            hello = await asyncio.wait_for(read_message(reader), self.worker_timeout)
+            if not hello or hello.get("type") != "hello":
+                return
+            if self.token and not hmac.compare_digest(str(hello.get("token") or ""), self.token):
+                self.log(f"Rejected worker from {writer.get_extra_info('peername')}: wrong token")
+                return
+            worker_id = hello.get("worker") or f"{writer.get_extra_info('peername')}"
+            if worker_id in self.workers:
+                previous = self.workers[worker_id]
+                self._lost(previous, "reconnected")
+                previous.writer.close()  # ends the old connection's read loop
+            worker = self.workers[worker_id] = WorkerHandle(worker_id, max(1, int(hello.get("capacity", 1))),
+                                                            hello.get("lds", []), writer)
+            self.log(f"Worker {worker_id} joined with {worker.capacity} slots")
+            self._dispatch()
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                worker.last_seen = time.monotonic()
+                self._on_message(worker, message)
+        except (ConnectionError, asyncio.TimeoutError, json.JSONDecodeError) as e:
+            if worker:
+                self.log(f"Worker {worker.id} connection error: {str(e)}")
+        finally:
+            if worker and worker.alive:
+                self._lost(worker, "disconnected")
+            writer.close()
+
+    def _on_message(self, worker, message):
+        kind = message.get("type")
+        job = self.jobs.get(message.get("job"))
+        # A reconnected worker gets a new handle; the old connection's messages no longer count
+        if kind == "progress" and job and job.worker is worker:
+            job.stages[message["stage"]] = message.get("seconds")
+            self.log(f"{worker.id}: {job.ld} finished {message['stage']} in {message.get('seconds', 0):.1f}s")
+        elif kind == "done" and job and job.worker is worker:
+            worker.jobs.discard(job.id)
+            job.stages.update(message.get("stages") or {})
+            if message.get("ok"):
+                job.state = "done"
+                self.log(f"{worker.id}: {job.ld} done")
+            else:
+                self._retry(job, f"failed on {worker.id}: {message.get('error', 'unknown error')}")
+            self._dispatch()
+            self._check_finished()
+
+    def _retry(self, job, reason):
+        job.worker = None
+        if job.attempts >= self.max_attempts:
+            job.state = "failed"
+            self.log(f"LD {job.ld} {reason}; giving up after {job.attempts} attempts")
+        else:
+            job.state = "queued"
+            self.queue.appendleft(job.id)
+            self.log(f"LD {job.ld} {reason}; requeued")
+
+    def _lost(self, worker, reason):
+        worker.alive = False
+        if self.workers.get(worker.id) is worker:
+            self.workers.pop(worker.id)
+        if worker.jobs:
+            self.log(f"Worker {worker.id} {reason}, reassigning {len(worker.jobs)} jobs")
+        for job_id in sorted(worker.jobs, reverse=True):
+            self._retry(self.jobs[job_id], f"lost with worker {worker.id}")
+        worker.jobs.clear()
+        self._dispatch()
+        self._check_finished()
+
+    def _dispatch(self):
+        """Give queued jobs, oldest first, to the live worker with the most free slots that can run them"""
+        skipped = deque()
+        while self.queue:
+            job = self.jobs[self.queue.popleft()]
+            candidates = [worker for worker in self.workers.values() if worker.can_run(job)]
+            if not candidates:
+                skipped.append(job.id)
+                continue
+            worker = max(candidates, key=lambda w: w.capacity - len(w.jobs))
+            job.state = "running"
+            job.worker = worker
+            job.attempts += 1
+            job.started = time.monotonic()
+            worker.jobs.add(job.id)
+            asyncio.create_task(self._send_job(worker, job))
+        self.queue = skipped
+
+    async def _send_job(self, worker, job):
+        try:
+            await send_message(worker.writer, {"type": "job", "job": job.id, "ld": job.ld, "attempt": job.attempts})
+        except (ConnectionError, RuntimeError):
+            if worker.alive:
+                self._lost(worker, "unreachable")
+
+    def _check_finished(self):
+        if not self.pending():
+            self._finished.set()
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(1)
+            now = time.monotonic()
+            for worker in list(self.workers.values()):
+                if now - worker.last_seen > self.worker_timeout:
+                    self._lost(worker, f"silent for {now - worker.last_seen:.0f}s")
+                    worker.writer.close()
+
+    def summary(self):
+        done = sum(1 for job in self.jobs.values() if job.state == "done")
+        failed = [job.ld for job in self.jobs.values() if job.state == "failed"]
+        retried = sum(1 for job in self.jobs.values() if job.attempts > 1)
+        text = f"Coordinator: {done}/{len(self.jobs)} LDs done, {retried} reassigned"
+        if failed:
+            text += f", failed: {', '.join(failed)}"
+        return text
+
+
+class Worker:
+    """Connects to a coordinator and runs the LD jobs it is given through a local MainWindow"""
+
+    def __init__(self, main_window, host, port=DEFAULT_PORT, worker_id=None, heartbeat_interval=HEARTBEAT_INTERVAL,
+                 token=None):
+        self.main_window = main_window
+        self.host = host
+        self.port = port
+        self.worker_id = worker_id
+        self.token = token
+        self.heartbeat_interval = heartbeat_interval
+        self.log = main_window.log
+        self._writer = None
+        self._outbox = None  # every message goes through here, so progress can't overtake done
+        self._interrupted = []
+        self._tasks = {}
+        self._job_of_ld = {}
+        self._free_slots = None
+
+    async def run(self):
+        main_window = self.main_window
+        await main_window.prepare()
+        main_window.on_stage = self._on_stage
+        self._free_slots = list(range(main_window.ld_thread))
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        await send_message(self._writer, {"type": "hello", "worker": self.worker_id, "token": self.token,
+                                          "capacity": main_window.ld_thread, "lds": main_window.thread_ld})
+        self.log(f"Connected to coordinator {self.host}:{self.port} as {self.worker_id}")
+        self._outbox = asyncio.Queue()
+        sender = asyncio.create_task(self._sender())
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    self.log("Coordinator closed the connection")
+                    break
+                if message.get("type") == "job":
+                    task = asyncio.create_task(self._run_job(message["job"], message["ld"]))
+                    self._tasks[message["job"]] = task
+                elif message.get("type") == "shutdown":
+                    self.log("Coordinator finished, shutting down")
+                    break
+        finally:
+            heartbeat.cancel()
+            for task in self._tasks.values():
+                task.cancel()
+            if self._tasks:
+                await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            # The coordinator requeues these elsewhere; don't leave the LDs running here
+            for name in self._interrupted:
+                self.log(f"Closing LD {name}...")
+                await self.main_window.em.quit_ld_async(name)
+            try:
+                await asyncio.wait_for(self._outbox.join(), 5)
+            except asyncio.TimeoutError:
+                pass
+            sender.cancel()
+            self._writer.close()
+
+    def stop(self):
+        if self._writer:
+            self._writer.close()
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            self._send({"type": "heartbeat", "running": len(self._tasks)})
+
+    def _send(self, message):
+        self._outbox.put_nowait(message)
+
+    async def _sender(self):
+        """Writes queued messages in order"""
+        while True:
+            message = await self._outbox.get()
+            try:
+                await send_message(self._writer, message)
+            except (ConnectionError, RuntimeError):
+                pass  # the read loop notices the lost connection
+            finally:
+                self._outbox.task_done()
+
+    def _on_stage(self, name, stage, seconds):
+        job_id = self._job_of_ld.get(name)
+        if job_id is not None:
+            self._send({"type": "progress", "job": job_id, "stage": stage, "seconds": seconds})
+
+    async def _run_job(self, job_id, name):
+        slot = self._free_slots.pop(0) if self._free_slots else 0
+        self._job_of_ld[name] = job_id
+        message = {"type": "done", "job": job_id, "ok": False}
+        try:
+            if name not in self.main_window.em.name_to_serial:
+                message["error"] = f"unknown LD {name}"
+            else:
+                self.main_window.stage_times.pop(name, None)
+                await self.main_window.run_ld(name, slot)
+                stages = self.main_window.stage_times.get(name, {})
+                message.update(ok=len(stages) == len(self.main_window.stages), stages=stages)
+        except asyncio.CancelledError:
+            if "close" not in self.main_window.stage_times.get(name, {}):
+                self._interrupted.append(name)
+            raise
+        except Exception as e:
+            message["error"] = str(e)
+        finally:
+            self._job_of_ld.pop(name, None)
+            self._tasks.pop(job_id, None)
+            self._free_slots.append(slot)
+        self._send(message)
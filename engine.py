@@ -0,0 +1,86 @@
+import asyncio
+import concurrent.futures
+import threading
+
+
+class EngineBridge:
+    """Runs an automation engine on its own asyncio loop and exposes thread-safe pause/resume/stop.
+
+    The engine object provides `async run()` plus loop-local `pause()`, `resume()` and `stop()`,
+    and optionally `enqueue(names)` to add work to a run in progress.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.loop = None
+        self.thread = None
+        self.result = None
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def run(self):
+        """Run the engine on the calling thread until it finishes; returns the engine's result"""
+        asyncio.run(self._main())
+        return self.result
+
+    def start(self, on_done=None):
+        def target():
+            error = None
+            try:
+                self.run()
+            except Exception as e:
+                error = e
+            if on_done:
+                on_done(self.result, error)
+
+        self.thread = threading.Thread(target=target, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    async def _main(self):
+        with self._lock:
+            self.loop = asyncio.get_running_loop()
+            pending, self._pending = self._pending, []
+        for action in pending:
+            action()
+        try:
+            self.result = await self.engine.run()
+        finally:
+            with self._lock:
+                self.loop = None
+
+    def _call(self, action):
+        with self._lock:
+            if self.loop is None:
+                # Not running yet: apply once the loop is up
+                self._pending.append(action)
+                return
+            self.loop.call_soon_threadsafe(action)
+
+    def pause(self):
+        self._call(self.engine.pause)
+
+    def resume(self):
+        self._call(self.engine.resume)
+
+    def stop(self):
+        self._call(self.engine.stop)
+
+    def enqueue(self, names, timeout=2):
+        """Add LDs to the running engine; returns the names it took, or None when it is not running"""
+        with self._lock:
+            loop = self.loop
+        if loop is None:
+            return None
+
+        async def add():
+            return self.engine.enqueue(names)
+
+        try:
+            return asyncio.run_coroutine_threadsafe(add(), loop).result(timeout)
+        except (concurrent.futures.TimeoutError, RuntimeError):
+            return None
+
+    @property
+    def running(self):
+        return self.loop is not None
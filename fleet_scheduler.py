@@ -0,0 +1,134 @@
+import asyncio
+import time
+from collections import deque
+
+
+class FleetReport:
+    def __init__(self, makespan, slots, busy_time, completed, per_ld):
+        self.makespan = makespan
+        self.slots = slots
+        self.busy_time = busy_time
+        self.completed = completed
+        self.per_ld = per_ld
+
+    @property
+    def utilization(self):
+        if not self.makespan or not self.slots:
+            return 0.0
+        return self.busy_time / (self.makespan * self.slots)
+
+    def summary(self):
+        return (f"Makespan {self.makespan:.1f}s, {self.completed} LDs on {self.slots} slots, "
+                f"slot utilization {self.utilization * 100:.0f}%")
+
+
+class FleetScheduler:
+    """Keeps `parallel` LDs in flight: a slot takes the next queued LD as soon as its previous one closes.
+
+    run_one(name, slot) is a coroutine function; every LD runs as its own task on the caller's loop.
+    `parallel` may be a callable so the slot count can change during the run, and `admit(in_flight)`
+    can hold back the next boot until the host has room for it. add() queues more LDs while it runs, and
+    hold() keeps the run open for work that may still add some.
+    """
+
+    def __init__(self, names, parallel, run_one, running_flag=None, log_func=print, admit=None, recheck_interval=2):
+        self.queue = deque(names)
+        self.parallel = parallel if callable(parallel) else max(1, int(parallel))
+        self.admit = admit
+        self.recheck_interval = recheck_interval
+        self.run_one = run_one
+        self.running_flag = running_flag or (lambda: True)
+        self.log = log_func
+        self._busy_time = 0.0
+        self._completed = 0
+        self._per_ld = {}
+        self._tasks = {}
+        self._in_flight = set()
+        self._holds = set()
+        self._added = None
+        self.finished = False
+
+    def cancel(self):
+        """Cancel every in-flight LD and stop taking new ones; call from the scheduler's loop"""
+        self.queue.clear()
+        for task in self._tasks:
+            task.cancel()
+
+    def add(self, names):
+        """Queue more LDs during the run; returns the ones taken (LDs already queued or in flight are skipped),
+        or None when the run is over or stopping, so the caller can start a new one later"""
+        if self.finished or not self.running_flag():
+            return None
+        added = []
+        for name in names:
+            if name not in self._in_flight and name not in self.queue and name not in added:
+                added.append(name)
+        self.queue.extend(added)
+        if added and self._added:
+            self._added.set()
+        return added
+
+    def hold(self, task):
+        """Don't finish the run before task is done, e.g. a recovery that may queue its LD again;
+        returns False when the run is already over"""
+        if self.finished:
+            return False
+        self._holds.add(task)
+        task.add_done_callback(self._holds.discard)
+        return True
+
+    async def _run_slot(self, name, slot):
+        started = time.monotonic()
+        try:
+            await self.run_one(name, slot)
+        except asyncio.CancelledError:
+            self.log(f"LD {name} cancelled")
+        except Exception as e:
+            self.log(f"Error processing LD {name}: {str(e)}")
+        finally:
+            self._in_flight.discard(name)
+            elapsed = time.monotonic() - started
+            self._busy_time += elapsed
+            self._completed += 1
+            self._per_ld[name] = elapsed
+
+    def capacity(self):
+        return max(1, int(self.parallel() if callable(self.parallel) else self.parallel))
+
+    def _can_launch(self):
+        if not self.queue or not self.running_flag() or len(self._tasks) >= self.capacity():
+            return False
+        return self.admit is None or self.admit(len(self._tasks))
+
+    async def run(self):
+        started = time.monotonic()
+        slots_used = 0
+        self._added = asyncio.Event()
+        while self.queue or self._tasks or self._holds:
+            while self._can_launch():
+                used = set(self._tasks.values())
+                slot = next(i for i in range(len(used) + 1) if i not in used)
+                name = self.queue.popleft()
+                self._in_flight.add(name)
+                task = asyncio.create_task(self._run_slot(name, slot))
+                self._tasks[task] = slot
+                slots_used = max(slots_used, len(self._tasks))
+            if not self.running_flag():
+                self.queue.clear()
+            if not self._tasks and not self._holds:
+                if not self.queue:
+                    break
+                # Nothing in flight but the next boot was held back; check again shortly
+                await asyncio.sleep(self.recheck_interval)
+                continue
+            # With LDs still queued, wake periodically in case capacity grew or admission opened up
+            timeout = self.recheck_interval if self.queue else None
+            self._added.clear()
+            added = asyncio.ensure_future(self._added.wait())
+            done, _ = await asyncio.wait(list(self._tasks) + list(self._holds) + [added], timeout=timeout,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            added.cancel()
+            for task in done:
+                self._tasks.pop(task, None)
+        self.finished = True
+        return FleetReport(time.monotonic() - started, slots_used or 1, self._busy_time, self._completed, dict(self._per_ld))
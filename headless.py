@@ -0,0 +1,403 @@
+"""Headless entry point: python -m headless run --lds USN-1..USN-40 --parallel 8 --scroll-min 15
+
+Never imports tkinter/ttkbootstrap; everything beyond argparse is loaded when a command needs it.
+"""
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse
+import os
+import re
+import signal
+import sys
+
+
+def parse_ld_names(spec):
+    """Expand 'USN-1..USN-3,USN-7' into ['USN-1', 'USN-2', 'USN-3', 'USN-7']"""
+    names = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        if ".." not in part:
+            names.append(part)
+            continue
+        first, last = part.split("..", 1)
+        m1 = re.match(r"^(.*?)(\d+)$", first)
+        m2 = re.match(r"^(.*?)(\d+)$", last)
+        if not m1 or not m2 or (m2.group(1) and m2.group(1) != m1.group(1)):
+            raise argparse.ArgumentTypeError(f"Invalid LD range: {part}")
+        start, end = int(m1.group(2)), int(m2.group(2))
+        step = 1 if end >= start else -1
+        names.extend(f"{m1.group(1)}{i}" for i in range(start, end + step, step))
+    return names
+
+
+def parse_stage_limit(spec):
+    """'start=3' -> ('start', 3)"""
+    name, _, limit = spec.partition("=")
+    if not name or not limit.isdigit():
+        raise argparse.ArgumentTypeError(f"Expected STAGE=N, got {spec}")
+    return name, int(limit)
+
+
+_log_pipeline = None
+
+
+def log(message):
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}", flush=True)
+    if _log_pipeline:
+        _log_pipeline.emit(message)
+
+
+def start_log_pipeline():
+    global _log_pipeline
+    from log_pipeline import LogPipeline
+
+    # Console output plus the same rotating JSONL file the GUI writes
+    _log_pipeline = LogPipeline(max_lines=1)
+    return _log_pipeline
+
+
+def build_main_window(args, names, settings, running_flag, warm_pool=None):
+    """MainWindow configured from the settings file, overridden by command line flags.
+    Later edits to the settings file apply to the run as it goes."""
+    from automation import MainWindow
+    from settings import RuntimeSettings
+
+    main_window = MainWindow(
+        names,
+        running_flag=running_flag,
+        ld_thread=args.parallel or settings["parallel_ld"],
+        log_func=log,
+        start_same_time=args.start_same_time or settings["start_same_time"]
+    )
+    main_window.em.boot_delay = settings["boot_delay"]
+    main_window.em.start_delay = settings["start_delay"]
+    main_window.em.task_delay = settings["task_delay"]
+    main_window.em.close_delay = settings["close_delay"]
+    main_window.em.arrange_windows = settings["arrange_windows"] and not args.no_arrange_windows
+    if args.adaptive or settings["adaptive_parallel"]:
+        from admission import AdmissionController
+        max_parallel = main_window.ld_thread
+        main_window.admission = AdmissionController(
+            min_parallel=min(args.min_parallel or settings["min_parallel"], max_parallel),
+            max_parallel=max_parallel,
+            log_func=log
+        )
+    scroll_min = args.scroll_min if args.scroll_min is not None else settings["scroll_duration"]
+    main_window.scroll_duration = int(scroll_min * 60)
+    main_window.scroll_mode = args.scroll_mode or settings["scroll_mode"]
+    stage_settings = {name: dict(options) for name, options in settings["stages"].items()}
+    for name, limit in args.stage_concurrency or []:
+        stage_settings.setdefault(name, {})["concurrency"] = limit
+    main_window.configure_stages(stage_settings, settings["custom_stages"])
+
+    runtime = RuntimeSettings(settings, path=args.settings)
+    # Command line flags win until the same key is edited in the file
+    overrides = {"parallel_ld": main_window.ld_thread, "scroll_duration": scroll_min,
+                 "scroll_mode": main_window.scroll_mode, "stages": stage_settings}
+    if args.min_parallel:
+        overrides["min_parallel"] = args.min_parallel
+    if args.no_arrange_windows:
+        overrides["arrange_windows"] = False
+    if args.watchdog_timeout is not None:
+        overrides["watchdog_timeout"] = args.watchdog_timeout
+    if args.swipe_rate:
+        overrides["swipe_rate"] = args.swipe_rate
+    runtime.update(overrides, save=False)
+    main_window.warm_pool = warm_pool
+    main_window.use_settings(runtime)
+    runtime.watch()
+    return main_window
+
+
+def build_warm_pool(settings):
+    """A pool shared by every run of a long-lived process, or None when warm_keep is 0"""
+    if not settings["warm_keep"]:
+        return None
+    from automation import ControlEmulator
+    from warm_pool import WarmPool
+
+    return WarmPool(ControlEmulator(), keep=settings["warm_keep"],
+                    memory_budget_mb=settings["warm_memory_budget_mb"], log_func=log)
+
+
+def cmd_run(args):
+    import threading
+    from settings import load_schedule_settings, load_settings
+    from engine import EngineBridge
+
+    start_log_pipeline()
+    settings = load_settings(args.settings)
+    journal = resume_state = None
+    if settings["run_journal"] or args.resume:
+        from journal import RunJournal
+        journal = RunJournal()
+        if args.resume:
+            resume_state = journal.unfinished_run()
+            if resume_state is None:
+                log("No interrupted run to resume; starting a new one.")
+    names = resume_state["lds"] if resume_state else \
+        args.lds or load_schedule_settings(args.schedule).get("selected_lds", [])
+    if not names:
+        log("No LDs given (--lds) and none selected in the schedule settings.")
+        return 2
+
+    running_event = threading.Event()
+    running_event.set()
+    # No warm pool: nothing would be left to evict warm LDs once this process exits. LDs that are
+    # already up still skip their boot.
+    main_window = build_main_window(args, names, settings, running_event.is_set)
+    main_window.journal = journal
+    main_window.resume_state = resume_state
+
+    missing = main_window.resolve_lds()
+    _log_pipeline.set_ld_names(main_window.thread_ld)
+    if missing:
+        log(f"Skipping unknown LDs: {', '.join(missing)}")
+    log(f"Startup took {(time.perf_counter() - _STARTED) * 1000:.0f} ms")
+    if args.dry_run:
+        log(f"Would process {len(main_window.thread_ld)} LDs with parallel={main_window.ld_thread}")
+        log(f"Stages: {main_window.pipeline.describe()}")
+        return 0
+
+    bridge = EngineBridge(main_window)
+    bridge.start()
+    try:
+        while bridge.thread.is_alive():
+            bridge.thread.join(timeout=0.5)
+    except KeyboardInterrupt:
+        stop_run(bridge, main_window, running_event)
+        return 130
+    return 0
+
+
+def stop_run(bridge, main_window, running_event):
+    log("Stopping automation...")
+    running_event.clear()
+    bridge.stop()
+    bridge.thread.join(timeout=30)
+    # Same as the GUI stop button: close every LD that was started but not closed
+    for name, times in main_window.stage_times.items():
+        if "close" not in times:
+            log(f"Closing LD {name}...")
+            main_window.em.quit_ld(name)
+
+
+def load_named_schedules(path):
+    """The GUI's schedule (time, daily, selected_lds) plus every entry of the "schedules" list"""
+    from settings import load_schedule_settings
+    from timer_engine import NamedSchedule
+
+    data = load_schedule_settings(path)
+    schedules = []
+    if data.get("time") and data.get("selected_lds"):
+        schedules.append(NamedSchedule("default", data["time"], data["selected_lds"], once=not data.get("daily", True)))
+    for entry in data.get("schedules", []):
+        schedules.append(NamedSchedule.from_dict(entry, expand=parse_ld_names))
+    return schedules
+
+
+def cmd_schedule(args):
+    import queue
+    import threading
+    from settings import load_settings
+    from engine import EngineBridge
+    from timer_engine import TimerEngine
+
+    start_log_pipeline()
+    settings = load_settings(args.settings)
+    try:
+        schedules = load_named_schedules(args.schedule)
+    except (KeyError, ValueError, argparse.ArgumentTypeError) as e:
+        log(f"Invalid schedule settings: {str(e)}")
+        return 2
+    if not schedules:
+        log(f"No schedules in {args.schedule}")
+        return 2
+
+    # Due schedules, plus (None, bridge) when that bridge's run has ended
+    due = queue.SimpleQueue()
+    timers = TimerEngine(on_due=lambda schedule, lds, when: due.put((schedule, lds)), log_func=log)
+    for schedule in schedules:
+        timers.add(schedule)
+    log("Next runs:")
+    for when, schedule in timers.preview(args.preview or 5):
+        log(f"  {when:%a %Y-%m-%d %H:%M:%S}  {schedule.name} ({len(schedule.lds)} LDs)")
+    if args.preview:
+        return 0
+
+    running_event = threading.Event()
+    bridge = main_window = None
+    warm_pool = build_warm_pool(settings)
+    timers.start()
+    try:
+        while True:
+            schedule, lds = due.get()
+            if schedule is None:
+                if lds is bridge and not timers.pending():
+                    log("No scheduled runs left")
+                    return 0
+                continue
+            log(f"Schedule {schedule.name} is due ({len(lds)} LDs)")
+            if bridge and bridge.thread.is_alive():
+                # Overlapping schedules share the run's slots instead of double-booking LDs
+                if bridge.enqueue(lds) is not None:
+                    continue
+                bridge.thread.join()  # it was already wrapping up
+            running_event.set()
+            main_window = build_main_window(args, lds, settings, running_event.is_set, warm_pool)
+            if settings["run_journal"]:
+                from journal import RunJournal
+                main_window.journal = RunJournal()
+            bridge = EngineBridge(main_window)
+            bridge.start(on_done=lambda result, error, finished=bridge: due.put((None, finished)))
+    except KeyboardInterrupt:
+        timers.stop()
+        if bridge and bridge.thread.is_alive():
+            stop_run(bridge, main_window, running_event)
+        return 130
+    finally:
+        if warm_pool:
+            warm_pool.close_all()
+
+
+def parse_address(value):
+    host, _, port = value.rpartition(":")
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"Expected HOST:PORT, got {value}")
+    return host, int(port)
+
+
+def cmd_coordinate(args):
+    import asyncio
+    from settings import load_schedule_settings
+    from distributed import Coordinator
+
+    start_log_pipeline()
+    names = args.lds or load_schedule_settings(args.schedule).get("selected_lds", [])
+    if not names:
+        log("No LDs given (--lds) and none selected in the schedule settings.")
+        return 2
+    _log_pipeline.set_ld_names(names)
+    token = args.token or os.environ.get("LDAUTO_TOKEN")
+    if not token and args.listen not in ("127.0.0.1", "localhost", "::1"):
+        log(f"Listening on {args.listen} lets any host pull LD jobs; set --token (or LDAUTO_TOKEN) to do that.")
+        return 2
+    coordinator = Coordinator(names, host=args.listen, port=args.port, max_attempts=args.max_attempts,
+                              worker_timeout=args.worker_timeout, token=token, log_func=log)
+    try:
+        jobs = asyncio.run(coordinator.run())
+    except KeyboardInterrupt:
+        log("Coordinator stopped")
+        return 130
+    return 0 if all(job.state == "done" for job in jobs.values()) else 1
+
+
+def cmd_worker(args):
+    import asyncio
+    import socket
+    from settings import load_settings
+    from distributed import Worker
+
+    start_log_pipeline()
+    settings = load_settings(args.settings)
+    main_window = build_main_window(args, args.lds or [], settings, lambda: True)
+    if not args.lds:
+        # Offer every LD this host has
+        main_window.em.inventory.ensure_loaded()
+        main_window.thread_ld = list(main_window.em.name_to_serial)
+    _log_pipeline.set_ld_names(main_window.thread_ld)
+    host, port = args.coordinator
+    worker = Worker(main_window, host, port, worker_id=args.id or socket.gethostname(),
+                    token=args.token or os.environ.get("LDAUTO_TOKEN"))
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        log("Worker stopped")
+        return 130
+    except OSError as e:
+        log(f"Cannot reach coordinator {host}:{port}: {str(e)}")
+        return 1
+    return 0
+
+
+def add_run_options(parser):
+    parser.add_argument("--parallel", type=int, help="LDs in flight at once (default: parallel_ld)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Scale LDs in flight between --min-parallel and --parallel from host load")
+    parser.add_argument("--min-parallel", type=int, help="Lower bound for --adaptive (default: min_parallel)")
+    parser.add_argument("--scroll-min", type=float, help="Scroll duration in minutes (default: scroll_duration)")
+    parser.add_argument("--scroll-mode", choices=["host", "agent"],
+                        help="host: send every swipe over adb; agent: run the swipe loop on the device "
+                             "(default: scroll_mode)")
+    parser.add_argument("--swipe-rate", type=float, metavar="PER_MIN",
+                        help="Target swipes per minute while scrolling from the host (default: swipe_rate)")
+    parser.add_argument("--start-same-time", action="store_true", help="Start LDs simultaneously")
+    parser.add_argument("--stage-concurrency", type=parse_stage_limit, action="append", metavar="STAGE=N",
+                        help="Cap how many LDs may be in one stage at once, e.g. start=3 (repeatable)")
+    parser.add_argument("--no-arrange-windows", action="store_true",
+                        help="Leave LD windows where LDPlayer puts them instead of arranging them in rows")
+    parser.add_argument("--watchdog-timeout", type=float, metavar="SECONDS",
+                        help="Restart or drop an LD that has not answered adb for this long; 0 turns it off "
+                             "(default: watchdog_timeout)")
+    parser.add_argument("--settings", default="config/settings.json")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m headless", description="LDPlayer automation without the GUI")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the start/facebook/scroll/close pipeline")
+    run.add_argument("--lds", type=parse_ld_names, help="LD names or ranges, e.g. USN-1..USN-40,USN-45 "
+                                                         "(default: selected_lds from the schedule settings)")
+    add_run_options(run)
+    run.add_argument("--schedule", default="config/setting_schedule.json")
+    run.add_argument("--resume", action="store_true",
+                     help="Continue the last interrupted run from the journal, skipping finished LDs and stages")
+    run.add_argument("--dry-run", action="store_true", help="Resolve LDs and settings, then exit")
+    run.set_defaults(func=cmd_run)
+
+    scheduled = sub.add_parser("schedule", help="Start runs on the named schedules from the schedule settings")
+    add_run_options(scheduled)
+    scheduled.add_argument("--schedule", default="config/setting_schedule.json")
+    scheduled.add_argument("--preview", type=int, metavar="N", help="Print the next N runs and exit")
+    scheduled.set_defaults(func=cmd_schedule)
+
+    coordinate = sub.add_parser("coordinate", help="Hand LD jobs to workers on other hosts")
+    coordinate.add_argument("--lds", type=parse_ld_names, help="LD names or ranges (default: selected_lds from the schedule settings)")
+    coordinate.add_argument("--listen", default="127.0.0.1",
+                            help="Address to listen on; anything but localhost needs --token")
+    coordinate.add_argument("--token", help="Shared secret workers must present (default: LDAUTO_TOKEN)")
+    coordinate.add_argument("--port", type=int, default=7700)
+    coordinate.add_argument("--max-attempts", type=int, default=3, help="Tries per LD before giving up")
+    coordinate.add_argument("--worker-timeout", type=float, default=15, help="Seconds of silence before a worker is dropped")
+    coordinate.add_argument("--schedule", default="config/setting_schedule.json")
+    coordinate.set_defaults(func=cmd_coordinate)
+
+    worker = sub.add_parser("worker", help="Run LD jobs from a coordinator on this host's LDs")
+    worker.add_argument("--coordinator", type=parse_address, required=True, help="Coordinator HOST:PORT")
+    worker.add_argument("--id", help="Worker name (default: host name)")
+    worker.add_argument("--token", help="The coordinator's shared secret (default: LDAUTO_TOKEN)")
+    worker.add_argument("--lds", type=parse_ld_names, help="LDs this host offers (default: all of them)")
+    add_run_options(worker)
+    worker.set_defaults(func=cmd_worker)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    def on_sigterm(signum, frame):
+        raise KeyboardInterrupt
+
+    # Service managers stop us with SIGTERM; treat it like Ctrl+C so LDs get closed
+    signal.signal(signal.SIGTERM, on_sigterm)
+    try:
+        return args.func(args)
+    finally:
+        if _log_pipeline:
+            _log_pipeline.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+INVENTORY_CACHE_PATH = os.path.join("./config", "inventory_cache.json")
+REFRESH_INTERVAL = 300  # seconds between background re-reads of the LDPlayer list
+
+
+def serial_for_index(index):
+    return f"emulator-{5554 + (int(index) * 2)}"
+
+
+class EmulatorInventory:
+    """Single name->emulator / name->serial index shared by the GUI and every run.
+
+    The serial map is served from an on-disk cache right away; the LDPlayer inventory is
+    (re)built in the background and only the differences are applied and announced. Nothing
+    blocks until a lookup needs an LD the cache does not know.
+    """
+
+    def __init__(self, ld_dir, cache_path=INVENTORY_CACHE_PATH, ld_factory=None):
+        self.ld_dir = ld_dir
+        self.cache_path = cache_path
+        self.ld_factory = ld_factory
+        self.ld = None
+        self.emulators = {}
+        self.name_to_serial = {}
+        self.name_to_index = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._listeners = []
+        self._refresh_thread = None
+        self._auto_refresh = None  # set to stop the periodic refresh
+        self.load_cache()
+
+    def _create_ld(self):
+        if self.ld_factory:
+            return self.ld_factory(self.ld_dir)
+        import emulator
+        return emulator.LDPlayer(self.ld_dir)
+
+    def load_cache(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                cache = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        if cache.get("ld_dir") != self.ld_dir:
+            return False
+        with self._lock:
+            for entry in cache.get("emulators", []):
+                self.name_to_serial[entry["name"]] = entry["serial"]
+                self.name_to_index[entry["name"]] = entry["index"]
+        return True
+
+    def save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        with self._lock:
+            entries = [{"name": name, "index": self.name_to_index.get(name), "serial": serial}
+                       for name, serial in self.name_to_serial.items()]
+        cache = {"ld_dir": self.ld_dir, "saved": datetime.now().isoformat(), "emulators": entries}
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, self.cache_path)
+
+    def subscribe(self, callback):
+        """Register callback(added, removed, changed) with lists of LD names"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def refresh(self):
+        """Re-read the LDPlayer list and apply only what changed; emulators whose index is unchanged
+        keep their objects"""
+        with self._refresh_lock:
+            # The emulator package only lists LDs when an LDPlayer is built
+            ld = self._create_ld()
+            emus = ld.emulators.values() if isinstance(ld.emulators, dict) else ld.emulators
+            emulators, serials, indexes = {}, {}, {}
+            for emu in emus:
+                try:
+                    index = int(getattr(emu, "index", 0))
+                    emulators[emu.name] = emu
+                    serials[emu.name] = serial_for_index(index)
+                    indexes[emu.name] = index
+                except Exception as e:
+                    print(f"Error mapping serial for {emu.name}: {str(e)}")
+
+            with self._lock:
+                old_serials = self.name_to_serial
+                added = [name for name in serials if name not in old_serials]
+                removed = [name for name in old_serials if name not in serials]
+                changed = [name for name in serials if name in old_serials and old_serials[name] != serials[name]]
+                if self.ld is None or added or removed or changed:
+                    # New dicts rather than in-place updates, so readers iterating the old ones are safe
+                    kept = {name: emu for name, emu in self.emulators.items()
+                            if name in emulators and name not in changed}
+                    self.emulators = {name: kept.get(name, emu) for name, emu in emulators.items()}
+                    self.name_to_serial = serials
+                    self.name_to_index = indexes
+                self.ld = self.ld or ld
+                listeners = list(self._listeners)
+            self._loaded.set()
+
+        if added or removed or changed or not os.path.exists(self.cache_path):
+            try:
+                self.save_cache()
+            except OSError as e:
+                print(f"Error saving inventory cache: {str(e)}")
+        if added or removed or changed:
+            for callback in listeners:
+                try:
+                    callback(added, removed, changed)
+                except Exception as e:
+                    print(f"Inventory listener error: {str(e)}")
+        return added, removed, changed
+
+    def refresh_async(self):
+        with self._lock:
+            if self._refresh_thread and self._refresh_thread.is_alive():
+                return self._refresh_thread
+
+            def target():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Error loading LDPlayer inventory: {str(e)}")
+                    self._loaded.set()
+
+            self._refresh_thread = threading.Thread(target=target, name="inventory-refresh", daemon=True)
+            self._refresh_thread.start()
+            return self._refresh_thread
+
+    def start_auto_refresh(self, interval=REFRESH_INTERVAL):
+        """Refresh now, then every interval seconds in the background until stop_auto_refresh()"""
+        with self._lock:
+            if self._auto_refresh:
+                return
+            stop = self._auto_refresh = threading.Event()
+
+        def loop():
+            while True:
+                self.refresh_async().join()
+                if stop.wait(interval):
+                    return
+
+        threading.Thread(target=loop, name="inventory-auto-refresh", daemon=True).start()
+
+    def stop_auto_refresh(self):
+        with self._lock:
+            stop, self._auto_refresh = self._auto_refresh, None
+        if stop:
+            stop.set()
+
+    def ensure_loaded(self, timeout=120):
+        if not self._loaded.is_set():
+            self.refresh_async()
+            self._loaded.wait(timeout)
+        return self.ld is not None
+
+    def get(self, name):
+        emu = self.emulators.get(name)
+        if emu is None and not self._loaded.is_set():
+            # Serial maybe known from the cache, LDPlayer not listed yet
+            self.ensure_loaded()
+            emu = self.emulators.get(name)
+        return emu
+
+    def serial(self, name):
+        serial = self.name_to_serial.get(name)
+        if serial is None and not self._loaded.is_set():
+            self.ensure_loaded()
+            serial = self.name_to_serial.get(name)
+        return serial
+
+    def known(self, names):
+        """The names this inventory has, in order; waits for the LDPlayer list only if the cache lacks one"""
+        if any(name not in self.name_to_serial for name in names):
+            self.ensure_loaded()
+        return [name for name in names if name in self.name_to_serial]
+
+
+_inventories = {}
+_inventories_lock = threading.Lock()
+
+
+def get_inventory(ld_dir):
+    """Shared inventory for ld_dir: cached serials immediately, LDPlayer listed and kept up to date
+    in the background"""
+    with _inventories_lock:
+        inventory = _inventories.get(ld_dir)
+        if inventory is None:
+            inventory = _inventories[ld_dir] = EmulatorInventory(ld_dir)
+            inventory.start_auto_refresh()
+        return inventory
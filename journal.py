@@ -0,0 +1,139 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+JOURNAL_PATH = os.path.join("./config", "run_journal.jsonl")
+
+
+class RunJournal:
+    """Append-only JSONL record of runs and per-LD stage completion.
+
+    Records are written by a background thread that fsyncs once per batch (at most every
+    sync_interval seconds), so a crash loses at most that window. Old runs are compacted away
+    when the file grows past max_bytes.
+    """
+
+    def __init__(self, path=JOURNAL_PATH, sync_interval=1.0, keep_runs=7, max_bytes=1024 * 1024):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.keep_runs = keep_runs
+        self.max_bytes = max_bytes
+        self.run_id = None
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        self._closed = threading.Event()
+
+    def _append(self, record):
+        record["ts"] = datetime.now().isoformat(timespec="milliseconds")
+        self._queue.put(json.dumps(record, ensure_ascii=False) + "\n")
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="run-journal", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                try:
+                    lines = [self._queue.get(timeout=0.5)]
+                except queue.Empty:
+                    if self._closed.is_set():
+                        return
+                    continue
+                # Batch everything queued since the last sync into one write and one fsync
+                while True:
+                    try:
+                        lines.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                f.write("".join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+                if not self._closed.is_set():
+                    self._closed.wait(self.sync_interval)
+
+    def begin_run(self, names, stages):
+        self.compact()
+        self.run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self._append({"run": self.run_id, "event": "start", "lds": list(names), "stages": list(stages)})
+        return self.run_id
+
+    def add_lds(self, names):
+        """LDs that joined the run while it was going (e.g. from an overlapping schedule)"""
+        self._append({"run": self.run_id, "event": "add", "lds": list(names)})
+
+    def continue_run(self, run_id):
+        self.run_id = run_id
+        self._append({"run": run_id, "event": "resume"})
+
+    def record_stage(self, name, stage, seconds):
+        self._append({"run": self.run_id, "event": "stage", "ld": name, "stage": stage, "seconds": round(seconds, 3)})
+
+    def end_run(self, completed):
+        self._append({"run": self.run_id, "event": "end", "completed": bool(completed)})
+
+    def close(self):
+        """Flush and fsync everything recorded so far"""
+        self._closed.set()
+        if self._writer:
+            self._writer.join(timeout=10)
+            self._writer = None
+        self._closed.clear()
+
+    def read(self):
+        records = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        pass  # torn last line after a crash
+        except FileNotFoundError:
+            pass
+        return records
+
+    def unfinished_run(self):
+        """The last run if it never recorded a completed end: {run, lds, stages, done: {ld: [stages]}}, or None"""
+        runs = {}
+        last = None
+        for record in self.read():
+            run_id = record.get("run")
+            if record.get("event") == "start":
+                runs[run_id] = {"run": run_id, "lds": record.get("lds", []), "stages": record.get("stages", []),
+                                "done": {}, "completed": False}
+                last = run_id
+            elif run_id in runs:
+                if record.get("event") == "add":
+                    runs[run_id]["lds"].extend(name for name in record.get("lds", []) if name not in runs[run_id]["lds"])
+                elif record.get("event") == "stage":
+                    runs[run_id]["done"].setdefault(record["ld"], []).append(record["stage"])
+                elif record.get("event") == "end":
+                    runs[run_id]["completed"] = record.get("completed", False)
+        run = runs.get(last)
+        return run if run and not run["completed"] else None
+
+    def compact(self):
+        """Keep only the last keep_runs runs once the journal is larger than max_bytes"""
+        try:
+            if os.path.getsize(self.path) <= self.max_bytes:
+                return False
+        except OSError:
+            return False
+        self.close()
+        records = self.read()
+        run_order = [record["run"] for record in records if record.get("event") == "start"]
+        keep = set(run_order[-self.keep_runs:])
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                if record.get("run") in keep:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        return True
@@ -0,0 +1,205 @@
+from tkinter import ttk
+
+CHECKED = 1
+ACTIVE = 2
+PAUSED = 4
+SCHEDULED = 8
+
+
+class LDTableModel:
+    """Row state for the LD table in flat arrays: names/serials lists plus one flag byte per row.
+
+    Mutators return nothing and notify listeners with the row indexes that actually changed,
+    so the view only touches those rows.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.serials = []
+        self.flags = bytearray()
+        self.row_of_name = {}
+        self.row_of_serial = {}
+        self._listeners = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def subscribe(self, callback):
+        """callback(rows) with changed row indexes, or callback(None) after a structural change"""
+        self._listeners.append(callback)
+
+    def _notify(self, rows):
+        if rows is None or rows:
+            for callback in self._listeners:
+                callback(rows)
+
+    def _reindex(self):
+        self.row_of_name = {name: row for row, name in enumerate(self.names)}
+        self.row_of_serial = {serial: row for row, serial in enumerate(self.serials)}
+
+    def set_rows(self, rows):
+        """Replace every row with (name, serial, flags) tuples"""
+        self.names = [row[0] for row in rows]
+        self.serials = [row[1] for row in rows]
+        self.flags = bytearray(row[2] for row in rows)
+        self._reindex()
+        self._notify(None)
+
+    def add(self, name, serial, flags=0):
+        row = len(self.names)
+        self.names.append(name)
+        self.serials.append(serial)
+        self.flags.append(flags)
+        self.row_of_name[name] = row
+        self.row_of_serial[serial] = row
+        self._notify(None)
+        return row
+
+    def remove(self, names):
+        drop = {self.row_of_name[name] for name in names if name in self.row_of_name}
+        if not drop:
+            return
+        keep = [row for row in range(len(self.names)) if row not in drop]
+        self.names = [self.names[row] for row in keep]
+        self.serials = [self.serials[row] for row in keep]
+        self.flags = bytearray(self.flags[row] for row in keep)
+        self._reindex()
+        self._notify(None)
+
+    def has(self, row, flag):
+        return bool(self.flags[row] & flag)
+
+    def set_flag(self, rows, flag, value):
+        changed = []
+        for row in rows:
+            old = self.flags[row]
+            new = old | flag if value else old & ~flag
+            if new != old:
+                self.flags[row] = new
+                changed.append(row)
+        self._notify(changed)
+
+    def set_all(self, flag, value):
+        self.set_flag(range(len(self.flags)), flag, value)
+
+    def toggle(self, row, flag):
+        self.set_flag([row], flag, not self.has(row, flag))
+
+    def rows_with(self, flag):
+        return [row for row, bits in enumerate(self.flags) if bits & flag]
+
+    def checked_names(self):
+        return [self.names[row] for row in self.rows_with(CHECKED)]
+
+    def check_names(self, names, value=True):
+        self.set_flag([self.row_of_name[name] for name in names if name in self.row_of_name], CHECKED, value)
+
+
+class VirtualLDTable(ttk.Frame):
+    """Treeview that only holds items for the rows on screen and renders them from an LDTableModel"""
+
+    def __init__(self, master, model, row_height=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.model = model
+        self.row_height = row_height or int(ttk.Style(self).lookup("Treeview", "rowheight") or 20)
+        self.top = 0
+        self.slots = []
+        self.slot_state = []
+
+        self.tree = ttk.Treeview(self, columns=("name", "serial", "status"), show="headings", selectmode="none", height=15)
+        self.tree.heading("name", text="LD Name", anchor="w")
+        self.tree.column("name", width=150, anchor="w")
+        self.tree.heading("serial", text="ADB Serial", anchor="w")
+        self.tree.column("serial", width=120, anchor="w")
+        self.tree.heading("status", text="Status", anchor="w")
+        self.tree.column("status", width=80, anchor="w")
+        self.tree.tag_configure("checked", background="#e1f5fe")
+        self.tree.tag_configure("unchecked", background="white")
+        self.tree.tag_configure("active", foreground="green")
+        self.tree.tag_configure("inactive", foreground="red")
+        self.tree.tag_configure("paused", foreground="orange")
+        self.tree.tag_configure("scheduled", foreground="blue")
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(fill="both", expand=True, padx=1, pady=1)
+
+        self.tree.bind("<Double-1>", self._on_double_click)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(1, "units"))
+        self.tree.bind("<Configure>", self._on_resize)
+
+        model.subscribe(self._on_model_changed)
+        self._set_slot_count(15)
+
+    def _set_slot_count(self, count):
+        count = max(1, count)
+        while len(self.slots) < count:
+            self.slots.append(self.tree.insert("", "end", values=("", "", "")))
+            self.slot_state.append(None)
+        while len(self.slots) > count:
+            self.tree.delete(self.slots.pop())
+            self.slot_state.pop()
+        self.render()
+
+    def _on_resize(self, event):
+        # Heading takes about one row; keep exactly as many items as fit on screen
+        count = max(1, event.height // self.row_height - 1)
+        if count != len(self.slots):
+            self._set_slot_count(count)
+
+    def _row_state(self, row):
+        bits = self.model.flags[row]
+        tags = ["checked" if bits & CHECKED else "unchecked", "active" if bits & ACTIVE else "inactive"]
+        if bits & PAUSED:
+            tags.append("paused")
+        if bits & SCHEDULED:
+            tags.append("scheduled")
+        status = "Active" if bits & ACTIVE else "Inactive"
+        return (self.model.names[row], self.model.serials[row], status), tuple(tags)
+
+    def _render_slot(self, slot):
+        row = self.top + slot
+        state = self._row_state(row) if row < len(self.model) else (("", "", ""), ())
+        if self.slot_state[slot] != state:
+            self.slot_state[slot] = state
+            self.tree.item(self.slots[slot], values=state[0], tags=state[1])
+
+    def render(self):
+        self.top = max(0, min(self.top, len(self.model) - len(self.slots)))
+        for slot in range(len(self.slots)):
+            self._render_slot(slot)
+        total = len(self.model)
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + len(self.slots)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_model_changed(self, rows):
+        if rows is None:
+            self.render()
+            return
+        for row in rows:
+            slot = row - self.top
+            if 0 <= slot < len(self.slots):
+                self._render_slot(slot)
+
+    def scroll(self, amount, what="units"):
+        step = len(self.slots) if what == "pages" else 1
+        self.top += int(amount) * step
+        self.render()
+
+    def _on_scrollbar(self, action, value, what=None):
+        if action == "moveto":
+            self.top = int(float(value) * len(self.model))
+            self.render()
+        elif action == "scroll":
+            self.scroll(value, what)
+
+    def _on_double_click(self, event):
+        item = self.tree.identify_row(event.y)
+        if item in self.slots:
+            row = self.top + self.slots.index(item)
+            if row < len(self.model):
+                self.model.toggle(row, CHECKED)
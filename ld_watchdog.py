@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+from device_actor import find_device_actor
+
+
+class Watchdog:
+    """Heartbeats for the LDs in flight, and recovery for the ones that stop answering.
+
+    Every adb command that succeeds on an LD is a heartbeat. An LD that has had no heartbeat for
+    `interval` seconds is probed directly (not through its command queue, where a hung command would
+    block the probe). Once it has gone `timeout` seconds without a heartbeat and the probe still fails,
+    recover(name, task) is awaited; timeout 0 turns recovery off. A command stuck in the LD's queue for
+    `timeout` seconds counts as silence even while the probe answers, since getprop still works on a
+    device whose framework is frozen. Only LDs that answered at least once are judged, so a slow boot is
+    left to the start stage's own readiness timeout.
+    """
+
+    def __init__(self, em, timeout=120, interval=10, probe_timeout=10, paused=None, log_func=print):
+        self.em = em
+        self.timeout = timeout
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        self.paused = paused or (lambda: False)
+        self.log = log_func
+        self.tasks = {}  # name -> the asyncio task running the LD
+        self.last_beat = {}  # name -> monotonic time of the last successful adb command
+        self.latency = {}  # name -> seconds the last probe took
+        self._names = {}  # serial -> name
+
+    def watch(self, name, task):
+        self.tasks[name] = task
+        self.last_beat.pop(name, None)
+        serial = self.em.name_to_serial.get(name)
+        if serial:
+            self._names[serial] = name
+
+    def unwatch(self, name, task=None):
+        if task is not None and self.tasks.get(name) is not task:
+            return  # already replaced by a restart
+        self.tasks.pop(name, None)
+        self.last_beat.pop(name, None)
+
+    def beat(self, serial):
+        name = self._names.get(serial)
+        if name in self.tasks:
+            self.last_beat[name] = time.monotonic()
+
+    def silent_for(self, name):
+        """Seconds since the last heartbeat or, if longer, since the LD's running command was sent"""
+        last = self.last_beat.get(name)
+        if last is None:
+            return None
+        return max(time.monotonic() - last, self.busy_for(self.em.name_to_serial.get(name)))
+
+    def busy_for(self, serial):
+        actor = find_device_actor(serial) if serial else None
+        return actor.busy_for() if actor else 0.0
+
+    async def probe(self, name):
+        """Seconds a trivial command took on the device, or None when it did not answer in time"""
+        serial = self.em.name_to_serial.get(name)
+        if not serial or not await asyncio.to_thread(self.em.devices.is_present, serial):
+            return None
+        if self.timeout and self.busy_for(serial) >= self.timeout:
+            return None  # answers probes but its last command never came back
+        started = time.monotonic()
+        try:
+            output = await asyncio.wait_for(
+                self.em._adb_shell_raw(serial, ["getprop", "sys.boot_completed"]), self.probe_timeout)
+        except asyncio.TimeoutError:
+            return None
+        except Exception:
+            return None
+        if output.strip() != "1":
+            return None
+        self.latency[name] = time.monotonic() - started
+        self.beat(serial)
+        return self.latency[name]
+
+    async def check(self, recover):
+        """One pass over the LDs in flight; returns the names handed to recover"""
+        if self.paused():
+            # Nothing is sent while paused; don't count that as silence
+            now = time.monotonic()
+            for name in self.last_beat:
+                self.last_beat[name] = now
+            return []
+        stale = [name for name in list(self.tasks) if (self.silent_for(name) or 0) >= self.interval]
+        if not stale:
+            return []
+        latencies = await asyncio.gather(*(self.probe(name) for name in stale))
+        recovered = []
+        for name, latency in zip(stale, latencies):
+            silent = self.silent_for(name)
+            if latency is not None or silent is None or not self.timeout or silent < self.timeout:
+                continue
+            self.log(f"LD {name} has not answered for {silent:.0f}s, recovering it")
+            recovered.append((name, self.tasks.pop(name)))
+            self.last_beat.pop(name, None)
+        await asyncio.gather(*(recover(name, task) for name, task in recovered))
+        return [name for name, _ in recovered]
+
+    async def run(self, recover):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check(recover)
+            except Exception as e:
+                self.log(f"Error in LD watchdog: {str(e)}")
@@ -0,0 +1,95 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
+from collections import deque, namedtuple
+from datetime import datetime
+
+LOG_PATH = os.path.join("./logs", "automation.jsonl")
+
+LogEntry = namedtuple("LogEntry", ["timestamp", "message", "ld", "level"])
+
+
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps({
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "ld": getattr(record, "ld", None),
+            "message": record.getMessage()
+        }, ensure_ascii=False)
+
+
+class LogPipeline:
+    """Thread-safe log sink: bounded ring buffers (all lines and per LD), a pending batch for the
+    GUI to flush at its own pace, and a rotating JSONL file written by a background thread"""
+
+    def __init__(self, max_lines=100, per_ld_lines=200, log_path=LOG_PATH, max_bytes=5 * 1024 * 1024, backup_count=5):
+        self.lines = deque(maxlen=max_lines)
+        self.per_ld = {}
+        self.per_ld_lines = per_ld_lines
+        self._pending = deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+        self._ld_pattern = None
+        self._listener = None
+        self._logger = None
+        if log_path:
+            self._start_file_writer(log_path, max_bytes, backup_count)
+
+    def _start_file_writer(self, log_path, max_bytes, backup_count):
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        handler.setFormatter(JsonLineFormatter())
+        log_queue = queue.SimpleQueue()
+        self._listener = logging.handlers.QueueListener(log_queue, handler)
+        self._listener.start()
+        self._logger = logging.getLogger(f"ldauto.{id(self)}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    def set_ld_names(self, names):
+        """LD names to recognise in messages so each line lands in its LD's view"""
+        names = sorted(set(names), key=len, reverse=True)
+        pattern = re.compile(r"(?<![\w-])(" + "|".join(map(re.escape, names)) + r")(?![\w-])") if names else None
+        with self._lock:
+            self._ld_pattern = pattern
+
+    def emit(self, message, ld=None, level="info"):
+        if ld is None and self._ld_pattern is not None:
+            match = self._ld_pattern.search(message)
+            ld = match.group(1) if match else None
+        entry = LogEntry(datetime.now(), message, ld, level)
+        with self._lock:
+            self.lines.append(entry)
+            self._pending.append(entry)
+            if ld is not None:
+                view = self.per_ld.get(ld)
+                if view is None:
+                    view = self.per_ld[ld] = deque(maxlen=self.per_ld_lines)
+                view.append(entry)
+        if self._logger:
+            self._logger.log(logging.ERROR if level == "error" else logging.INFO, message, extra={"ld": ld})
+
+    def drain(self):
+        """Entries logged since the last drain, oldest first"""
+        with self._lock:
+            entries = list(self._pending)
+            self._pending.clear()
+        return entries
+
+    def view(self, ld=None):
+        with self._lock:
+            return list(self.lines if ld is None else self.per_ld.get(ld, ()))
+
+    @staticmethod
+    def format(entry):
+        return f"[{entry.timestamp.strftime('%Y-%m-%d %H:%M:%S')}] {entry.message}\n"
+
+    def close(self):
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
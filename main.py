@@ -9,272 +9,22 @@ from tkinter.scrolledtext import ScrolledText
 from datetime import datetime
 import json
 import time
-import schedule
 from pathlib import Path
-import subprocess
-import shutil
-import psutil
-import random
-import emulator
-from emulator import LDPlayer
+from admission import AdmissionController
+from automation import ControlEmulator, MainWindow
+from engine import EngineBridge
+from headless import parse_ld_names
+from journal import RunJournal
+from timer_engine import NamedSchedule, TimerEngine
+from warm_pool import WarmPool
+from log_pipeline import LogPipeline
+from settings import SETTINGS_PATH, RuntimeSettings
+from ld_table import ACTIVE, CHECKED, PAUSED, SCHEDULED, LDTableModel, VirtualLDTable
 
 # Add the parent directory to the Python path
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-class ControlEmulator:
-    def __init__(self):
-        self.ld_dir = r"C:\LDPlayer\LDPlayer9"
-        self.ld = emulator.LDPlayer(self.ld_dir)
-        self.em = self.ld.emulators
-        self.list_thread = self.ld.emulators
-        self.fb = "com.facebook.katana"
-        self.name_to_serial = {}
-        self.boot_delay = 20
-        self.task_delay = 10
-        self.start_delay = 10
-        self.close_delay = 15
-        self._build_serial_mapping()
-
-    def _build_serial_mapping(self):
-        for emu in self.em.values() if isinstance(self.em, dict) else self.em:
-            try:
-                index = int(getattr(emu, "index", 0))
-                serial = f"emulator-{5554 + (index * 2)}"
-                self.name_to_serial[emu.name] = serial
-            except Exception as e:
-                print(f"Error mapping serial for {emu.name}: {str(e)}")
-
-    def is_ld_running(self, name):
-        try:
-            result = subprocess.run(["adb", "devices"], capture_output=True, text=True)
-            serial = self.name_to_serial.get(name)
-            return serial and serial in result.stdout
-        except Exception:
-            return False
-
-    def _connect_adb(self, serial):
-        adb_path = shutil.which("adb")
-        if not adb_path:
-            possible_paths = [
-                r"C:\LDPlayer\LDPlayer4.0\adb.exe",
-                r"C:\Program Files\LDPlayer\LDPlayer4.0\adb.exe",
-                r"C:\Program Files (x86)\LDPlayer\LDPlayer4.0\adb.exe"
-            ]
-            adb_path = next((p for p in possible_paths if os.path.exists(p)), None)
-        
-        if not adb_path:
-            raise FileNotFoundError("ADB executable not found. Please install LDPlayer or add adb to PATH.")
-
-        subprocess.run([adb_path, "connect", serial], check=True)
-
-    def start_ld(self, name, delay_between_starts=10):
-        try:
-            for emu in self.em.values() if isinstance(self.em, dict) else self.em:
-                if emu.name == name:
-                    emu.start()
-                    time.sleep(5)
-                    print(f"LD {name} started.")
-                    time.sleep(delay_between_starts)
-                    
-                    # Arrange LD windows in rows after starting
-                    self.sort_window_ld()
-                    return
-            print(f"No LD found with name {name}")
-        except Exception as e:
-            print(f"Error starting LD {name}: {e}")
-
-    def quit_ld(self, name):
-        try:
-            for emu in self.em.values() if isinstance(self.em, dict) else self.em:
-                if emu.name == name:
-                    emu.quit()
-                    return
-            print(f"No LD found with name {name}")
-        except Exception as e:
-            print(f"Error quitting LD {name}: {e}")
-
-    def sort_window_ld(self):
-        self.ld.sort_window()
-
-    def open_facebook(self, name):
-        serial = self.name_to_serial.get(name, name)
-        if not serial:
-            print(f"No serial found for {name}")
-            return
-
-        self._connect_adb(serial)
-        subprocess.run(["adb", "-s", serial, "shell", "input", "keyevent", "82"], check=False)
-
-        try:
-            subprocess.run([
-                "adb", "-s", serial, "shell", "monkey",
-                "-p", self.fb,
-                "-c", "android.intent.category.LAUNCHER", "1"
-            ], check=True)
-            print(f"Facebook app launched on LD {name}")
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to launch Facebook on LD {name}: {e}")
-            print(f"Ensure that the emulator with serial {serial} is running and connected to ADB.")
-
-    def scroll_facebook(self, name, duration_sec=900, pause_event=None, running_flag=None):
-        serial = self.name_to_serial.get(name, name)
-        if not serial:
-            print(f"No serial found for {name}")
-            return
-
-        self._connect_adb(serial)
-        start_time = time.time()
-        
-        try:
-            while time.time() - start_time < duration_sec:
-                if running_flag and not running_flag():
-                    break
-                if pause_event and not pause_event.is_set():
-                    time.sleep(0.5)
-                    continue
-                
-                # Adjusted values for smoother scrolling
-                scroll_duration = random.uniform(400, 600)  # Swipe duration in ms
-                start_y = random.randint(800, 900)         # Start Y-coordinate
-                end_y = random.randint(500, 600)           # End Y-coordinate
-                
-                subprocess.run([
-                    "adb", "-s", serial,
-                    "shell", "input", "swipe", 
-                    "300", str(start_y), 
-                    "300", str(end_y), 
-                    str(int(scroll_duration))
-                ], check=True)
-                
-                # Shorter and more consistent delay between swipes
-                time.sleep(random.uniform(1.5, 2.5))
-                
-        except Exception as e:
-            print(f"Error scrolling on {name}: {str(e)}")
-
-    def is_emulator_connected(self, serial):
-        result = subprocess.run(["adb", "devices"], capture_output=True, text=True)
-        return serial in result.stdout
-
-    def ld_task(self, name):
-        serial = self.name_to_serial.get(name)
-        if not self.is_emulator_connected(serial):
-            return
-
-class MainWindow():
-    def __init__(self, selected_ld_names, running_flag, ld_thread, log_func=print, start_same_time=False):
-        self.em = ControlEmulator()
-        self.thread_ld = [name for name in selected_ld_names if name in self.em.name_to_serial]
-        self.log = log_func
-        self.running_flag = running_flag
-        self.ld_thread = ld_thread
-        self.scroll_duration = 0
-        self.start_same_time = start_same_time
-        self.pause_event = threading.Event()
-        self.pause_event.set()  # Start unpaused
-
-    def check_paused(self):
-        """Check if operations should be paused - blocks if paused"""
-        while not self.pause_event.is_set() and self.running_flag():
-            time.sleep(0.5)
-        return not self.running_flag()
-
-    def ld_task_stage(self, name, stage):
-        if not self.running_flag():
-            return
-        
-        if self.check_paused():
-            return
-        
-        if stage == "start":
-            self.log(f"Starting LD: {name}")
-            self.em.start_ld(name, delay_between_starts=self.em.boot_delay)
-            time.sleep(self.em.boot_delay)
-        elif stage == "facebook":
-            self.log(f"Opening Facebook on LD: {name}")
-            self.em.open_facebook(name)
-        elif stage == "scroll":
-            self.log(f"Scrolling Facebook on LD: {name} for {self.scroll_duration // 60} minutes")
-            self.em.scroll_facebook(name, duration_sec=self.scroll_duration, 
-                                   pause_event=self.pause_event, running_flag=self.running_flag)
-        elif stage == "close":
-            self.log(f"Closing LD: {name}")
-            time.sleep(self.em.close_delay)
-            self.em.quit_ld(name)
-
-    def main(self):
-        total = len(self.thread_ld)
-        self.log(f"Total LDs to process: {total}")
-
-        for batch_start in range(0, total, self.ld_thread):
-            if not self.running_flag():
-                break
-
-            batch = self.thread_ld[batch_start:batch_start + self.ld_thread]
-            self.log(f"Processing batch: {batch}")
-
-            for stage in ["start", "facebook", "scroll", "close"]:
-                if not self.running_flag():
-                    break
-
-                self.log(f"Stage: {stage.capitalize()}")
-                
-                if stage == "start" and not self.start_same_time:
-                    for name in batch:
-                        if not self.running_flag():
-                            break
-                        self.ld_task_stage(name, stage)
-                        time.sleep(self.em.start_delay)
-                else:
-                    threads = []
-                    for name in batch:
-                        if not self.running_flag():
-                            break
-                        t = threading.Thread(target=self.ld_task_stage, args=(name, stage))
-                        t.daemon = True
-                        t.start()
-                        threads.append(t)
-                    
-                    for t in threads:
-                        t.join(timeout=300)  # 5 minute timeout
-
-class CheckboxTreeview(ttk.Treeview):
-    def __init__(self, master=None, **kwargs):
-        super().__init__(master, **kwargs)
-        self.checkboxes = {}
-        self.tag_configure("checked", background="#e1f5fe")
-        self.tag_configure("unchecked", background="white")
-        self.tag_configure("active", foreground="green")
-        self.tag_configure("inactive", foreground="red")
-        self.tag_configure("paused", foreground="orange")
-        self.tag_configure("scheduled", foreground="blue")
-        self.bind("<Double-1>", self._on_double_click)
-        
-    def insert(self, parent, index, iid=None, **kwargs):
-        item = super().insert(parent, index, iid, **kwargs)
-        self.checkboxes[item] = False
-        values = kwargs.get('values', [])
-        status = values[2] if len(values) > 2 else "Inactive"
-        tags = ("unchecked", "active") if status == "Active" else ("unchecked", "inactive")
-        self.item(item, tags=tags)
-        return item
-        
-    def _on_double_click(self, event):
-        item = self.identify_row(event.y)
-        if item:
-            self.toggle_checkbox(item)
-            
-    def toggle_checkbox(self, item):
-        self.checkboxes[item] = not self.checkboxes[item]
-        current_tags = list(self.item(item, "tags"))
-        new_tags = [t for t in current_tags if t not in ("checked", "unchecked")]
-        new_tags.append("checked" if self.checkboxes[item] else "unchecked")
-        self.item(item, tags=new_tags)
-            
-    def get_checked_items(self):
-        return [item for item, checked in self.checkboxes.items() if checked]
-
 class LDManagerApp:
     def __init__(self, root):
         self.root = root
@@ -284,11 +34,16 @@ class LDManagerApp:
         self.root.grid_columnconfigure(0, weight=1)
         self.root.grid_rowconfigure(0, weight=1)
 
+        self.log_pipeline = LogPipeline(max_lines=100)
+        self.log_flush_ms = 100  # widget updates capped at 10 per second
+        self.log_line_count = 0
         self.emulator = ControlEmulator()
         self.running_event = threading.Event()
         self.pause_event = threading.Event()
         self.pause_event.set()  # Start unpaused
-        self.schedule_thread = None
+        self.bridge = None
+        self.timer_engine = TimerEngine(on_due=self.on_schedule_due, log_func=self.log)
+        self.extra_schedules = []  # more named schedules from setting_schedule.json
         self.schedule_running = False
         self.schedule_settings_file = Path("./config/setting_schedule.json")
         
@@ -299,13 +54,40 @@ class LDManagerApp:
         self.start_delay = ttkb.IntVar(value=10)
         self.close_delay = ttkb.IntVar(value=15)
         self.scroll_duration = ttkb.IntVar(value=5)
+        self.scroll_mode = ttkb.StringVar(value="host")
         self.schedule_time = ttkb.StringVar(value="09:00")
         self.schedule_daily = ttkb.BooleanVar(value=True)
         self.start_same_time = ttkb.BooleanVar(value=False)
+        self.adaptive_parallel = ttkb.BooleanVar(value=False)
+        self.min_parallel = ttkb.IntVar(value=1)
+        self.warm_keep = ttkb.IntVar(value=0)
+        self.warm_memory_budget_mb = ttkb.IntVar(value=0)
+        self.status_interval = 2
+        self.status_ttl = 5
+        self.stage_settings = {}  # per-stage concurrency/timeout/retries, edited in settings.json
+        self.custom_stages = []
+        self.ld_model = LDTableModel()
+        self.saved_selected_lds = set()
         
         self.setup_ui()
+        self.flush_logs()
         self.load_settings()
+        # Shared with the running engine: edits in the settings panel apply mid-run and are saved right away
+        self.runtime = RuntimeSettings.load(SETTINGS_PATH)
+        self.runtime.update(self.collect_settings(), save=False)
+        self._settings_push = None
+        for var in (self.parallel_ld, self.min_parallel, self.boot_delay, self.task_delay, self.start_delay,
+                    self.close_delay, self.scroll_duration, self.scroll_mode, self.warm_keep, self.warm_memory_budget_mb):
+            var.trace_add("write", lambda *args: self.schedule_settings_push())
+        # LDs left running between runs and schedules; outlives every MainWindow
+        self.warm_pool = WarmPool(self.emulator, keep=self.warm_keep.get(),
+                                  memory_budget_mb=self.warm_memory_budget_mb.get(), log_func=self.log)
+        self.runtime.subscribe(lambda changes: self.warm_pool.configure(
+            keep=changes.get("warm_keep"), memory_budget_mb=changes.get("warm_memory_budget_mb")))
         self.load_schedule_settings()
+        self.emulator.inventory.subscribe(
+            lambda added, removed, changed: self.root.after(0, self.apply_inventory_changes, added, removed, changed)
+        )
         self.populate_ld_table()
         self.start_status_refresh()
 
@@ -343,23 +125,9 @@ class LDManagerApp:
         self.table_frame = ttkb.Frame(self.ld_frame, bootstyle="light")
         self.table_frame.pack(fill="both", expand=True)
 
-        columns = ("name", "serial", "status")
-        self.ld_table = CheckboxTreeview(self.table_frame, columns=columns, show="headings", selectmode="none", height=15)
-        
-        # Configure columns
-        self.ld_table.heading("name", text="LD Name", anchor="w")
-        self.ld_table.column("name", width=150, anchor="w")
-        
-        self.ld_table.heading("serial", text="ADB Serial", anchor="w")
-        self.ld_table.column("serial", width=120, anchor="w")
-        
-        self.ld_table.heading("status", text="Status", anchor="w")
-        self.ld_table.column("status", width=80, anchor="w")
-
-        scrollbar = ttkb.Scrollbar(self.table_frame, orient="vertical", command=self.ld_table.yview)
-        scrollbar.pack(side="right", fill="y")
-        self.ld_table.configure(yscrollcommand=scrollbar.set)
-        self.ld_table.pack(fill="both", expand=True, padx=1, pady=1)
+        # Only the visible rows exist as Treeview items; row state lives in self.ld_model
+        self.ld_table = VirtualLDTable(self.table_frame, self.ld_model)
+        self.ld_table.pack(fill="both", expand=True)
 
         # Right panel
         self.right_panel = ttkb.Frame(self.main_container)
@@ -413,8 +181,23 @@ class LDManagerApp:
         ttkb.Label(settings_grid, text="Start LDs Simultaneously:", bootstyle="dark").grid(row=3, column=0, padx=5, pady=5, sticky="w")
         ttkb.Checkbutton(settings_grid, variable=self.start_same_time, bootstyle="round-toggle").grid(row=3, column=1, padx=5, pady=5, sticky="w")
 
+        ttkb.Label(settings_grid, text="Adapt to Host Load:", bootstyle="dark").grid(row=3, column=2, padx=5, pady=5, sticky="w")
+        ttkb.Checkbutton(settings_grid, variable=self.adaptive_parallel, bootstyle="round-toggle").grid(row=3, column=3, padx=5, pady=5, sticky="w")
+
+        ttkb.Label(settings_grid, text="Min LDs in Parallel:", bootstyle="dark").grid(row=4, column=0, padx=5, pady=5, sticky="w")
+        ttkb.Entry(settings_grid, textvariable=self.min_parallel, width=5).grid(row=4, column=1, padx=5, pady=5, sticky="w")
+
+        ttkb.Label(settings_grid, text="Scroll Mode:", bootstyle="dark").grid(row=4, column=2, padx=5, pady=5, sticky="w")
+        ttkb.Combobox(settings_grid, textvariable=self.scroll_mode, values=["host", "agent"], state="readonly", width=7).grid(row=4, column=3, padx=5, pady=5, sticky="w")
+
+        ttkb.Label(settings_grid, text="Keep Warm LDs:", bootstyle="dark").grid(row=5, column=0, padx=5, pady=5, sticky="w")
+        ttkb.Entry(settings_grid, textvariable=self.warm_keep, width=5).grid(row=5, column=1, padx=5, pady=5, sticky="w")
+
+        ttkb.Label(settings_grid, text="Warm RAM Budget (MB):", bootstyle="dark").grid(row=5, column=2, padx=5, pady=5, sticky="w")
+        ttkb.Entry(settings_grid, textvariable=self.warm_memory_budget_mb, width=7).grid(row=5, column=3, padx=5, pady=5, sticky="w")
+
         self.progress = ttkb.Progressbar(settings_grid, orient="horizontal", mode="determinate", bootstyle="success-striped", length=400)
-        self.progress.grid(row=4, column=0, columnspan=4, sticky="ew", padx=5, pady=10)
+        self.progress.grid(row=6, column=0, columnspan=4, sticky="ew", padx=5, pady=10)
 
         # Schedule frame
         self.schedule_frame = ttkb.LabelFrame(self.right_panel, text="Task Scheduling", bootstyle="primary", padding=10)
@@ -431,6 +214,10 @@ class LDManagerApp:
         self.schedule_enable_btn = ttkb.Button(schedule_grid, text="Enable Schedule", command=self.toggle_schedule, bootstyle="info", width=15)
         self.schedule_enable_btn.grid(row=0, column=3, padx=5, pady=5, sticky="e")
 
+        self.next_run_label = ttkb.Label(schedule_grid, text="Next runs: schedule disabled", bootstyle="secondary",
+                                         justify="left")
+        self.next_run_label.grid(row=1, column=0, columnspan=4, padx=5, pady=(0, 5), sticky="w")
+
         # Control buttons
         self.control_frame = ttkb.Frame(self.right_panel)
         self.control_frame.pack(fill="x", pady=(0, 10))
@@ -444,10 +231,21 @@ class LDManagerApp:
         self.stop_button = ttkb.Button(self.control_frame, text="Stop Automation", command=self.stop_automation, state="disabled", bootstyle="danger", width=15)
         self.stop_button.pack(side="left", padx=5)
 
+        # Summary of the last run's performance report
+        self.report_frame = ttkb.LabelFrame(self.right_panel, text="Last Run", bootstyle="primary", padding=10)
+        self.report_frame.pack(fill="x", pady=(0, 10))
+        self.report_label = ttkb.Label(self.report_frame, text="No run yet", justify="left", font=('Consolas', 9))
+        self.report_label.pack(anchor="w")
+
         # Logs
         self.logs_frame = ttkb.LabelFrame(self.right_panel, text="Activity Log", bootstyle="primary", padding=10)
         self.logs_frame.pack(fill="both", expand=True)
 
+        self.log_filter = ttkb.StringVar(value="All LDs")
+        self.log_filter_box = ttkb.Combobox(self.logs_frame, textvariable=self.log_filter, values=["All LDs"], state="readonly", width=20)
+        self.log_filter_box.pack(anchor="e", pady=(0, 5))
+        self.log_filter_box.bind("<<ComboboxSelected>>", lambda event: self.show_log_view())
+
         self.logs_text = ScrolledText(self.logs_frame, state="disabled", wrap="word", height=10, font=('Consolas', 10), padx=10, pady=10)
         self.logs_text.pack(fill="both", expand=True)
 
@@ -458,115 +256,187 @@ class LDManagerApp:
     def toggle_pause(self):
         if self.pause_event.is_set():
             self.pause_event.clear()
+            if self.bridge:
+                self.bridge.pause()
             self.pause_button.config(text="Resume", bootstyle="info")
             self.log("Automation paused")
             
             # Update table to show paused status
-            for item in self.ld_table.get_children():
-                if self.ld_table.checkboxes[item]:
-                    tags = list(self.ld_table.item(item, "tags"))
-                    if "paused" not in tags:
-                        tags.append("paused")
-                    self.ld_table.item(item, tags=tags)
+            self.ld_model.set_flag(self.ld_model.rows_with(CHECKED), PAUSED, True)
         else:
             self.pause_event.set()
+            if self.bridge:
+                self.bridge.resume()
             self.pause_button.config(text="Pause", bootstyle="warning")
             self.log("Automation resumed")
             
             # Remove paused status from table
-            for item in self.ld_table.get_children():
-                tags = [t for t in self.ld_table.item(item, "tags") if t != "paused"]
-                self.ld_table.item(item, tags=tags)
+            self.ld_model.set_flag(self.ld_model.rows_with(PAUSED), PAUSED, False)
 
     def refresh_all(self):
-        """Refresh both the LD list and their statuses"""
-        self.emulator = ControlEmulator()
-        self.populate_ld_table()
-        self.log("Refreshed LD player list")
+        """Re-read the LD list in the background; only added/removed LDs touch the table"""
+        def refresh():
+            try:
+                self.emulator.inventory.refresh()
+                self.root.after(0, self.log, "Refreshed LD player list")
+            except Exception as e:
+                self.root.after(0, self.log, f"Error refreshing LD player list: {str(e)}")
+
+        threading.Thread(target=refresh, daemon=True).start()
 
     def populate_ld_table(self):
-        self.ld_table.delete(*self.ld_table.get_children())
         if not self.emulator.name_to_serial:
-            self.log("No available LDs found.")
+            self.ld_model.set_rows([])
+            self.log("Loading LD players..." if self.emulator.inventory.ld is None else "No available LDs found.")
             return
-            
-        for name, serial in self.emulator.name_to_serial.items():
-            status = "Active" if self.emulator.is_ld_running(name) else "Inactive"
-            self.ld_table.insert("", "end", values=(name, serial, status))
+
+        snapshot = self.emulator.devices.snapshot()
+        self.ld_model.set_rows([(name, serial, self.row_flags(name, serial, snapshot))
+                                for name, serial in self.emulator.name_to_serial.items()])
+        self.update_log_filters()
+
+    def row_flags(self, name, serial, snapshot):
+        flags = ACTIVE if serial in snapshot else 0
+        if name in self.saved_selected_lds:
+            flags |= CHECKED
+        return flags
+
+    def apply_inventory_changes(self, added, removed, changed):
+        snapshot = self.emulator.devices.snapshot()
+        # Keep the checkbox of an LD whose serial changed
+        checked = {name for name in changed if name in self.ld_model.row_of_name
+                   and self.ld_model.has(self.ld_model.row_of_name[name], CHECKED)}
+        self.ld_model.remove(removed + changed)
+        for name in added + changed:
+            if name in self.ld_model.row_of_name:
+                continue
+            serial = self.emulator.name_to_serial[name]
+            flags = self.row_flags(name, serial, snapshot)
+            self.ld_model.add(name, serial, flags | CHECKED if name in checked else flags)
+        self.update_log_filters()
+        self.log(f"LD list updated: {len(added)} added, {len(removed)} removed, {len(changed)} changed")
 
     def start_status_refresh(self):
-        """Start periodic status refresh every 5 seconds"""
-        self.refresh_status()
-        self.root.after(5000, self.start_status_refresh)
+        """Subscribe to the background device poller; only changed rows are pushed to the table"""
+        devices = self.emulator.devices
+        devices.configure(interval=self.status_interval, ttl=self.status_ttl)
+        devices.subscribe(lambda changes: self.root.after(0, self.apply_device_changes, changes))
+        devices.start()
 
     def refresh_status(self):
-        """Update the status of all LDs in the table"""
-        for item in self.ld_table.get_children():
-            name = self.ld_table.item(item)["values"][0]
-            new_status = "Active" if self.emulator.is_ld_running(name) else "Inactive"
-
-            current_values = list(self.ld_table.item(item)["values"])
-            if current_values[2] != new_status:
-                current_values[2] = new_status
-                self.ld_table.item(item, values=current_values)
-                
-                current_tags = list(self.ld_table.item(item, "tags"))
-                if new_status == "Active":
-                    if "inactive" in current_tags:
-                        current_tags.remove("inactive")
-                    if "active" not in current_tags:
-                        current_tags.append("active")
-                else:
-                    if "active" in current_tags:
-                        current_tags.remove("active")
-                    if "inactive" not in current_tags:
-                        current_tags.append("inactive")
-                
-                self.ld_table.item(item, tags=current_tags)
+        """Update the status of all LDs in the table from the cached device snapshot"""
+        snapshot = self.emulator.devices.snapshot()
+        self.apply_device_changes({serial: snapshot.get(serial) for serial in self.ld_model.row_of_serial})
+
+    def apply_device_changes(self, changes):
+        online, offline = [], []
+        for serial, info in changes.items():
+            row = self.ld_model.row_of_serial.get(serial)
+            if row is not None:
+                (online if info is not None else offline).append(row)
+        self.ld_model.set_flag(online, ACTIVE, True)
+        self.ld_model.set_flag(offline, ACTIVE, False)
 
     def select_all(self):
-        for item in self.ld_table.get_children():
-            if not self.ld_table.checkboxes[item]:
-                self.ld_table.toggle_checkbox(item)
+        self.ld_model.set_all(CHECKED, True)
         self.log("Selected all LD players")
 
     def deselect_all(self):
-        for item in self.ld_table.get_children():
-            if self.ld_table.checkboxes[item]:
-                self.ld_table.toggle_checkbox(item)
+        self.ld_model.set_all(CHECKED, False)
         self.log("Deselected all LD players")
 
     def log(self, message):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        """Thread-safe; flush_logs writes queued messages to the widget in batches"""
+        self.log_pipeline.emit(message)
+
+    def selected_log_ld(self):
+        value = self.log_filter.get()
+        return None if value == "All LDs" else value
+
+    def flush_logs(self):
+        entries = self.log_pipeline.drain()
+        if entries:
+            ld = self.selected_log_ld()
+            visible = [entry for entry in entries if ld is None or entry.ld == ld]
+            if visible:
+                self.append_log_text("".join(LogPipeline.format(entry) for entry in visible))
+            # Update status bar with truncated message if needed
+            message = entries[-1].message
+            status_msg = message[:100] + "..." if len(message) > 100 else message
+            self.status_bar.config(text=status_msg)
+        self.root.after(self.log_flush_ms, self.flush_logs)
+
+    def append_log_text(self, text):
         self.logs_text.config(state="normal")
-        self.logs_text.insert(tk.END, f"[{timestamp}] {message}\n")
+        self.logs_text.insert(tk.END, text)
+        # Physical lines, not entries: multi-line messages such as the run summary take several
+        self.log_line_count += text.count("\n")
+        # Limit log size to 100 lines without re-reading the widget contents
+        excess = self.log_line_count - self.log_pipeline.lines.maxlen
+        if excess > 0:
+            self.logs_text.delete("1.0", f"{excess + 1}.0")
+            self.log_line_count -= excess
         self.logs_text.see(tk.END)
-        # Limit log size to 100 lines
-        lines = self.logs_text.get("1.0", tk.END).count('\n')
-        if lines > 100:
-            self.logs_text.delete("1.0", f"{lines - 100}.0")
         self.logs_text.config(state="disabled")
-        # Update status bar with truncated message if needed
-        status_msg = message[:100] + "..." if len(message) > 100 else message
-        self.status_bar.config(text=status_msg)
 
-    def save_settings(self):
-        config_dir = "./config"
-        os.makedirs(config_dir, exist_ok=True)
-        settings_path = os.path.join(config_dir, "settings.json")
-        settings = {
+    def show_log_view(self):
+        """Switch the log widget to one LD (or all) from the in-memory buffers"""
+        self.logs_text.config(state="normal")
+        self.logs_text.delete("1.0", tk.END)
+        self.logs_text.config(state="disabled")
+        self.log_line_count = 0
+        entries = self.log_pipeline.view(self.selected_log_ld())[-self.log_pipeline.lines.maxlen:]
+        if entries:
+            self.append_log_text("".join(LogPipeline.format(entry) for entry in entries))
+
+    def update_log_filters(self):
+        names = list(self.ld_model.names)
+        self.log_pipeline.set_ld_names(names)
+        self.log_filter_box.config(values=["All LDs"] + names)
+
+    def collect_settings(self):
+        return {
             "parallel_ld": self.parallel_ld.get(),
+            "adaptive_parallel": self.adaptive_parallel.get(),
+            "min_parallel": self.min_parallel.get(),
             "boot_delay": self.boot_delay.get(),
             "task_delay": self.task_delay.get(),
             "close_delay": self.close_delay.get(),
             "scroll_duration": self.scroll_duration.get(),
+            "scroll_mode": self.scroll_mode.get(),
             "start_delay": self.start_delay.get(),
             "schedule_time": self.schedule_time.get(),
             "schedule_daily": self.schedule_daily.get(),
-            "start_same_time": self.start_same_time.get()
+            "start_same_time": self.start_same_time.get(),
+            "status_interval": self.status_interval,
+            "status_ttl": self.status_ttl,
+            "stages": self.stage_settings,
+            "custom_stages": self.custom_stages,
+            "warm_keep": self.warm_keep.get(),
+            "warm_memory_budget_mb": self.warm_memory_budget_mb.get()
         }
-        with open(settings_path, "w") as f:
-            json.dump(settings, f, indent=2)
+
+    def save_settings(self):
+        try:
+            self.runtime.update(self.collect_settings(), save=False)
+            self.runtime.save()
+        except (ValueError, tk.TclError, OSError) as e:
+            self.log(f"Error saving settings: {str(e)}")
+
+    def schedule_settings_push(self):
+        # Wait for typing to settle before applying and saving
+        if self._settings_push:
+            self.root.after_cancel(self._settings_push)
+        self._settings_push = self.root.after(500, self.push_settings)
+
+    def push_settings(self):
+        self._settings_push = None
+        try:
+            self.runtime.update(self.collect_settings())
+        except (ValueError, tk.TclError):
+            pass  # half-typed or invalid value; applied once it is valid
+        except OSError as e:
+            self.log(f"Error saving settings: {str(e)}")
 
     def load_settings(self):
         config_dir = "./config"
@@ -576,14 +446,23 @@ class LDManagerApp:
                 with open(settings_path, "r") as f:
                     settings = json.load(f)
                     self.parallel_ld.set(settings.get("parallel_ld", 3))
+                    self.adaptive_parallel.set(settings.get("adaptive_parallel", False))
+                    self.min_parallel.set(settings.get("min_parallel", 1))
                     self.boot_delay.set(settings.get("boot_delay", 40))
                     self.task_delay.set(settings.get("task_delay", 10))
                     self.close_delay.set(settings.get("close_delay", 15))
                     self.scroll_duration.set(settings.get("scroll_duration", 5))
+                    self.scroll_mode.set(settings.get("scroll_mode", "host"))
                     self.start_delay.set(settings.get("start_delay", 10))
                     self.schedule_time.set(settings.get("schedule_time", "09:00"))
                     self.schedule_daily.set(settings.get("schedule_daily", True))
                     self.start_same_time.set(settings.get("start_same_time", False))
+                    self.status_interval = settings.get("status_interval", 2)
+                    self.status_ttl = settings.get("status_ttl", 5)
+                    self.stage_settings = settings.get("stages", {})
+                    self.custom_stages = settings.get("custom_stages", [])
+                    self.warm_keep.set(settings.get("warm_keep", 0))
+                    self.warm_memory_budget_mb.set(settings.get("warm_memory_budget_mb", 0))
         except (FileNotFoundError, json.JSONDecodeError):
             self.log("Using default settings")
 
@@ -596,11 +475,10 @@ class LDManagerApp:
                     self.schedule_time.set(settings.get('time', "09:00"))
                     self.schedule_daily.set(settings.get('daily', True))
                     
+                    self.extra_schedules = settings.get('schedules', [])
                     saved_selected = settings.get('selected_lds', [])
-                    for item in self.ld_table.get_children():
-                        ld_name = self.ld_table.item(item)['values'][0]
-                        if ld_name in saved_selected and not self.ld_table.checkboxes[item]:
-                            self.ld_table.toggle_checkbox(item)
+                    self.saved_selected_lds = set(saved_selected)
+                    self.ld_model.check_names(saved_selected)
                             
         except Exception as e:
             self.log(f"Error loading schedule settings: {str(e)}")
@@ -609,15 +487,13 @@ class LDManagerApp:
         """Save current schedule settings to JSON file"""
         try:
             self.schedule_settings_file.parent.mkdir(parents=True, exist_ok=True)
-            selected_lds = [
-                self.ld_table.item(item)['values'][0] 
-                for item in self.ld_table.get_checked_items()
-            ]
+            selected_lds = self.ld_model.checked_names()
             
             settings = {
                 'time': self.schedule_time.get(),
                 'daily': self.schedule_daily.get(),
                 'selected_lds': selected_lds,
+                'schedules': self.extra_schedules,
                 'last_saved': datetime.now().isoformat()
             }
             
@@ -627,9 +503,21 @@ class LDManagerApp:
         except Exception as e:
             self.log(f"Error saving schedule settings: {str(e)}")
 
-    def start_automation(self):
-        selected_items = self.ld_table.get_checked_items()
-        selected_ld_names = [self.ld_table.item(item)["values"][0] for item in selected_items]
+    def start_automation(self, ask_resume=True, names=None):
+        selected_ld_names = names or self.ld_model.checked_names()
+        journal = RunJournal() if self.runtime["run_journal"] else None
+        # Scheduled runs start fresh rather than wait on a dialog
+        resume_state = journal.unfinished_run() if journal and ask_resume else None
+        if resume_state:
+            finished = sum(1 for name in resume_state["lds"]
+                           if len(resume_state["done"].get(name, [])) == len(resume_state["stages"]))
+            answer = Messagebox.yesno(
+                f"The last run ({resume_state['run']}) was interrupted with {finished}/{len(resume_state['lds'])} LDs "
+                f"finished. Resume it instead of starting a new run?", title="Resume")
+            if answer == "Yes":
+                selected_ld_names = resume_state["lds"]
+            else:
+                resume_state = None
         if not selected_ld_names:
             Messagebox.show_error("No LDs selected. Please select at least one LD to start automation.", title="Error")
             return
@@ -642,11 +530,12 @@ class LDManagerApp:
         self.log(f"Starting automation for {len(selected_ld_names)} LDs")
         self.log(f"Scroll duration set to {self.scroll_duration.get()} minutes.")
 
+        self.push_settings()
         self.progress["maximum"] = len(selected_ld_names)
         self.progress["value"] = 0
         self.opened_ld_names = selected_ld_names
 
-        threading.Thread(target=self.run_automation, args=(selected_ld_names,), daemon=True).start()
+        threading.Thread(target=self.run_automation, args=(selected_ld_names, journal, resume_state), daemon=True).start()
 
     def stop_automation(self):
         if not self.running_event.is_set():
@@ -659,6 +548,9 @@ class LDManagerApp:
 
         self.running_event.clear()
         self.pause_event.set()  # Ensure unpaused when stopping
+        if self.bridge:
+            # Cancels every in-flight stage right away instead of waiting for the next poll
+            self.bridge.stop()
         self.start_button.config(state="normal")
         self.pause_button.config(state="disabled")
         self.stop_button.config(state="disabled")
@@ -674,39 +566,50 @@ class LDManagerApp:
 
         threading.Thread(target=close_ld_with_delay, daemon=True).start()
 
-    def run_automation(self, selected_ld_names):
+    def run_automation(self, selected_ld_names, journal=None, resume_state=None):
         try:
             main_window = MainWindow(
                 selected_ld_names,
                 running_flag=lambda: self.running_event.is_set(),
                 ld_thread=self.parallel_ld.get(),
-                log_func=lambda msg: self.root.after(0, self.log, msg),
+                log_func=self.log,
                 start_same_time=self.start_same_time.get()
             )
-            # Share both pause and running events
-            main_window.pause_event = self.pause_event
-            main_window.em.boot_delay = self.boot_delay.get()
-            main_window.em.start_delay = self.start_delay.get()
-            main_window.em.task_delay = self.task_delay.get()
-            main_window.em.close_delay = self.close_delay.get()
-            main_window.scroll_duration = self.scroll_duration.get() * 60
-            main_window.main()
+            main_window.journal = journal
+            main_window.resume_state = resume_state
+            main_window.configure_stages(self.stage_settings, self.custom_stages)
+            if self.adaptive_parallel.get():
+                main_window.admission = AdmissionController(
+                    min_parallel=min(self.min_parallel.get(), self.parallel_ld.get()),
+                    max_parallel=self.parallel_ld.get(),
+                    log_func=main_window.log
+                )
+            # Delays, scroll time and parallelism, read live for the whole run
+            main_window.use_settings(self.runtime)
+            main_window.warm_pool = self.warm_pool
+            # The engine runs on this thread's event loop; the GUI pauses/stops it through the bridge
+            self.bridge = EngineBridge(main_window)
+            self.bridge.run()
+            self.root.after(0, self.show_run_report, main_window.metrics)
         except Exception as e:
             self.root.after(0, self.log, f"Error: {str(e)}")
         finally:
+            self.bridge = None
             self.running_event.clear()
             self.root.after(0, self.start_button.config, {"state": "normal"})
             self.root.after(0, self.pause_button.config, {"state": "disabled"})
             self.root.after(0, self.stop_button.config, {"state": "disabled"})
             self.root.after(0, self.log, "Automation task completed.")
 
+    def show_run_report(self, metrics):
+        self.report_label.config(text=metrics.summary())
+
     def batch_start(self):
-        selected_items = self.ld_table.get_checked_items()
-        if not selected_items:
+        selected_ld_names = self.ld_model.checked_names()
+        if not selected_ld_names:
             Messagebox.show_error("No LDs selected for batch start.", title="Error")
             return
             
-        selected_ld_names = [self.ld_table.item(item)["values"][0] for item in selected_items]
         self.log(f"Starting {len(selected_ld_names)} LDs in batch...")
         
         def start_lds():
@@ -727,24 +630,22 @@ class LDManagerApp:
             else:
                 for name in selected_ld_names:
                     try:
-                        success = self.emulator.start_ld(name, delay_between_starts=self.boot_delay.get())
-                        if success:
-                            self.log(f"Started LD: {name} (with delay)")
+                        boot_time = self.emulator.start_ld(name, delay_between_starts=self.boot_delay.get())
+                        if boot_time is not None:
+                            self.log(f"Started LD: {name} (ready in {boot_time:.1f}s)")
                         else:
                             self.log(f"Failed to start LD: {name}")
                     except Exception as e:
                         self.log(f"Error starting LD {name}: {str(e)}")
-                    time.sleep(self.boot_delay.get())
                 
         threading.Thread(target=start_lds, daemon=True).start()
 
     def batch_stop(self):
-        selected_items = self.ld_table.get_checked_items()
-        if not selected_items:
+        selected_ld_names = self.ld_model.checked_names()
+        if not selected_ld_names:
             Messagebox.show_error("No LDs selected for batch stop.", title="Error")
             return
             
-        selected_ld_names = [self.ld_table.item(item)["values"][0] for item in selected_items]
         self.log(f"Stopping {len(selected_ld_names)} LDs in batch...")
         
         def stop_lds():
@@ -784,13 +685,13 @@ class LDManagerApp:
 
     def start_schedule(self):
         try:
-            datetime.strptime(self.schedule_time.get(), "%H:%M")
-        except ValueError:
-            Messagebox.show_error("Invalid time format. Please use HH:MM.", title="Error")
+            NamedSchedule("default", self.schedule_time.get(), [])
+        except ValueError as e:
+            Messagebox.show_error(f"{str(e)}\n\nPlease use HH:MM or a cron expression that can fire.", title="Error")
             return
             
-        selected_items = self.ld_table.get_checked_items()
-        if not selected_items:
+        selected_rows = self.ld_model.rows_with(CHECKED)
+        if not selected_rows and not self.extra_schedules:
             Messagebox.show_error(
                 "Please select at least one LD Player before scheduling.\n\n"
                 "Tip: Double-click LD names to select them.",
@@ -799,15 +700,25 @@ class LDManagerApp:
             return
             
         self.save_schedule_settings()
-        schedule.clear()
-        
+        self.timer_engine.clear()
+
         schedule_time = self.schedule_time.get()
-        if self.schedule_daily.get():
-            schedule.every().day.at(schedule_time).do(self.run_scheduled_task)
-            self.log(f"Daily schedule set for {schedule_time} (Selected LDs: {len(selected_items)})")
-        else:
-            schedule.every().day.at(schedule_time).do(self.run_scheduled_task).tag('one_time')
-            self.log(f"One-time schedule set for {schedule_time} (Selected LDs: {len(selected_items)})")
+        if selected_rows:
+            selected_names = self.ld_model.checked_names()
+            self.timer_engine.add(NamedSchedule("default", schedule_time, selected_names, once=not self.schedule_daily.get()))
+            kind = "Daily" if self.schedule_daily.get() else "One-time"
+            self.log(f"{kind} schedule set for {schedule_time} (Selected LDs: {len(selected_rows)})")
+        scheduled = set(self.ld_model.checked_names())
+        for entry in self.extra_schedules:
+            try:
+                named = NamedSchedule.from_dict(entry, expand=parse_ld_names)
+            except (KeyError, ValueError) as e:
+                self.log(f"Skipping schedule {entry.get('name', '?')}: {str(e)}")
+                continue
+            self.timer_engine.add(named)
+            scheduled.update(named.lds)
+            self.log(f"Schedule {named.name} set for {named.when} ({len(named.lds)} LDs)")
+        self.timer_engine.start()
             
         self.schedule_running = True
         self.schedule_enable_btn.config(
@@ -816,19 +727,12 @@ class LDManagerApp:
             command=self.stop_schedule
         )
         
-        for item in self.ld_table.get_children():
-            tags = list(self.ld_table.item(item, "tags"))
-            if self.ld_table.checkboxes[item]:
-                if "scheduled" not in tags:
-                    tags.append("scheduled")
-            self.ld_table.item(item, tags=tags)
-        
-        if not self.schedule_thread or not self.schedule_thread.is_alive():
-            self.schedule_thread = threading.Thread(target=self.run_scheduler, daemon=True)
-            self.schedule_thread.start()
+        self.ld_model.set_flag([self.ld_model.row_of_name[name] for name in scheduled if name in self.ld_model.row_of_name],
+                               SCHEDULED, True)
+        self.update_schedule_preview()
 
     def stop_schedule(self):
-        schedule.clear()
+        self.timer_engine.clear()
         self.schedule_running = False
         self.schedule_enable_btn.config(
             text="Enable Schedule", 
@@ -837,30 +741,53 @@ class LDManagerApp:
         )
         self.log("Scheduling disabled")
         
-        for item in self.ld_table.get_children():
-            tags = [t for t in self.ld_table.item(item, "tags") if t != "scheduled"]
-            self.ld_table.item(item, tags=tags)
+        self.ld_model.set_flag(self.ld_model.rows_with(SCHEDULED), SCHEDULED, False)
+        self.update_schedule_preview()
+
+    def update_schedule_preview(self):
+        runs = self.timer_engine.preview(3) if self.schedule_running else []
+        if not runs:
+            self.next_run_label.config(text="Next runs: schedule disabled" if not self.schedule_running else "Next runs: none")
+            return
+        self.next_run_label.config(text="Next runs: " + ", ".join(
+            f"{due:%a %H:%M} {schedule.name} ({len(schedule.lds)} LDs)" for due, schedule in runs))
 
-    def run_scheduler(self):
-        while self.schedule_running:
-            schedule.run_pending()
-            time.sleep(1)
+    def on_schedule_due(self, schedule, lds, due):
+        # Called on the timer thread
+        self.root.after(0, self.run_scheduled_task, schedule, lds)
 
-    def run_scheduled_task(self):
+    def run_scheduled_task(self, schedule, lds):
         if not self.schedule_running:
             return
             
-        self.log("Running scheduled task...")
-        selected_items = self.ld_table.get_checked_items()
-        if not selected_items:
-            self.log("No LDs selected for scheduled task.")
-            return
-            
-        selected_ld_names = [self.ld_table.item(item)["values"][0] for item in selected_items]
-        self.root.after(0, self.start_automation)
+        self.log(f"Running schedule {schedule.name} ({len(lds)} LDs)...")
+        self.dispatch_scheduled(lds)
         
-        if not self.schedule_daily.get():
-            self.root.after(0, self.stop_schedule)
+        if not self.timer_engine.pending():
+            self.stop_schedule()
+        else:
+            self.update_schedule_preview()
+
+    def dispatch_scheduled(self, lds):
+        if self.running_event.is_set():
+            # A run is in progress: add the LDs to it so they share its slots instead of double-booking
+            threading.Thread(target=self.enqueue_scheduled, args=(lds,), daemon=True).start()
+        else:
+            self.start_automation(False, names=lds)
+
+    def enqueue_scheduled(self, lds):
+        bridge = self.bridge
+        added = bridge.enqueue(lds) if bridge else None
+        if added is None:
+            # The run is still starting up or already wrapping up; try again shortly
+            self.root.after(5000, self.dispatch_scheduled, lds)
+            return
+        self.root.after(0, self.add_opened_lds, added)
+
+    def add_opened_lds(self, names):
+        # On the Tk thread, like every other change to opened_ld_names
+        self.opened_ld_names = list(getattr(self, "opened_ld_names", [])) + list(names)
+        self.progress.config(maximum=len(self.opened_ld_names))
 
 if __name__ == "__main__":
     root = ttkb.Window(themename="cosmo")
@@ -869,6 +796,9 @@ if __name__ == "__main__":
     def on_closing():
         app.save_settings()
         app.running_event.clear()
+        app.warm_pool.close_all()
+        app.emulator.inventory.stop_auto_refresh()
+        app.log_pipeline.close()
         root.destroy()
     
     root.protocol("WM_DELETE_WINDOW", on_closing)
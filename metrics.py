@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+
+REPORTS_DIR = "./reports"
+
+# Upper bounds in seconds, Prometheus style; the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (self.max,), self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "max": round(self.max, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": {str(bound): count for bound, count in zip(self.buckets + ("+Inf",), self.counts)}
+        }
+
+
+class RunMetrics:
+    """Per-run counters: stage durations per LD, adb latency histograms, swipes and fixed-sleep idle time.
+
+    Written from the engine loop and read by the GUI, so every access takes the lock.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.finished = None
+        self.stages = {}  # ld -> {stage: seconds}
+        self.adb = {}  # command kind -> Histogram
+        self.swipes = {}  # ld -> count
+        self.swipe_targets = {}  # ld -> swipes per minute the scroll loop aimed for
+        self.scroll_time = {}  # ld -> seconds spent in the scroll loop
+        self.idle = {}  # ld -> {reason: seconds}
+        self.warm_starts = set()  # LDs whose boot was skipped because they were already up
+        self.recoveries = {}  # ld -> ["restart" | "drop", ...] from the watchdog
+        self.screen_actions = {}  # ld -> ["relaunch" | "stop", ...] after a frozen screen
+        self._lock = threading.Lock()
+
+    def record_stage(self, ld, stage, seconds):
+        with self._lock:
+            self.stages.setdefault(ld, {})[stage] = seconds
+
+    def record_adb(self, kind, seconds):
+        with self._lock:
+            histogram = self.adb.get(kind)
+            if histogram is None:
+                histogram = self.adb[kind] = Histogram()
+            histogram.observe(seconds)
+
+    def record_swipe(self, ld, count=1):
+        with self._lock:
+            self.swipes[ld] = self.swipes.get(ld, 0) + count
+
+    def record_swipe_target(self, ld, rate):
+        with self._lock:
+            self.swipe_targets[ld] = rate
+
+    def record_scroll_time(self, ld, seconds):
+        with self._lock:
+            self.scroll_time[ld] = self.scroll_time.get(ld, 0.0) + seconds
+
+    def record_idle(self, ld, reason, seconds):
+        with self._lock:
+            idle = self.idle.setdefault(ld, {})
+            idle[reason] = idle.get(reason, 0.0) + seconds
+
+    def record_warm_start(self, ld):
+        with self._lock:
+            self.warm_starts.add(ld)
+
+    def record_recovery(self, ld, action):
+        with self._lock:
+            self.recoveries.setdefault(ld, []).append(action)
+
+    def record_screen_action(self, ld, action):
+        with self._lock:
+            self.screen_actions.setdefault(ld, []).append(action)
+
+    async def timed(self, kind, awaitable):
+        """Await and record its latency under kind"""
+        started = time.monotonic()
+        try:
+            return await awaitable
+        finally:
+            self.record_adb(kind, time.monotonic() - started)
+
+    def finish(self):
+        self.finished = time.time()
+
+    def swipe_rate(self, ld):
+        """Swipes per minute over the time actually spent scrolling"""
+        seconds = self.scroll_time.get(ld, 0.0)
+        return self.swipes.get(ld, 0) * 60 / seconds if seconds else 0.0
+
+    def to_dict(self):
+        with self._lock:
+            lds = sorted(set(self.stages) | set(self.swipes) | set(self.idle))
+            stage_totals = {}
+            for times in self.stages.values():
+                for stage, seconds in times.items():
+                    stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+            return {
+                "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "finished": datetime.fromtimestamp(self.finished).isoformat(timespec="seconds") if self.finished else None,
+                "wall_seconds": round((self.finished or time.time()) - self.started, 3),
+                "stage_totals": {stage: round(seconds, 3) for stage, seconds in stage_totals.items()},
+                "idle_totals": {
+                    reason: round(sum(idle.get(reason, 0.0) for idle in self.idle.values()), 3)
+                    for reason in sorted({reason for idle in self.idle.values() for reason in idle})
+                },
+                "adb": {kind: histogram.to_dict() for kind, histogram in sorted(self.adb.items())},
+                "warm_starts": sorted(self.warm_starts),
+                "recoveries": {ld: list(actions) for ld, actions in sorted(self.recoveries.items())},
+                "screen_actions": {ld: list(actions) for ld, actions in sorted(self.screen_actions.items())},
+                "lds": {
+                    ld: {
+                        "stages": {stage: round(seconds, 3) for stage, seconds in self.stages.get(ld, {}).items()},
+                        "swipes": self.swipes.get(ld, 0),
+                        "swipes_per_min": round(self.swipe_rate(ld), 2),
+                        "target_swipes_per_min": self.swipe_targets.get(ld),
+                        "idle": {reason: round(seconds, 3) for reason, seconds in self.idle.get(ld, {}).items()}
+                    }
+                    for ld in lds
+                }
+            }
+
+    def to_prometheus(self):
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            metric("ldauto_stage_seconds", "gauge", "Duration of each pipeline stage per LD")
+            for ld, times in sorted(self.stages.items()):
+                for stage, seconds in times.items():
+                    lines.append(f'ldauto_stage_seconds{{ld="{ld}",stage="{stage}"}} {seconds:.3f}')
+
+            metric("ldauto_adb_command_seconds", "histogram", "Latency of adb commands by kind")
+            for kind, histogram in sorted(self.adb.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f'ldauto_adb_command_seconds_bucket{{kind="{kind}",le="{bound}"}} {cumulative}')
+                lines.append(f'ldauto_adb_command_seconds_sum{{kind="{kind}"}} {histogram.total:.6f}')
+                lines.append(f'ldauto_adb_command_seconds_count{{kind="{kind}"}} {histogram.count}')
+
+            metric("ldauto_swipes_total", "counter", "Swipes sent per LD")
+            for ld, count in sorted(self.swipes.items()):
+                lines.append(f'ldauto_swipes_total{{ld="{ld}"}} {count}')
+
+            metric("ldauto_swipes_per_minute", "gauge", "Achieved swipe rate over time spent scrolling")
+            for ld in sorted(self.swipes):
+                lines.append(f'ldauto_swipes_per_minute{{ld="{ld}"}} {self.swipe_rate(ld):.2f}')
+
+            metric("ldauto_swipes_target_per_minute", "gauge", "Swipe rate the scroll loop was paced for")
+            for ld, rate in sorted(self.swipe_targets.items()):
+                lines.append(f'ldauto_swipes_target_per_minute{{ld="{ld}"}} {rate:.2f}')
+
+            metric("ldauto_warm_starts_total", "counter", "LDs that were already running, so their boot was skipped")
+            lines.append(f"ldauto_warm_starts_total {len(self.warm_starts)}")
+
+            metric("ldauto_watchdog_recoveries_total", "counter", "Unresponsive LDs restarted or dropped by the watchdog")
+            for action in ("restart", "drop"):
+                count = sum(actions.count(action) for actions in self.recoveries.values())
+                lines.append(f'ldauto_watchdog_recoveries_total{{action="{action}"}} {count}')
+
+            metric("ldauto_frozen_screen_actions_total", "counter", "Facebook relaunches and stopped scrolls after a frozen screen")
+            for action in ("relaunch", "stop"):
+                count = sum(actions.count(action) for actions in self.screen_actions.values())
+                lines.append(f'ldauto_frozen_screen_actions_total{{action="{action}"}} {count}')
+
+            metric("ldauto_idle_seconds", "gauge", "Time spent in fixed sleeps per LD")
+            for ld, idle in sorted(self.idle.items()):
+                for reason, seconds in idle.items():
+                    lines.append(f'ldauto_idle_seconds{{ld="{ld}",reason="{reason}"}} {seconds:.3f}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """A few lines for the log and the GUI"""
+        report = self.to_dict()
+        lines = [f"Run took {report['wall_seconds']:.1f}s for {len(report['lds'])} LDs"]
+        if report["stage_totals"]:
+            lines.append("Stage time: " + ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in report["stage_totals"].items()))
+        if report["idle_totals"]:
+            lines.append("Fixed sleeps: " + ", ".join(f"{reason} {seconds:.1f}s" for reason, seconds in report["idle_totals"].items()))
+        if report["warm_starts"]:
+            lines.append(f"Warm starts: {len(report['warm_starts'])} LDs were already up, boot skipped")
+        if report["recoveries"]:
+            actions = [action for actions in report["recoveries"].values() for action in actions]
+            lines.append(f"Watchdog: {actions.count('restart')} restarts, {actions.count('drop')} LDs dropped "
+                         f"({', '.join(report['recoveries'])})")
+        if report["screen_actions"]:
+            actions = [action for actions in report["screen_actions"].values() for action in actions]
+            lines.append(f"Frozen screens: {actions.count('relaunch')} Facebook relaunches, {actions.count('stop')} scrolls "
+                         f"stopped ({', '.join(report['screen_actions'])})")
+        swipes = sum(ld["swipes"] for ld in report["lds"].values())
+        if swipes:
+            rates = [ld["swipes_per_min"] for ld in report["lds"].values() if ld["swipes"]]
+            lines.append(f"Swipes: {swipes}, {sum(rates) / len(rates):.1f}/min per LD")
+            # Rate is averaged over whole scroll stages, so only a clear shortfall is worth a line
+            behind = [f"{name} {ld['swipes_per_min']:.1f}/{ld['target_swipes_per_min']:g}"
+                      for name, ld in report["lds"].items()
+                      if ld["swipes"] and ld["target_swipes_per_min"]
+                      and ld["swipes_per_min"] < 0.8 * ld["target_swipes_per_min"]]
+            if behind:
+                lines.append("Below target swipe rate: " + ", ".join(behind))
+        for kind, histogram in report["adb"].items():
+            lines.append(f"adb {kind}: {histogram['count']} calls, p50 <= {histogram['p50'] * 1000:.0f} ms, "
+                         f"p95 <= {histogram['p95'] * 1000:.0f} ms")
+        return "\n".join(lines)
+
+    def write_reports(self, reports_dir=REPORTS_DIR):
+        """Write run-<timestamp>.json and .prom; returns both paths"""
+        os.makedirs(reports_dir, exist_ok=True)
+        stamp = datetime.fromtimestamp(self.started).strftime("%Y%m%d-%H%M%S")
+        json_path = os.path.join(reports_dir, f"run-{stamp}.json")
+        prom_path = os.path.join(reports_dir, f"run-{stamp}.prom")
+        with open(json_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        with open(prom_path, "w") as f:
+            f.write(self.to_prometheus())
+        return json_path, prom_path
@@ -0,0 +1,58 @@
+import random
+import time
+
+
+class SwipePacer:
+    """Deadline schedule for swipes at `rate` per minute on the monotonic clock.
+
+    Each swipe is due one (jittered) interval after the previous deadline, not after the previous
+    swipe returned, so the time a command takes is taken out of the following pause instead of being
+    added to it. When command latency spikes well above its usual level the interval is stretched,
+    up to max_backoff times, and eases back once latency settles. A run that fell behind by more than
+    an interval starts a fresh schedule instead of bursting to catch up.
+    """
+
+    def __init__(self, rate=30, jitter=0.25, spike_factor=3.0, spike_floor=0.2, max_backoff=4.0):
+        self.rate = rate  # swipes per minute; may be a callable, read for every swipe
+        self.jitter = jitter
+        self.spike_factor = spike_factor
+        self.spike_floor = spike_floor  # latencies below this never count as a spike
+        self.max_backoff = max_backoff
+        self.backoff = 1.0
+        self.baseline = None  # slow average of latency outside spikes
+        self.recent = None  # fast average of the last few latencies
+        self.reset()
+
+    def reset(self):
+        """Start the schedule over from now, e.g. after a pause"""
+        self.deadline = time.monotonic()
+
+    @property
+    def target_rate(self):
+        return self.rate() if callable(self.rate) else self.rate
+
+    def interval(self):
+        rate = self.target_rate
+        base = 60.0 / rate if rate > 0 else 0.0
+        return base * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def observe(self, latency):
+        self.recent = latency if self.recent is None else 0.7 * self.recent + 0.3 * latency
+        if self.baseline is None:
+            self.baseline = latency
+        spiking = self.recent > max(self.spike_floor, self.spike_factor * self.baseline)
+        if spiking:
+            self.backoff = min(self.max_backoff, self.backoff * 1.5)
+        else:
+            self.baseline = 0.95 * self.baseline + 0.05 * latency
+            self.backoff = max(1.0, self.backoff * 0.9)
+
+    def next_delay(self, latency):
+        """Record the last swipe's latency; seconds to wait before the next swipe"""
+        self.observe(latency)
+        interval = self.interval() * self.backoff
+        now = time.monotonic()
+        self.deadline += interval
+        if self.deadline < now - interval:
+            self.deadline = now
+        return max(0.0, self.deadline - now)
@@ -0,0 +1,224 @@
+import asyncio
+import importlib
+import time
+
+
+class Stage:
+    """One step of an LD's run.
+
+    run(name) is a coroutine function. The stage starts once every stage in `after` is done.
+    `concurrency` caps how many LDs may be inside the stage at once (None: no cap), `timeout`
+    bounds one attempt, and a failed attempt is retried `retries` times after `retry_delay`
+    seconds. When a stage still fails, the stages after it are skipped except `always` ones.
+    """
+
+    OPTIONS = ("concurrency", "timeout", "retries", "retry_delay", "always")
+
+    def __init__(self, name, run, after=(), concurrency=None, timeout=None, retries=0, retry_delay=5, always=False):
+        self.name = name
+        self.run = run
+        self.after = list(after)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.always = always
+        self.active = 0
+        self._condition = None
+
+    async def acquire(self):
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            while self.concurrency and self.active >= self.concurrency:
+                # Re-read the limit every second too, so raising it during a run takes effect
+                try:
+                    await asyncio.wait_for(self._condition.wait(), 1)
+                except asyncio.TimeoutError:
+                    pass
+            self.active += 1
+
+    async def release(self):
+        async with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+
+def load_callable(path):
+    """'package.module:function' -> the function"""
+    module_name, _, attr = path.partition(":")
+    if not module_name or not attr:
+        raise ValueError(f"Expected 'module:function', got {path!r}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class StagePipeline:
+    """The stages every LD goes through, as a DAG ordered by each stage's `after` list.
+
+    Each LD moves on to a stage as soon as that stage's dependencies are done and it has a free
+    slot, so a capped boot stage no longer holds back LDs that are already scrolling.
+    """
+
+    def __init__(self, stages=(), log_func=print):
+        self.stages = {}
+        self.log = log_func
+        self.metrics = None  # optional metrics.RunMetrics; time spent waiting for a stage slot is recorded as idle
+        for stage in stages:
+            self.add(stage)
+
+    def add(self, stage, before=()):
+        """Add a stage; `before` names existing stages that must now wait for it"""
+        if stage.name in self.stages:
+            raise ValueError(f"Stage {stage.name} already exists")
+        self.stages[stage.name] = stage
+        for name in before:
+            self.stages[name].after.append(stage.name)
+        try:
+            self.order()
+        except ValueError:
+            self.remove(stage.name)
+            raise
+        return stage
+
+    def remove(self, name):
+        self.stages.pop(name)
+        for stage in self.stages.values():
+            if name in stage.after:
+                stage.after.remove(name)
+
+    def configure(self, name, **options):
+        stage = self.stages[name]
+        for key, value in options.items():
+            if key not in Stage.OPTIONS:
+                raise ValueError(f"Unknown stage option {key}")
+            setattr(stage, key, value)
+
+    def apply_settings(self, stage_settings=None, custom_stages=None, context=None):
+        """Per-stage options ({"start": {"concurrency": 2}}) and custom stages from the settings file.
+
+        A custom stage is {"name", "callable": "module:function", "after": [...], "before": [...]}
+        plus any stage options; the function is called as function(context, name).
+        """
+        for entry in custom_stages or []:
+            func = load_callable(entry["callable"])
+            options = {key: entry[key] for key in Stage.OPTIONS if key in entry}
+            after = entry.get("after") or []
+            self.add(Stage(entry["name"], lambda name, func=func: func(context, name), after=after, **options),
+                     before=entry.get("before") or [])
+            self.log(f"Added custom stage {entry['name']} ({entry['callable']})")
+        for name, options in (stage_settings or {}).items():
+            if name not in self.stages:
+                self.log(f"Ignoring settings for unknown stage {name}")
+                continue
+            self.configure(name, **{key: value for key, value in options.items() if key in Stage.OPTIONS})
+
+    def order(self, names=None):
+        """Stage names in dependency order (a topological sort that keeps insertion order for ties)"""
+        ordered, visiting, seen = [], set(), set()
+
+        def visit(name, path):
+            if name in seen:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage dependency cycle: {' -> '.join(path + [name])}")
+            if name not in self.stages:
+                raise ValueError(f"Stage {path[-1]} depends on unknown stage {name}")
+            visiting.add(name)
+            for dependency in self.stages[name].after:
+                visit(dependency, path + [name])
+            visiting.discard(name)
+            seen.add(name)
+            ordered.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        if names is not None:
+            wanted = set(names)
+            ordered = [name for name in ordered if name in wanted]
+        return ordered
+
+    @property
+    def names(self):
+        return self.order()
+
+    def describe(self):
+        parts = []
+        for name in self.names:
+            stage = self.stages[name]
+            limits = [f"max {stage.concurrency}" if stage.concurrency else "unlimited"]
+            if stage.timeout:
+                limits.append(f"timeout {stage.timeout}s")
+            if stage.retries:
+                limits.append(f"{stage.retries} retries")
+            parts.append(f"{name} ({', '.join(limits)})")
+        return " -> ".join(parts)
+
+    async def run_ld(self, ld, names=None, running_flag=None, on_done=None):
+        """Run the given stages (default: all) for one LD; returns {stage: seconds} for the ones that finished.
+
+        Dependencies outside `names` count as done, so a resumed LD can start in the middle.
+        on_done(ld, stage, seconds) is called after each finished stage.
+        """
+        running_flag = running_flag or (lambda: True)
+        pending = self.order(names)
+        wanted = set(pending)
+        settled, failed, times = set(), set(), {}
+        tasks = {}
+        try:
+            while pending or tasks:
+                for name in list(pending):
+                    stage = self.stages[name]
+                    dependencies = [d for d in stage.after if d in wanted]
+                    if not all(d in settled for d in dependencies):
+                        continue
+                    pending.remove(name)
+                    if any(d in failed for d in dependencies) and not stage.always:
+                        self.log(f"Skipping stage {name} on LD {ld}: an earlier stage failed")
+                        settled.add(name)
+                        failed.add(name)
+                    elif running_flag():
+                        tasks[asyncio.create_task(self._run_stage(stage, ld))] = name
+                if not running_flag():
+                    pending.clear()
+                if not tasks:
+                    if pending:
+                        continue  # skipped stages unblocked others
+                    break
+                done, _ = await asyncio.wait(list(tasks), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks.pop(task)
+                    settled.add(name)
+                    seconds = task.result()
+                    if seconds is None:
+                        failed.add(name)
+                        continue
+                    times[name] = seconds
+                    if on_done:
+                        on_done(ld, name, seconds)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return times
+
+    async def _run_stage(self, stage, ld):
+        """Seconds the stage took (excluding the wait for a slot), or None after its last failed attempt"""
+        attempts = max(0, int(stage.retries)) + 1
+        for attempt in range(1, attempts + 1):
+            queued = time.monotonic()
+            await stage.acquire()
+            started = time.monotonic()
+            if self.metrics and started - queued > 0.05:
+                self.metrics.record_idle(ld, f"{stage.name}_slot", started - queued)
+            try:
+                await asyncio.wait_for(stage.run(ld), stage.timeout)
+                return time.monotonic() - started
+            except asyncio.TimeoutError:
+                error = f"timed out after {stage.timeout}s"
+            except Exception as e:
+                error = str(e)
+            finally:
+                await stage.release()
+            self.log(f"Stage {stage.name} failed on LD {ld} (attempt {attempt}/{attempts}): {error}")
+            if attempt < attempts:
+                await asyncio.sleep(stage.retry_delay)
+        return None
@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+
+def cached_age(devices):
+    """Oldest device snapshot worth serving: the shared poller refreshes it every interval anyway, so
+    asking for anything fresher would make each waiter run its own `adb devices`"""
+    return max(devices.interval, devices.ttl)
+
+
+async def probe_ready(serial, devices, shell):
+    """Return the first readiness check that fails for serial, or None when the device is fully booted"""
+    # The device poller may refresh synchronously when its snapshot is stale; keep that off the loop
+    online = await asyncio.to_thread(devices.is_online, serial, cached_age(devices))
+    try:
+        boot_completed = ((await shell(serial, ["getprop", "sys.boot_completed"])) or "").strip()
+    except Exception:
+        if online:
+            # Listed but not answering: it may have just gone, so don't wait for the next poll
+            await asyncio.to_thread(devices.snapshot, 0.5)
+        return "adb"
+    if not online:
+        # Answering before the poller listed it: it just came up, so refresh the shared snapshot (once for
+        # every LD that comes up within the same half second)
+        if not await asyncio.to_thread(devices.is_online, serial, 0.5):
+            return "adb"
+    if boot_completed != "1":
+        return "boot_completed"
+    try:
+        if not ((await shell(serial, ["pm", "path", "android"])) or "").strip().startswith("package:"):
+            return "package_manager"
+    except Exception:
+        return "adb"
+    return None
+
+
+async def wait_until_ready(serial, devices, shell, timeout, running_flag=None, initial_delay=0.5, max_delay=5.0, backoff=1.5):
+    """Poll readiness with backoff; returns measured seconds until ready, or None on timeout/stop"""
+    started = time.monotonic()
+    deadline = started + timeout
+    delay = initial_delay
+    while True:
+        if running_flag and not running_flag():
+            return None
+        if await probe_ready(serial, devices, shell) is None:
+            return time.monotonic() - started
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * backoff, max_delay)
+
+
+async def wait_until_gone(serial, devices, timeout, interval=0.5):
+    """Wait until serial drops out of adb; returns seconds waited, or None on timeout"""
+    started = time.monotonic()
+    # The LD was just quit, so a change is due: refreshing here is the transition, not routine polling
+    while await asyncio.to_thread(devices.is_present, serial, interval):
+        if time.monotonic() - started >= timeout:
+            return None
+        await asyncio.sleep(interval)
+    return time.monotonic() - started
@@ -0,0 +1,82 @@
+import importlib.util
+import struct
+import time
+from collections import namedtuple
+
+# numpy is optional (screen checks are skipped without it) and only imported once a screen is sampled,
+# so it costs nothing at startup
+
+# Thumbnail width frames are reduced to before diffing
+THUMB_WIDTH = 64
+
+ScreenSample = namedtuple("ScreenSample", ["diff", "stale_for"])
+
+
+def available():
+    return importlib.util.find_spec("numpy") is not None
+
+
+def parse_raw_frame(data):
+    """`screencap` output without -p -> (height, width, 4) RGBA array, a view on data (no copy).
+
+    The header is width, height, pixel format, plus a color space on Android 9 and later.
+    """
+    import numpy as np
+    if len(data) < 12:
+        raise ValueError(f"Screen capture too short ({len(data)} bytes)")
+    width, height, _ = struct.unpack_from("<III", data)
+    size = width * height * 4
+    header = len(data) - size
+    if not width or not height or header not in (12, 16):
+        raise ValueError(f"Unexpected screen capture: {width}x{height}, {len(data)} bytes")
+    return np.frombuffer(data, dtype=np.uint8, count=size, offset=header).reshape(height, width, 4)
+
+
+def downsample(frame, width=THUMB_WIDTH):
+    """Grayscale thumbnail about `width` pixels wide, by striding rather than averaging to keep it cheap"""
+    import numpy as np
+    step = max(1, frame.shape[1] // width)
+    small = frame[::step, ::step, :3].astype(np.uint16)
+    return ((small[..., 0] * 77 + small[..., 1] * 150 + small[..., 2] * 29) >> 8).astype(np.uint8)
+
+
+def frame_diff(a, b):
+    """Mean absolute difference of two thumbnails, 0 (identical) to 1"""
+    import numpy as np
+    if a.shape != b.shape:
+        return 1.0
+    return float(np.abs(a.astype(np.int16) - b.astype(np.int16)).mean()) / 255
+
+
+class ScreenSampler:
+    """Samples one device's screen and tracks how long it has stayed the same.
+
+    grab(serial) returns raw `screencap` bytes. A frame whose thumbnail differs from the previous one
+    by less than min_diff counts as unchanged; `stale` is set once that has lasted stale_after seconds.
+    """
+
+    def __init__(self, serial, grab, stale_after=60, min_diff=0.01):
+        self.serial = serial
+        self.grab = grab
+        self.stale_after = stale_after
+        self.min_diff = min_diff
+        self.samples = 0
+        self.reset()
+
+    def reset(self):
+        self._thumb = None
+        self._unchanged_since = None
+
+    async def sample(self):
+        thumb = downsample(parse_raw_frame(await self.grab(self.serial)))
+        now = time.monotonic()
+        diff = 1.0 if self._thumb is None else frame_diff(thumb, self._thumb)
+        if diff >= self.min_diff:
+            self._unchanged_since = now
+        self._thumb = thumb
+        self.samples += 1
+        return ScreenSample(diff, now - self._unchanged_since)
+
+    @property
+    def stale(self):
+        return self._unchanged_since is not None and time.monotonic() - self._unchanged_since >= self.stale_after
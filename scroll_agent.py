@@ -0,0 +1,140 @@
+import base64
+import time
+from collections import namedtuple
+
+from adb_client import AdbError
+from device_actor import URGENT, DeviceInterrupted
+
+AGENT_VERSION = 1
+AGENT_PATH = "/data/local/tmp/ldauto_scroll.sh"
+STATE_PREFIX = "/data/local/tmp/ldauto_scroll"
+
+# Same randomization as the host loop: swipe 800-900 -> 500-600 over 400-600 ms, 1.5-2.5 s apart.
+# Pausing keeps the clock running, like the host loop.
+AGENT_SCRIPT = f"""#!/system/bin/sh
+# ldauto scroll agent v{AGENT_VERSION}: <duration_sec> <state_prefix>
+end=$(( $(date +%s) + $1 ))
+state=$2
+echo $$ > $state.pid
+rm -f $state.stop
+n=0
+while [ $(date +%s) -lt $end ] && [ ! -f $state.stop ]; do
+  if [ -f $state.pause ]; then
+    echo "$(date +%s) $n paused" > $state.hb
+    sleep 1
+    continue
+  fi
+  input swipe 300 $((800 + RANDOM % 101)) 300 $((500 + RANDOM % 101)) $((400 + RANDOM % 201))
+  n=$((n + 1))
+  echo "$(date +%s) $n" > $state.hb
+  d=$((15 + RANDOM % 11))
+  sleep ${{d%?}}.${{d#?}}
+done
+echo "$(date +%s) $n done" > $state.hb
+rm -f $state.pid
+"""
+
+Heartbeat = namedtuple("Heartbeat", ["age", "swipes", "state"])
+
+
+def parse_heartbeat(output):
+    """'<beat epoch> <swipes> [paused|done]' then '@ <device epoch>' -> Heartbeat, or None before the first beat"""
+    beat, _, now = output.strip().rpartition("@")
+    parts = beat.split()
+    if len(parts) < 2 or not now.strip().isdigit():
+        return None
+    return Heartbeat(int(now) - int(parts[0]), int(parts[1]), parts[2] if len(parts) > 2 else "running")
+
+
+class ScrollAgent:
+    """Runs the randomized swipe loop on the device itself; the host only installs and starts it,
+    polls a heartbeat file every heartbeat_interval seconds, and stops it"""
+
+    _installed = set()
+
+    def __init__(self, serial, shell, actor, heartbeat_interval=15, stale_after=45):
+        self.serial = serial
+        self.shell = shell
+        self.actor = actor
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.swipes = 0
+
+    async def install(self):
+        """Push the script once per device and agent version"""
+        if (self.serial, AGENT_VERSION) in self._installed:
+            return
+        installed = await self.shell(self.serial, f"grep -c 'agent v{AGENT_VERSION}:' {AGENT_PATH} 2>/dev/null",
+                                     kind="agent_check")
+        if installed.strip() != "1":
+            payload = base64.b64encode(AGENT_SCRIPT.encode()).decode()
+            await self.shell(self.serial, f"echo {payload} | base64 -d > {AGENT_PATH} && chmod 755 {AGENT_PATH}",
+                             check=True, kind="agent_install")
+        self._installed.add((self.serial, AGENT_VERSION))
+
+    async def start(self, duration_sec):
+        await self.shell(self.serial, f"rm -f {STATE_PREFIX}.hb {STATE_PREFIX}.pause; "
+                                      f"nohup sh {AGENT_PATH} {int(duration_sec)} {STATE_PREFIX} >/dev/null 2>&1 &",
+                         check=True, kind="agent_start")
+
+    async def heartbeat(self):
+        output = await self.shell(self.serial, f"cat {STATE_PREFIX}.hb 2>/dev/null; echo @ $(date +%s)",
+                                  kind="agent_heartbeat")
+        return parse_heartbeat(output)
+
+    async def set_paused(self, paused):
+        await self.shell(self.serial, f"touch {STATE_PREFIX}.pause" if paused else f"rm -f {STATE_PREFIX}.pause",
+                         kind="agent_pause")
+
+    async def stop(self):
+        try:
+            await self.shell(self.serial, f"touch {STATE_PREFIX}.stop; kill $(cat {STATE_PREFIX}.pid 2>/dev/null) 2>/dev/null",
+                             priority=URGENT, kind="agent_stop")
+        except DeviceInterrupted:
+            pass  # the LD itself is being quit
+
+    async def run(self, duration_sec, pause_event=None, running_flag=None, on_swipes=None):
+        """Start the agent and watch it until it finishes; returns the swipe count it reported.
+        duration_sec may be a callable: a shorter time stops the agent early, a longer one relaunches it."""
+        duration = duration_sec if callable(duration_sec) else (lambda: duration_sec)
+        await self.install()
+        await self.start(duration())
+        started = launched = time.monotonic()
+        base = 0  # swipes from earlier launches; the device counter restarts with each one
+        finished = False
+        try:
+            while True:
+                if running_flag and not running_flag():
+                    break
+                if pause_event and not pause_event.is_set():
+                    await self.set_paused(True)
+                    await pause_event.wait()
+                    await self.set_paused(False)
+                    continue
+                remaining = duration() - (time.monotonic() - started)
+                if remaining <= 0:
+                    break
+                await self.actor.sleep(max(1.0, min(self.heartbeat_interval, remaining + 2)))
+
+                beat = await self.heartbeat()
+                if beat is None:
+                    if time.monotonic() - launched > self.stale_after:
+                        raise AdbError(f"Scroll agent on {self.serial} never reported a heartbeat")
+                    continue
+                if base + beat.swipes > self.swipes:
+                    if on_swipes:
+                        on_swipes(base + beat.swipes - self.swipes)
+                    self.swipes = base + beat.swipes
+                if beat.state == "done":
+                    remaining = duration() - (time.monotonic() - started)
+                    if remaining < 5:
+                        finished = True
+                        break
+                    await self.start(remaining)
+                    base, launched = self.swipes, time.monotonic()
+                if beat.age > self.stale_after:
+                    raise AdbError(f"Scroll agent on {self.serial} stalled, last heartbeat {beat.age}s ago")
+        finally:
+            if not finished:
+                await self.stop()
+        return self.swipes
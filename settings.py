@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+import time
+
+CONFIG_DIR = "./config"
+SETTINGS_PATH = os.path.join(CONFIG_DIR, "settings.json")
+SCHEDULE_SETTINGS_PATH = os.path.join(CONFIG_DIR, "setting_schedule.json")
+
+DEFAULT_SETTINGS = {
+    "parallel_ld": 3,
+    "adaptive_parallel": False,
+    "min_parallel": 1,
+    "boot_delay": 40,
+    "task_delay": 10,
+    "close_delay": 15,
+    "scroll_duration": 5,
+    "scroll_mode": "host",
+    "start_delay": 10,
+    "schedule_time": "09:00",
+    "schedule_daily": True,
+    "start_same_time": False,
+    "status_interval": 2,
+    "status_ttl": 5,
+    "run_journal": True,
+    "stages": {},
+    "custom_stages": [],
+    "warm_keep": 0,
+    "warm_memory_budget_mb": 0,
+    "arrange_windows": True,
+    "watchdog_timeout": 120,
+    "watchdog_action": "restart",
+    "watchdog_restarts": 1,
+    "screen_check_interval": 20,
+    "screen_stale_after": 60,
+    "swipe_rate": 30
+}
+
+
+def load_json(path, default=None):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def load_settings(path=SETTINGS_PATH):
+    """Settings from config/settings.json merged over the defaults"""
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(load_json(path, {}) or {})
+    return settings
+
+
+def load_schedule_settings(path=SCHEDULE_SETTINGS_PATH):
+    return load_json(path, {}) or {}
+
+
+def save_json_atomic(path, data):
+    """Write to a temp file next to path, fsync, then rename over it, so readers never see half a file"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def check_setting(key, value):
+    default = DEFAULT_SETTINGS.get(key)
+    if isinstance(default, bool):
+        if not isinstance(value, bool):
+            raise ValueError(f"{key} must be true or false")
+    elif isinstance(default, (int, float)):
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"{key} must be a non-negative number")
+        if key in ("parallel_ld", "min_parallel", "swipe_rate") and value < 1:
+            raise ValueError(f"{key} must be at least 1")
+    elif key == "watchdog_action" and value not in ("restart", "drop"):
+        raise ValueError("watchdog_action must be restart or drop")
+    return value
+
+
+class RuntimeSettings:
+    """Settings shared between the GUI/command line and a running engine.
+
+    The engine subscribes and applies changes as they come, so update() from any thread takes effect on
+    the next slot, stage or swipe. With a path, update() also writes the file atomically, and watch()
+    picks up edits made to the file by hand.
+    """
+
+    def __init__(self, values=None, path=None):
+        self.path = path
+        self._values = dict(DEFAULT_SETTINGS)
+        self._values.update(values or {})
+        self._file_values = dict(self._values)
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._watcher = None
+        self._saved_mtime = None
+
+    @classmethod
+    def load(cls, path=SETTINGS_PATH):
+        return cls(load_settings(path), path)
+
+    def __getitem__(self, key):
+        with self._lock:
+            return self._values[key]
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._values.get(key, default)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def subscribe(self, callback):
+        """callback(changes) with only the keys that changed; called on the updating thread"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def update(self, changes=None, save=True, **values):
+        """Apply changed values and notify subscribers; returns what changed. Raises ValueError on a bad value."""
+        changes = dict(changes or {}, **values)
+        for key, value in changes.items():
+            check_setting(key, value)
+        with self._lock:
+            changed = {key: value for key, value in changes.items() if self._values.get(key) != value}
+            self._values.update(changed)
+            listeners = list(self._listeners)
+        if not changed:
+            return changed
+        for callback in listeners:
+            try:
+                callback(changed)
+            except Exception as e:
+                print(f"Error applying settings {', '.join(changed)}: {str(e)}")
+        if save and self.path:
+            self.save()
+        return changed
+
+    def save(self):
+        snapshot = self.snapshot()
+        save_json_atomic(self.path, snapshot)
+        with self._lock:
+            self._file_values = snapshot
+            self._saved_mtime = os.path.getmtime(self.path)
+
+    def reload(self):
+        """Apply the keys that changed in the file since it was last read or written"""
+        data = load_json(self.path, None)
+        if not isinstance(data, dict):
+            return {}
+        with self._lock:
+            changed = {key: value for key, value in data.items() if self._file_values.get(key) != value}
+            self._file_values = dict(data)
+        try:
+            return self.update(changed, save=False)
+        except ValueError as e:
+            print(f"Ignoring settings file change: {str(e)}")
+            return {}
+
+    def watch(self, interval=2):
+        """Poll the file's modification time and reload it when it changes, until nobody is subscribed"""
+        if self._watcher or not self.path:
+            return
+
+        def poll():
+            last = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+            while True:
+                time.sleep(interval)
+                with self._lock:
+                    if not self._listeners:
+                        self._watcher = None
+                        return
+                try:
+                    mtime = os.path.getmtime(self.path)
+                except OSError:
+                    continue
+                # Skip our own save()s
+                if mtime != last and mtime != self._saved_mtime:
+                    self.reload()
+                last = mtime
+
+        self._watcher = threading.Thread(target=poll, name="settings-watch", daemon=True)
+        self._watcher.start()
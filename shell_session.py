@@ -0,0 +1,163 @@
+import asyncio
+import re
+
+from adb_client import AdbError, find_adb, get_async_adb_client
+
+DONE_MARKER = "__ldauto_done:"
+DONE_PATTERN = re.compile(re.escape(DONE_MARKER) + r"(\d+):(\d+)")
+
+
+class ShellSession:
+    """One long-lived `adb shell` per device: commands are written in, a single reader task collects results.
+
+    Sessions belong to the event loop that first runs a command on them.
+    """
+
+    def __init__(self, serial, client=None, reconnect_attempts=3, reconnect_delay=1.0):
+        self.serial = serial
+        self.client = client
+        self.reconnect_attempts = reconnect_attempts
+        self.reconnect_delay = reconnect_delay
+        self._writer = None
+        self._proc = None
+        self._reader_task = None
+        self._seq = 0
+        self._generation = 0
+        self._pending = {}
+        self._output = []
+        self._lock = None
+        self._closed = False
+
+    @property
+    def connected(self):
+        return self._reader_task is not None and not self._reader_task.done()
+
+    async def _open(self):
+        client = self.client or get_async_adb_client()
+        if client:
+            reader, self._writer = await client.open_service(self.serial, "shell:")
+        else:
+            self._proc = await asyncio.create_subprocess_exec(
+                find_adb(), "-s", self.serial, "shell",
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+            )
+            reader, self._writer = self._proc.stdout, self._proc.stdin
+        self._output = []
+        self._generation += 1
+        self._reader_task = asyncio.create_task(self._read_loop(reader, self._generation))
+
+    async def _ensure_open(self):
+        for attempt in range(self.reconnect_attempts):
+            if self.connected:
+                return
+            self._teardown()
+            try:
+                await self._open()
+                return
+            except (OSError, AdbError, asyncio.TimeoutError) as e:
+                print(f"Shell session to {self.serial} failed (attempt {attempt + 1}): {str(e)}")
+                await asyncio.sleep(self.reconnect_delay * (attempt + 1))
+        raise AdbError(f"Could not open shell session to {self.serial}")
+
+    async def _read_loop(self, reader, generation):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._handle_line(line.decode("utf-8", "replace").rstrip("\r\n"))
+        except (OSError, ValueError):
+            pass
+        finally:
+            # A reconnect may already have replaced this reader
+            if generation == self._generation:
+                pending, self._pending = self._pending, {}
+                for future in pending.values():
+                    if not future.done():
+                        future.set_exception(AdbError(f"Shell session to {self.serial} dropped"))
+
+    def _handle_line(self, line):
+        match = DONE_PATTERN.search(line)
+        if not match:
+            # Interactive shells echo the command line back; keep only real output
+            if f"echo {DONE_MARKER}" not in line:
+                self._output.append(line)
+            return
+        future = self._pending.pop(int(match.group(1)), None)
+        output, self._output = "\n".join(self._output), []
+        if future and not future.done():
+            future.set_result((int(match.group(2)), output))
+
+    async def run(self, command, timeout=15, wait=True):
+        """Run command in the session; returns (exit_status, output) or None when wait is False"""
+        if isinstance(command, (list, tuple)):
+            command = " ".join(str(c) for c in command)
+        if self._closed:
+            raise AdbError(f"Shell session to {self.serial} is closed")
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        future = asyncio.get_running_loop().create_future()
+        async with self._lock:
+            await self._ensure_open()
+            self._seq += 1
+            seq = self._seq
+            self._pending[seq] = future
+            try:
+                self._writer.write(f"{command}; echo {DONE_MARKER}{seq}:$?\n".encode("utf-8"))
+                await self._writer.drain()
+            except (OSError, ValueError) as e:
+                self._pending.pop(seq, None)
+                self._teardown()
+                raise AdbError(f"Shell session to {self.serial} dropped: {str(e)}")
+
+        if not wait:
+            return None
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._pending.pop(seq, None)
+            raise AdbError(f"Command '{command}' on {self.serial} timed out after {timeout}s")
+
+    def _teardown(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except (OSError, RuntimeError):
+                pass
+            self._writer = None
+        if self._proc is not None:
+            try:
+                self._proc.kill()
+            except ProcessLookupError:
+                pass
+            self._proc = None
+
+    def close(self):
+        self._closed = True
+        if self.connected and self._writer is not None:
+            try:
+                self._writer.write(b"exit\n")
+            except (OSError, RuntimeError):
+                pass
+        self._teardown()
+
+
+_sessions = {}
+
+
+def get_shell_session(serial):
+    """Shared session for serial; only call from the engine's event loop"""
+    session = _sessions.get(serial)
+    if session is None or session._closed:
+        session = _sessions[serial] = ShellSession(serial)
+    return session
+
+
+def close_shell_session(serial):
+    session = _sessions.pop(serial, None)
+    if session:
+        session.close()
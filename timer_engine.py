@@ -0,0 +1,236 @@
+import heapq
+import itertools
+import re
+import threading
+from datetime import datetime, timedelta
+
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *"
+}
+
+# minute, hour, day of month, month, day of week (0 = Sunday, 7 also accepted)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+# The timer thread re-checks the clock at least this often, so suspend/resume or a clock change can't
+# make it oversleep a due run
+MAX_SLEEP = 60
+
+
+def parse_cron_field(text, low, high):
+    values = set()
+    for part in text.split(","):
+        spec, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if spec == "*":
+            first, last = low, high
+        elif "-" in spec:
+            first, last = (int(value) for value in spec.split("-", 1))
+        else:
+            first = int(spec)
+            last = high if step > 1 else first
+        if first < low or last > high or first > last or step < 1:
+            raise ValueError(f"Cron field {part!r} is outside {low}-{high}")
+        values.update(range(first, last + 1, step))
+    return values
+
+
+class CronExpression:
+    """Five-field cron ("30 8 * * 1-5"), an alias like "@daily", or plain "HH:MM" for every day"""
+
+    def __init__(self, text):
+        self.text = text.strip()
+        expression = CRON_ALIASES.get(self.text, self.text)
+        match = re.fullmatch(r"(\d{1,2}):(\d{2})", expression)
+        if match:
+            expression = f"{int(match.group(2))} {int(match.group(1))} * * *"
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid schedule {text!r}: expected HH:MM or a five-field cron expression")
+        try:
+            parsed = [parse_cron_field(field, low, high) for field, (low, high) in zip(fields, CRON_FIELDS)]
+        except ValueError as e:
+            raise ValueError(f"Invalid schedule {text!r}: {str(e)}")
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment):
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        # Like cron: when both day fields are restricted, either one matching is enough
+        if not self.any_day and not self.any_weekday:
+            return day or weekday
+        return day and weekday
+
+    def next_after(self, moment):
+        """First matching minute strictly after moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment.year + 5
+        while candidate.year <= limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Schedule {self.text!r} never fires")
+
+
+class NamedSchedule:
+    """A group of LDs started on a cron expression.
+
+    offset shifts every run by that many seconds (so two schedules on the same cron don't boot together),
+    stagger spaces the group's LDs that many seconds apart, and once removes the schedule after it fires.
+    """
+
+    def __init__(self, name, when, lds, offset=0, stagger=0, once=False):
+        self.name = name
+        self.when = when
+        self.cron = CronExpression(when)
+        self.lds = list(lds)
+        self.offset = offset
+        self.stagger = stagger
+        self.once = once
+        # Parses but can never match (e.g. "0 0 31 2 *"): raise now, not when a TimerEngine adds it
+        self.next_run(datetime.now())
+
+    def next_run(self, after):
+        return self.cron.next_after(after - timedelta(seconds=self.offset)) + timedelta(seconds=self.offset)
+
+    def to_dict(self):
+        return {"name": self.name, "when": self.when, "lds": self.lds, "offset": self.offset,
+                "stagger": self.stagger, "once": self.once}
+
+    @classmethod
+    def from_dict(cls, data, expand=None):
+        """expand turns each entry of "lds" into names, e.g. headless.parse_ld_names for ranges"""
+        lds = data.get("lds", [])
+        if expand:
+            lds = [name for entry in ([lds] if isinstance(lds, str) else lds) for name in expand(entry)]
+        return cls(data["name"], data["when"], lds, offset=data.get("offset", 0),
+                   stagger=data.get("stagger", 0), once=data.get("once", False))
+
+
+class TimerEngine:
+    """Heap of due times for any number of named schedules; one thread sleeps until the earliest.
+
+    on_due(schedule, lds, due) is called on the timer thread for every run, or for every LD when the
+    schedule has a stagger. A run that was missed (e.g. while the machine slept) fires once, late.
+    """
+
+    def __init__(self, on_due, log_func=print):
+        self.on_due = on_due
+        self.log = log_func
+        self.schedules = {}
+        self._heap = []  # (due, seq, name, generation, schedule, lds); lds None marks the schedule's own run
+        self._generation = {}
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def _push(self, due, schedule, lds=None):
+        heapq.heappush(self._heap, (due, next(self._seq), schedule.name, self._generation[schedule.name], schedule, lds))
+
+    def add(self, schedule, now=None):
+        """Add or replace a schedule"""
+        with self._condition:
+            self.schedules[schedule.name] = schedule
+            # Entries of a replaced schedule stay in the heap and are skipped by generation
+            self._generation[schedule.name] = self._generation.get(schedule.name, 0) + 1
+            self._push(schedule.next_run(now or datetime.now()), schedule)
+            self._condition.notify()
+
+    def remove(self, name):
+        with self._condition:
+            self.schedules.pop(name, None)
+            self._generation[name] = self._generation.get(name, 0) + 1
+            self._condition.notify()
+
+    def clear(self):
+        # Every name ever seen, so the staggered LDs of a finished once-schedule are cancelled too
+        for name in list(self._generation):
+            self.remove(name)
+
+    def pending(self):
+        """Runs and staggered LDs still waiting to fire"""
+        with self._condition:
+            return sum(1 for entry in self._heap if entry[3] == self._generation.get(entry[2]))
+
+    def preview(self, count=5, now=None):
+        """Next `count` runs across all schedules as (due, schedule) pairs"""
+        now = now or datetime.now()
+
+        def runs(schedule):
+            due = schedule.next_run(now)
+            while True:
+                yield due, schedule.name, schedule
+                if schedule.once:
+                    return
+                due = schedule.next_run(due)
+
+        with self._condition:
+            schedules = list(self.schedules.values())
+        merged = heapq.merge(*(runs(schedule) for schedule in schedules))
+        return [(due, schedule) for due, _, schedule in itertools.islice(merged, count)]
+
+    def start(self):
+        with self._condition:
+            self._stopped = False
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="timer-engine", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def _take_due(self):
+        """Wait for the next due entry; returns [(schedule, lds, due)] or None once stopped"""
+        with self._condition:
+            while not self._stopped:
+                while self._heap and self._heap[0][3] != self._generation.get(self._heap[0][2]):
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                now = datetime.now()
+                delay = (self._heap[0][0] - now).total_seconds()
+                if delay > 0:
+                    self._condition.wait(min(delay, MAX_SLEEP))
+                    continue
+                due, _, name, _, schedule, lds = heapq.heappop(self._heap)
+                if lds is not None:
+                    return [(schedule, lds, due)]
+                if schedule.once:
+                    # Its staggered LDs below still fire; remove() would cancel them too
+                    self.schedules.pop(name)
+                else:
+                    self._push(schedule.next_run(max(due, now)), schedule)
+                if schedule.stagger and len(schedule.lds) > 1:
+                    for index, ld in enumerate(schedule.lds[1:], 1):
+                        self._push(due + timedelta(seconds=index * schedule.stagger), schedule, [ld])
+                    return [(schedule, schedule.lds[:1], due)]
+                return [(schedule, list(schedule.lds), due)]
+        return None
+
+    def _run(self):
+        while True:
+            fired = self._take_due()
+            if fired is None:
+                return
+            for schedule, lds, due in fired:
+                try:
+                    self.on_due(schedule, lds, due)
+                except Exception as e:
+                    self.log(f"Error running schedule {schedule.name}: {str(e)}")
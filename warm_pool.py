@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+
+from admission import emulator_usage
+
+
+class WarmPool:
+    """LDs left running after their run so the next run or schedule skips the boot.
+
+    Up to `keep` LDs stay up after their close stage (with Facebook stopped). Once all emulators together
+    use more than memory_budget_mb, idle warm LDs are quit, least recently used first; 0 means no budget.
+    One pool outlives the runs: the GUI and `headless schedule` hand it to every MainWindow they create,
+    and call close_all() when they exit.
+    """
+
+    def __init__(self, em, keep=0, memory_budget_mb=0, check_interval=30, log_func=print):
+        self.em = em
+        self.keep = keep
+        self.memory_budget_mb = memory_budget_mb
+        self.check_interval = check_interval
+        self.log = log_func
+        self.idle = OrderedDict()  # name -> when it was parked, oldest first
+        self._usage = None  # (monotonic time, emulator_usage()) from the last check
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def configure(self, keep=None, memory_budget_mb=None):
+        if keep is not None:
+            self.keep = max(0, int(keep))
+        if memory_budget_mb is not None:
+            self.memory_budget_mb = max(0, memory_budget_mb)
+
+    def park(self, name):
+        """Called instead of closing an LD; True when it stays up as a warm instance.
+        May scan the process list, so call it off the event loop."""
+        with self._lock:
+            if name not in self.idle and len(self.idle) >= self.keep:
+                return False
+        if self.memory_budget_mb and self.memory_used_mb() > self.memory_budget_mb:
+            return False
+        with self._lock:
+            self.idle[name] = time.time()
+            self.idle.move_to_end(name)
+        self.start()
+        return True
+
+    def take(self, name):
+        """The LD is in use again; True when it was waiting warm"""
+        with self._lock:
+            return self.idle.pop(name, None) is not None
+
+    def memory_used_mb(self):
+        return self.usage()[2]
+
+    def usage(self):
+        """emulator_usage(), reusing the background check's sample while it is recent"""
+        sample = self._usage
+        if sample and time.monotonic() - sample[0] < self.check_interval:
+            return sample[1]
+        usage = emulator_usage()
+        self._usage = (time.monotonic(), usage)
+        return usage
+
+    def check(self):
+        """Quit idle LDs, oldest first, beyond `keep` or while emulators use more than the budget"""
+        with self._lock:
+            extra = list(self.idle)[:max(0, len(self.idle) - self.keep)]
+        for name in extra:
+            self._evict(name, f"more than {self.keep} warm LDs")
+        if not self.memory_budget_mb:
+            return
+        emulators, _, used_mb = usage = emulator_usage()
+        self._usage = (time.monotonic(), usage)
+        if used_mb <= self.memory_budget_mb or not emulators:
+            return
+        # One LD's share of the total says roughly how many have to go
+        per_emulator_mb = used_mb / emulators
+        needed = int((used_mb - self.memory_budget_mb) / per_emulator_mb) + 1
+        with self._lock:
+            oldest = list(self.idle)[:needed]
+        for name in oldest:
+            self._evict(name, f"emulators use {used_mb:.0f} MB > {self.memory_budget_mb} MB budget")
+
+    def _evict(self, name, reason):
+        if not self.take(name):
+            return  # claimed by a run in the meantime
+        self.log(f"Closing warm LD {name}: {reason}")
+        self.em.quit_ld(name)
+
+    def close_all(self):
+        """Quit every idle LD and stop the background check; nothing enforces keep or the budget after this"""
+        self.stop()
+        with self._lock:
+            names = list(self.idle)
+        for name in names:
+            self._evict(name, "warm pool closed")
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="warm-pool", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.log(f"Error checking warm LDs: {str(e)}")
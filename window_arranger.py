@@ -0,0 +1,71 @@
+import threading
+import time
+
+
+class WindowArranger:
+    """Coalesces window layout requests into one pass on its own thread.
+
+    Every LD start calls request(); the layout runs once no request has come in for `quiet`
+    seconds, or `max_wait` seconds after the first pending request while starts keep arriving.
+    """
+
+    def __init__(self, arrange, quiet=2, max_wait=15, log_func=print):
+        self.arrange = arrange
+        self.quiet = quiet
+        self.max_wait = max_wait
+        self.log = log_func
+        self.passes = 0
+        self._first = None  # monotonic time of the oldest request not yet laid out
+        self._last = None
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def request(self):
+        with self._condition:
+            now = time.monotonic()
+            if self._first is None:
+                self._first = now
+            self._last = now
+            if not (self._thread and self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name="window-arranger", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _arrange(self):
+        try:
+            self.arrange()
+            self.passes += 1
+        except Exception as e:
+            self.log(f"Error arranging LD windows: {str(e)}")
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._first is None:
+                        # Idle: let the thread end and start again on the next request
+                        if not self._condition.wait(60) and self._first is None:
+                            self._thread = None
+                            return
+                        continue
+                    now = time.monotonic()
+                    due = min(self._last + self.quiet, self._first + self.max_wait)
+                    if now >= due:
+                        break
+                    self._condition.wait(due - now)
+                self._first = self._last = None
+            self._arrange()
+
+
+_arrangers = {}
+_arrangers_lock = threading.Lock()
+
+
+def get_window_arranger(ld_dir, arrange):
+    """The arranger for the LDPlayer in ld_dir, shared by every run that starts LDs from it;
+    arrange is only used when the first caller creates it"""
+    with _arrangers_lock:
+        arranger = _arrangers.get(ld_dir)
+        if arranger is None:
+            arranger = _arrangers[ld_dir] = WindowArranger(arrange)
+        return arranger